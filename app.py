@@ -2,7 +2,10 @@
 
 import streamlit as st
 from lib.data_store import get_db
-from lib.utils import qp
+from lib.utils import log_maintenance_due, qp, run_log_maintenance
+from lib.api import start_api_server
+from lib.identity import resolve_user_key
+from lib.assets import asset_url, inject_once
 import config
 
 # Page config
@@ -13,58 +16,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Inject global CSS
-def inject_css():
-    """Inject global CSS and Google Fonts."""
-    css = """
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Work+Sans:wght@400;600;700&display=swap" rel="stylesheet">
-    
-    <style>
-    * {
-        font-family: 'Work Sans', sans-serif;
-    }
-    
-    .main .block-container {
-        max-width: 1200px;
-        padding-top: 2rem;
-    }
-    
-    /* Card hover effects */
-    [data-testid="column"] {
-        transition: transform 0.2s ease, box-shadow 0.2s ease;
-    }
-    
-    [data-testid="column"]:hover {
-        transform: scale(1.01);
-        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    }
-    
-    /* CRAFT field styling */
-    .craftfield textarea {
-        background-color: #f5f5f5;
-        border-radius: 8px;
-    }
-    
-    /* Rounded corners */
-    button, .stButton>button {
-        border-radius: 8px;
-    }
-    
-    /* Sticky region */
-    .sticky {
-        position: sticky;
-        top: 0;
-        background: white;
-        z-index: 100;
-        padding: 1rem 0;
-    }
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
-
-
 def render_sidebar():
     """Render the persistent sidebar."""
     st.sidebar.markdown(f"""
@@ -73,20 +24,29 @@ def render_sidebar():
     </div>
     """, unsafe_allow_html=True)
     
-    # Logo placeholder
+    # Logo (served from the fingerprinted asset bundle)
     st.sidebar.markdown("---")
-    st.sidebar.markdown("**LOGO**")
+    logo = asset_url("logo.png")
+    if logo:
+        st.sidebar.markdown(f'<img class="sidebar-logo" src="{logo}" alt="Logo">', unsafe_allow_html=True)
+    else:
+        st.sidebar.markdown("**LOGO**")
     st.sidebar.markdown("---")
     
     # Function selection (v1: Sales only)
+    db = get_db()
+    metiers = db.list_metiers()
     st.sidebar.markdown("### Function")
-    st.sidebar.markdown("**Sales**")
+    if metiers:
+        icon = asset_url(metiers[0].get("icon") or "")
+        icon_html = f'<img class="metier-icon" src="{icon}" alt="">' if icon else ""
+        st.sidebar.markdown(f"{icon_html}<strong>{metiers[0]['name']}</strong>", unsafe_allow_html=True)
+    else:
+        st.sidebar.markdown("**Sales**")
     
     st.sidebar.markdown("---")
     
     # Categories
-    db = get_db()
-    metiers = db.list_metiers()
     if metiers:
         metier = metiers[0]
         categories = db.list_categories(metier["id"])
@@ -101,6 +61,7 @@ def render_sidebar():
     st.sidebar.markdown("---")
     
     # My Prompts
+    st.sidebar.caption(f"Signed in as {st.session_state.get('user_key', 'guest')}")
     with st.sidebar.expander("My Prompts"):
         if st.button("My submitted prompts", key="sidebar_my_submitted", use_container_width=True):
             st.session_state['nav_view'] = 'my_submitted'
@@ -115,7 +76,7 @@ def main():
     """Main application entry point."""
     # Initialize session state
     if "user_key" not in st.session_state:
-        st.session_state["user_key"] = "guest"
+        st.session_state["user_key"] = resolve_user_key()
     
     if "app_name" not in st.session_state:
         st.session_state["app_name"] = config.APP_NAME
@@ -123,6 +84,15 @@ def main():
     if "copilot_url" not in st.session_state:
         st.session_state["copilot_url"] = config.COPILOT_URL
     
+    # Compact closed log days and apply retention (once per day, on the job
+    # queue so no page run waits on the log directory)
+    if log_maintenance_due():
+        get_db().jobs.submit("log_maintenance", lambda: run_log_maintenance(config.LOG_RETENTION_DAYS))
+    
+    # Local JSON API for machine clients (started once per process)
+    if config.API_ENABLED:
+        start_api_server(config.API_HOST, config.API_PORT)
+    
     # Handle navigation from session state (set query params and rerun)
     nav_view = st.session_state.get('nav_view')
     if nav_view:
@@ -149,8 +119,8 @@ def main():
         st.rerun()
         return
     
-    # Inject CSS
-    inject_css()
+    # Link the bundled stylesheet (once per session)
+    inject_once()
     
     # Render sidebar
     render_sidebar()
@@ -1,5 +1,7 @@
 """Configuration constants for AI Prompt Studio."""
 
+import os
+
 APP_NAME = "AI PROMPT STUDIO"
 PRIMARY_COLOR = "#188d6d"
 FONT_FAMILY = "Work Sans"
@@ -7,6 +9,86 @@ FONT_FAMILY = "Work Sans"
 ADMIN_ROUTE = "admincoreteam50"
 COPILOT_URL = "https://copilot.microsoft.com"  # Placeholder
 
+# Logs
+LOG_RETENTION_DAYS = 90
+
+# Use/view counters are merged into prompts at most this often
+COUNTER_FLUSH_SECONDS = 5.0
+
+# "Trending" sort: an event's weight halves every this many hours
+TRENDING_HALF_LIFE_HOURS = 48
+
+# Search completions: the popularity order used for one- and two-letter
+# prefixes is refreshed at most this often
+AUTOCOMPLETE_RERANK_SECONDS = 30
+
+# Background jobs (post-approval indexing, snapshot refresh)
+JOB_WORKERS = 2
+JOB_MAX_RETRIES = 3
+
+# Approved / rejected submissions older than this (since review) move to
+# compressed segments in SUBMISSION_ARCHIVE_DIR (a subdirectory per process),
+# leaving a stub in memory; checked every SUBMISSION_ARCHIVE_CHECK_SECONDS
+SUBMISSION_ARCHIVE_AFTER_DAYS = 30
+SUBMISSION_ARCHIVE_DIR = "archive"
+SUBMISSION_ARCHIVE_CHECK_SECONDS = 3600
+
+# User identity: a header set by the authenticating reverse proxy, else a
+# cookie set by the SSO front end, else $PROMPT_STUDIO_USER, else "guest"
+IDENTITY_HEADER = "X-Forwarded-User"
+IDENTITY_COOKIE = "prompt_studio_user"
+
+# The header is only honoured on connections from these proxies (addresses
+# or CIDR networks; "127.0.0.1" for a proxy on the same host). Empty: never
+IDENTITY_TRUSTED_PROXIES = ()
+
+# The cookie is only honoured when signed with this secret
+# ("<user>.<hex HMAC-SHA256 of user>", see lib.identity.sign_user_key).
+# Empty: never
+IDENTITY_COOKIE_SECRET = os.environ.get("PROMPT_STUDIO_COOKIE_SECRET", "")
+
+# Per-user state (bookmarks, cached views) stays resident only for active
+# users: partitions idle this long, or beyond USER_MAX_RESIDENT users, are
+# evicted (bookmarks are kept in a per-process subdirectory of
+# USER_PARTITION_DIR)
+USER_IDLE_SECONDS = 1800
+USER_MAX_RESIDENT = 1000
+USER_PARTITION_DIR = "userdata"
+
+# Write admission control: token buckets per user and across all users,
+# as (refill per second, burst). A request that would wait longer than
+# ADMISSION_MAX_WAIT_SECONDS for a token is rejected
+ADMISSION_LIMITS = {
+    "rate_prompt": {"user": (0.5, 5), "global": (200.0, 400)},
+    "toggle_bookmark": {"user": (2.0, 10), "global": (400.0, 800)},
+    "create_submission": {"user": (1 / 60, 5), "global": (2.0, 20)},
+    "write_log": {"user": (10.0, 50), "global": (1000.0, 2000)},
+}
+ADMISSION_MAX_WAIT_SECONDS = 0.25
+
+# Decompressed prompt bodies kept in memory (LRU)
+BODY_CACHE_SIZE = 512
+
+# Read-only prompt packs layered under the store (built with tools/build_pack.py);
+# missing files are skipped
+PROMPT_PACKS = ["packs/catalog.pack"]
+
+# Store memory budgets (approximate deep size, measured every MEMORY_CHECK_SECONDS):
+# above the soft budget a warning is logged, above the hard budget optional
+# caches (decompressed bodies, related-prompt results, CSV export) are disabled
+MEMORY_SOFT_BUDGET_MB = 512
+MEMORY_HARD_BUDGET_MB = 1024
+MEMORY_CHECK_SECONDS = 30
+
+# Local JSON read API for machine clients (runs inside the Streamlit process)
+API_ENABLED = True
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+
+# Admin Pending tab polling interval (job metrics and the queue fragment; the
+# submission list is re-read only when it changed)
+ADMIN_POLL_SECONDS = 3
+
 # Seeds
 SEED_METIERS = [
     {"id": "sales", "name": "Sales", "icon": "sales.svg", "is_active": True}
@@ -0,0 +1,148 @@
+"""Admission control for write paths: per-user and global token buckets."""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Most per-user buckets kept; the least recently used are dropped
+MAX_USER_BUCKETS = 10000
+
+# User keys shared by many visitors: their per-user buckets are keyed by
+# client instead (see AdmissionControl)
+SHARED_USER_KEYS = frozenset({"", "guest"})
+
+
+class Throttled(RuntimeError):
+    """A write was rejected by admission control."""
+
+    def __init__(self, operation: str, retry_after: float):
+        super().__init__(f"Too many requests, please try again in {math.ceil(retry_after)} s.")
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """``burst`` tokens refilled at ``rate`` per second.
+
+    Tokens can be reserved ahead (the balance goes negative), which is how
+    an admitted request waits its turn without holding any lock.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_for(self, now: float) -> float:
+        """Seconds until one token is available (0 when it is now)."""
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class AdmissionControl:
+    """Token buckets in front of store mutations.
+
+    Each operation has a per-user and a global bucket. Anonymous visitors
+    share one user key (:data:`SHARED_USER_KEYS`), so their per-user bucket
+    is keyed by ``client_key()`` instead (client address or session); writes
+    made outside any client session only meet the global bucket. A request
+    that would have to wait more than ``max_wait`` seconds for either bucket is rejected right away
+    (:class:`Throttled`) without consuming tokens; otherwise it reserves a
+    token from both and sleeps out the shortfall, outside the lock.
+    Operations without configured limits are always admitted.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Tuple[float, float]]], max_wait: float = 0.25,
+                 client_key: Optional[Callable[[], Optional[str]]] = None):
+        """
+        Args:
+            limits: Operation -> {"user": (rate, burst), "global": (rate, burst)}
+            max_wait: Longest a request may be delayed before it is rejected
+            client_key: Identifies the current client of an anonymous
+                visitor, or returns None outside a client session
+        """
+        self.limits = limits
+        self.max_wait = max_wait
+        self.client_key = client_key
+        self._global = {op: TokenBucket(*limit["global"]) for op, limit in limits.items() if "global" in limit}
+        self._users: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._stats = {op: {"admitted": 0, "delayed": 0, "rejected": 0} for op in limits}
+        self._lock = threading.Lock()
+
+    def _bucket_key(self, user_key: str) -> Optional[str]:
+        """The per-user bucket key of a request, or None for the global bucket only."""
+        if user_key not in SHARED_USER_KEYS:
+            return user_key
+        client = self.client_key() if self.client_key else None
+        return "client:" + client if client else None
+
+    def _user_bucket(self, operation: str, bucket_key: Optional[str]) -> Optional[TokenBucket]:
+        limit = self.limits[operation].get("user")
+        if limit is None or bucket_key is None:
+            return None
+        key = (operation, bucket_key)
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = self._users[key] = TokenBucket(*limit)
+            if len(self._users) > MAX_USER_BUCKETS:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(key)
+        return bucket
+
+    def admit(self, operation: str, user_key: str = "") -> None:
+        """Admit one request, delaying it by at most ``max_wait``.
+
+        Raises:
+            Throttled: If the user's or the global budget is exhausted
+        """
+        if operation not in self.limits:
+            return
+        bucket_key = self._bucket_key(user_key)
+        with self._lock:
+            now = time.monotonic()
+            buckets = [b for b in (self._user_bucket(operation, bucket_key), self._global.get(operation)) if b]
+            wait = max((b.wait_for(now) for b in buckets), default=0.0)
+            stats = self._stats[operation]
+            if wait > self.max_wait:
+                stats["rejected"] += 1
+                raise Throttled(operation, wait)
+            for bucket in buckets:
+                bucket.tokens -= 1
+            stats["admitted"] += 1
+            if wait:
+                stats["delayed"] += 1
+        if wait:
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Admitted, delayed and rejected requests per operation."""
+        with self._lock:
+            return {op: dict(counts) for op, counts in self._stats.items()}
+
+
+_admission: Optional[AdmissionControl] = None
+_admission_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionControl:
+    """The process-wide admission control, configured from ``config``."""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                import config
+                from lib.identity import client_key
+                _admission = AdmissionControl(
+                    config.ADMISSION_LIMITS, config.ADMISSION_MAX_WAIT_SECONDS, client_key=client_key
+                )
+    return _admission
@@ -0,0 +1,211 @@
+"""Local read-only JSON API over the data store for machine clients.
+
+Runs in a daemon thread inside the Streamlit process (the store is in
+memory, so it must share the process). Responses carry ETags built from the
+store's collection generation numbers; clients sending ``If-None-Match``
+get an empty 304 until the collection changes.
+
+Endpoints::
+
+    GET /api/prompts?metier_id=&category_id=&sort=&limit=&cursor=
+    GET /api/prompts/search?q=&metier_id=&limit=
+    GET /api/complete?q=&limit=&kind=
+    GET /api/prompts/<prompt_id>
+    GET /api/categories?metier_id=
+"""
+
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from lib.data_store import get_db, CARD_FIELDS
+
+# Sort keys accepted by /api/prompts
+SORT_FIELDS = {"rating": "avg_rating", "uses": "uses_total", "recent": "created_at", "title": "title"}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+MAX_COMPLETIONS = 20
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    """Error returned to the client as a JSON body."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(params: Dict[str, List[str]], key: str) -> Optional[str]:
+    values = params.get(key)
+    return values[0] if values else None
+
+
+def _etag(*parts) -> str:
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _limit(params: Dict[str, List[str]], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    try:
+        limit = int(_param(params, "limit") or default)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be an integer")
+    if limit < 1:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be positive")
+    return min(limit, maximum)
+
+
+def list_prompts(params: Dict[str, List[str]]) -> Tuple[str, Dict]:
+    db = get_db()
+    sort = _param(params, "sort") or "rating"
+    if sort not in SORT_FIELDS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Unknown sort: {sort}")
+    limit = _limit(params)
+
+    query = db.query("prompts").where("status", "published")
+    for field in ("metier_id", "category_id", "author_id"):
+        value = _param(params, field)
+        if value:
+            query = query.where(field, value)
+    query = query.order_by(SORT_FIELDS[sort], descending=sort != "title").limit(limit)
+    query = query.select(*CARD_FIELDS).after(_param(params, "cursor"))
+
+    etag = _etag("prompts", db.generation("prompts"))
+    try:
+        rows, next_cursor = query.page()
+    except (ValueError, TypeError):  # malformed, or not comparable with the sort column
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+    return etag, {"prompts": rows, "next_cursor": next_cursor}
+
+
+def search_prompts(params: Dict[str, List[str]]) -> Tuple[str, Dict]:
+    db = get_db()
+    q = _param(params, "q") or ""
+    if not q.strip():
+        raise ApiError(HTTPStatus.BAD_REQUEST, "q is required")
+    limit = _limit(params)
+    etag = _etag("prompts", db.generation("prompts"))
+    rows = db.search_prompts(q, metier_id=_param(params, "metier_id"), fields=CARD_FIELDS, limit=limit)
+    return etag, {"prompts": rows}
+
+
+def complete(params: Dict[str, List[str]]) -> Tuple[str, Dict]:
+    db = get_db()
+    q = _param(params, "q") or ""
+    limit = _limit(params, default=8, maximum=MAX_COMPLETIONS)
+    kind = _param(params, "kind")
+    if kind not in (None, "prompt", "category", "author", "tag"):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Unknown kind: {kind}")
+    etag = _etag("completions", db.generation("prompts"), db.generation("categories"))
+    return etag, {"completions": db.complete(q, limit, kind)}
+
+
+def get_prompt(prompt_id: str) -> Tuple[str, Dict]:
+    db = get_db()
+    etag = _etag("prompts", db.generation("prompts"))
+    prompt = db.get_prompt(prompt_id)
+    if not prompt or prompt.get("status") != "published":
+        raise ApiError(HTTPStatus.NOT_FOUND, "Prompt not found")
+    return etag, {"prompt": prompt}
+
+
+def list_categories(params: Dict[str, List[str]]) -> Tuple[str, Dict]:
+    db = get_db()
+    etag = _etag("categories", db.generation("categories"))
+    metier_id = _param(params, "metier_id")
+    metiers = [metier_id] if metier_id else [m["id"] for m in db.list_metiers()]
+    categories = [c for m in metiers for c in db.list_categories(m)]
+    return etag, {"categories": categories}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the read endpoints."""
+
+    server_version = "PromptStudioAPI/1.0"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        try:
+            if path == "/api/prompts":
+                etag, body = list_prompts(params)
+            elif path == "/api/prompts/search":
+                etag, body = search_prompts(params)
+            elif path == "/api/complete":
+                etag, body = complete(params)
+            elif path.startswith("/api/prompts/"):
+                etag, body = get_prompt(path[len("/api/prompts/"):])
+            elif path == "/api/categories":
+                etag, body = list_categories(params)
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+            return
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self._send_json(HTTPStatus.OK, body, etag)
+
+    def _send_json(self, status: HTTPStatus, body: Dict, etag: Optional[str] = None) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        # Keep Streamlit's console quiet
+        pass
+
+
+def start_api_server(host: str = "127.0.0.1", port: int = 8502) -> Optional[ThreadingHTTPServer]:
+    """Start the API server in a daemon thread (once per process).
+
+    Args:
+        host: Interface to bind (local only by default)
+        port: TCP port (0 picks a free port, see ``server.server_address``)
+
+    Returns:
+        The running server, or None if the port could not be bound
+    """
+    global _server
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = ThreadingHTTPServer((host, port), ApiHandler)
+        except OSError:
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+        _server = server
+        return server
+
+
+def stop_api_server() -> None:
+    """Stop the API server if it is running."""
+    global _server
+
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
@@ -0,0 +1,92 @@
+"""Compressed on-disk segments for processed submissions."""
+
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lib.spill import process_dir
+
+# Fields of an archived submission kept in memory
+STUB_FIELDS = ("id", "status", "created_by", "published_prompt_id", "title", "created_at")
+
+SEGMENT_SUFFIX = ".seg"
+
+
+class SubmissionArchive:
+    """Append-only segment files of zlib-compressed submission records.
+
+    Each :meth:`write_segment` call writes one new file holding its records
+    back to back; the archive remembers where each record is, so loading
+    one reads and decompresses a single slice. The store is in memory, so
+    each process writes to its own subdirectory of ``directory``
+    (:func:`lib.spill.process_dir`); segments of processes that have exited
+    are removed when the archive opens.
+    """
+
+    def __init__(self, directory: str, level: int = 6):
+        self.directory = process_dir(directory)
+        self.level = level
+        self._locations: Dict[str, Tuple[str, int, int]] = {}  # id -> (path, offset, length)
+        self._segments: List[str] = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def write_segment(self, records: Iterable[Dict]) -> int:
+        """Write records to a new segment file.
+
+        Returns:
+            Number of records archived
+        """
+        blobs = [
+            (record["id"], zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"), self.level))
+            for record in records
+        ]
+        if not blobs:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            name = f"submissions-{datetime.now():%Y%m%d-%H%M%S}-{len(self._segments):04d}{SEGMENT_SUFFIX}"
+            path = os.path.join(self.directory, name)
+            tmp = path + ".tmp"
+            locations = {}
+            with open(tmp, "wb") as f:
+                for record_id, blob in blobs:
+                    locations[record_id] = (path, f.tell(), len(blob))
+                    f.write(blob)
+            os.replace(tmp, path)
+            self._segments.append(path)
+            self._locations.update(locations)
+        return len(blobs)
+
+    def load(self, record_id: str) -> Optional[Dict]:
+        """Read one archived record back, or None if it is not archived."""
+        location = self._locations.get(record_id)
+        if location is None:
+            return None
+        path, offset, length = location
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(length)))
+
+    def info(self) -> Dict:
+        """Segment count, record count and bytes on disk."""
+        with self._lock:
+            segments = list(self._segments)
+        return {
+            "segments": len(segments),
+            "records": len(self._locations),
+            "bytes": sum(os.path.getsize(p) for p in segments if os.path.exists(p)),
+        }
+
+
+def stub(record: Dict) -> Dict:
+    """The in-memory part of an archived submission."""
+    return {**{f: record.get(f) for f in STUB_FIELDS}, "archived": True}
@@ -0,0 +1,161 @@
+"""Fingerprinted static asset bundle served by Streamlit's static file route.
+
+Sources live in ``assets/``: ``app.css``, images (the logo and metier
+icons) and optional self-hosted fonts in ``assets/fonts/``, named
+``<name>-<weight>.woff2`` (e.g. ``WorkSans-600.woff2``). The bundle copies
+each file to ``static/`` under a content-hashed name, generates the
+``@font-face`` rules for the fonts, and rewrites ``url(...)`` references in
+the CSS, so a file's URL changes exactly when its content does and can be
+cached indefinitely. ``static/manifest.json`` maps source names to bundled
+ones.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+import streamlit as st
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(_ROOT, "assets")
+STATIC_DIR = os.path.join(_ROOT, "static")  # next to app.py; served at app/static/ (server.enableStaticServing)
+STATIC_URL = "app/static/"
+MANIFEST = "manifest.json"
+
+# Bundled file types
+ASSET_SUFFIXES = (".css", ".png", ".svg", ".jpg", ".ico", ".woff2", ".woff")
+
+_FONT_RE = re.compile(r"^.+-(\d{3})(italic)?\.woff2?$")
+_URL_RE = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)")
+
+_manifest: Optional[Dict[str, str]] = None
+_lock = threading.Lock()
+
+
+def _fingerprint(name: str, data: bytes) -> str:
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+
+
+def _font_faces(fonts: Dict[str, str], family: str) -> str:
+    """``@font-face`` rules for bundled font files (source name -> bundled name)."""
+    rules = []
+    for source, bundled in sorted(fonts.items()):
+        match = _FONT_RE.match(os.path.basename(source))
+        if not match:
+            continue
+        weight, italic = match.groups()
+        fmt = "woff2" if bundled.endswith(".woff2") else "woff"
+        rules.append(
+            f"@font-face {{ font-family: '{family}'; font-style: {'italic' if italic else 'normal'}; "
+            f"font-weight: {weight}; font-display: swap; src: url({bundled}) format('{fmt}'); }}"
+        )
+    return "\n".join(rules)
+
+
+def build_bundle(source_dir: str = SOURCE_DIR, static_dir: str = STATIC_DIR, font_family: str = "Work Sans") -> Dict[str, str]:
+    """Write the fingerprinted bundle and its manifest.
+
+    Bundled files that are no longer referenced are removed; unchanged
+    files keep their names, so rebuilding is idempotent.
+
+    Returns:
+        Source name (relative to ``source_dir``) -> bundled file name
+    """
+    os.makedirs(static_dir, exist_ok=True)
+    manifest: Dict[str, str] = {}
+
+    def write(name: str, data: bytes) -> str:
+        bundled = _fingerprint(os.path.basename(name), data)
+        path = os.path.join(static_dir, bundled)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        manifest[name] = bundled
+        return bundled
+
+    css_sources = []
+    for root, _dirs, files in os.walk(source_dir):
+        for filename in sorted(files):
+            if not filename.endswith(ASSET_SUFFIXES):
+                continue
+            name = os.path.relpath(os.path.join(root, filename), source_dir).replace(os.sep, "/")
+            if filename.endswith(".css"):
+                css_sources.append(name)
+                continue
+            with open(os.path.join(root, filename), "rb") as f:
+                write(name, f.read())
+
+    fonts = {name: bundled for name, bundled in manifest.items() if name.startswith("fonts/")}
+    for name in css_sources:
+        with open(os.path.join(source_dir, name), encoding="utf-8") as f:
+            css = f.read()
+        base = os.path.dirname(name)
+
+        def bundled_url(match: "re.Match") -> str:
+            target = os.path.normpath(os.path.join(base, match.group(1))).replace(os.sep, "/")
+            return f"url({manifest[target]})" if target in manifest else match.group(0)
+
+        css = _URL_RE.sub(bundled_url, css)
+        if name == "app.css" and fonts:
+            css = _font_faces(fonts, font_family) + "\n\n" + css
+        write(name, css.encode("utf-8"))
+
+    keep = set(manifest.values()) | {MANIFEST}
+    for filename in os.listdir(static_dir):
+        if filename not in keep and not filename.startswith("."):
+            os.remove(os.path.join(static_dir, filename))
+    with open(os.path.join(static_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def get_manifest() -> Dict[str, str]:
+    """The bundle manifest, building the bundle once per process."""
+    global _manifest
+    if _manifest is None:
+        with _lock:
+            if _manifest is None:
+                import config
+                _manifest = build_bundle(font_family=config.FONT_FAMILY)
+    return _manifest
+
+
+def asset_url(name: str) -> str:
+    """URL of a bundled asset (relative to the app root), or "" if unknown."""
+    bundled = get_manifest().get(name)
+    return STATIC_URL + bundled if bundled else ""
+
+
+def inject_once() -> None:
+    """Link the bundled stylesheet into the page once per session.
+
+    A one-off script adds the ``<link>`` to the page's ``<head>``, so it
+    survives reruns and is not resent with every script run; the browser
+    caches the fingerprinted file.
+    """
+    if st.session_state.get("assets_injected"):
+        return
+    href = asset_url("app.css")
+    if not href:
+        return
+    st.html(
+        f"""<script>
+        const doc = document;
+        const href = new URL({json.dumps(href)}, doc.baseURI).href;
+        let link = doc.getElementById("prompt-studio-css");
+        if (!link) {{
+            link = doc.createElement("link");
+            link.id = "prompt-studio-css";
+            link.rel = "stylesheet";
+            doc.head.appendChild(link);
+        }}
+        if (link.href !== href) link.href = href;
+        </script>""",
+        unsafe_allow_javascript=True
+    )
+    st.session_state["assets_injected"] = True
@@ -0,0 +1,199 @@
+"""Prefix completions over prompt titles, category, author and tag names."""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Matches up to this many keys are always ranked exactly; wider prefixes
+# walk the popularity order when that is cheaper than scoring every match
+SCAN_LIMIT = 256
+
+# Cost of a popularity-walk step relative to scoring one match
+WALK_COST = 0.25
+
+# Word starts indexed per label (a title is also found by its later words)
+MAX_WORDS = 8
+
+_NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+class PrefixIndex:
+    """Sorted array of folded keys answered by binary search.
+
+    Each entry (a prompt, category, author or tag) is indexed under every
+    word start of its label, so "email" finds "Cold email opener". A prefix
+    is the key range ``[prefix, prefix + "\\uffff")``: narrow ranges are
+    ranked exactly with ``score_of(kind, id)``; wide ones (one or two
+    letters) walk a per-kind popularity order, refreshed by :meth:`rerank`,
+    and stop after ``limit`` hits. Either way a lookup touches about
+    ``sqrt(limit * entries)`` items at most.
+    """
+
+    def __init__(self, score_of: Callable[[str, str], Tuple], rerank_seconds: float = 30.0):
+        self._score_of = score_of
+        self.rerank_seconds = rerank_seconds
+        self._keys: List[str] = []
+        self._refs: List[int] = []  # entry of each key, aligned with _keys
+        self._entries: List[Optional[Tuple[str, str, str]]] = []  # (kind, id, label); None once removed
+        self._entry_of: Dict[Tuple[str, str], int] = {}
+        self._folded: Dict[int, str] = {}  # entry -> " " + folded label, for popularity walks
+        self._popular: Dict[str, List[int]] = {}  # kind -> entries, best first
+        self._stale = True
+        self._ranked_at = 0.0
+        self._claimed = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entry_of)
+
+    @staticmethod
+    def _word_keys(label: str) -> List[str]:
+        words = fold(label).split()[:MAX_WORDS]
+        return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words))))
+
+    def add(self, kind: str, item_id: str, label: str) -> None:
+        """Index (or re-label) an entry."""
+        with self._lock:
+            ref = self._entry_of.get((kind, item_id))
+            if ref is not None:
+                if self._entries[ref][2] == label:
+                    return
+                self._unindex(ref)
+            else:
+                ref = self._entry_of[(kind, item_id)] = len(self._entries)
+                self._entries.append(None)
+                self._popular.setdefault(kind, []).append(ref)  # unranked until the next rerank
+            self._entries[ref] = (kind, item_id, label)
+            self._folded[ref] = " " + fold(label)
+            for key in self._word_keys(label):
+                i = bisect.bisect_left(self._keys, key)
+                self._keys.insert(i, key)
+                self._refs.insert(i, ref)
+            self._stale = True
+
+    def add_many(self, items: List[Tuple[str, str, str]]) -> None:
+        """Index many ``(kind, id, label)`` entries with one sort."""
+        with self._lock:
+            pairs = list(zip(self._keys, self._refs))
+            for kind, item_id, label in items:
+                if (kind, item_id) in self._entry_of:
+                    continue
+                ref = self._entry_of[(kind, item_id)] = len(self._entries)
+                self._entries.append((kind, item_id, label))
+                self._folded[ref] = " " + fold(label)
+                self._popular.setdefault(kind, []).append(ref)
+                pairs.extend((key, ref) for key in self._word_keys(label))
+            pairs.sort()
+            self._keys = [key for key, _ in pairs]
+            self._refs = [ref for _, ref in pairs]
+            self._stale = True
+
+    def remove(self, kind: str, item_id: str) -> None:
+        """Drop an entry."""
+        with self._lock:
+            ref = self._entry_of.pop((kind, item_id), None)
+            if ref is not None:
+                self._unindex(ref)
+                self._entries[ref] = None
+                del self._folded[ref]
+
+    def _unindex(self, ref: int) -> None:
+        """Delete an entry's keys (caller holds the lock)."""
+        for key in self._word_keys(self._entries[ref][2]):
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._refs[i] == ref:
+                    del self._keys[i]
+                    del self._refs[i]
+                    break
+                i += 1
+
+    def rerank_due(self) -> bool:
+        """Claim a popularity refresh (True at most once per ``rerank_seconds``)."""
+        with self._lock:
+            if not self._stale or self._claimed or time.time() - self._ranked_at < self.rerank_seconds:
+                return False
+            self._claimed = True
+            return True
+
+    def mark_stale(self) -> None:
+        """Note that scores changed (the order is refreshed on the next rerank)."""
+        self._stale = True
+
+    def rerank(self) -> None:
+        """Rebuild the per-kind popularity order from current scores."""
+        with self._lock:
+            entries = [(ref, entry) for ref, entry in enumerate(self._entries) if entry is not None]
+            ranked = len(self._entries)
+        scored: Dict[str, List[Tuple[Tuple, int]]] = {}
+        for ref, (kind, item_id, _label) in entries:
+            scored.setdefault(kind, []).append((self._score_of(kind, item_id), ref))
+        popular = {}
+        for kind, rows in scored.items():
+            rows.sort(key=lambda row: row[0], reverse=True)
+            popular[kind] = [ref for _, ref in rows]
+        with self._lock:
+            for ref in range(ranked, len(self._entries)):  # added while scoring
+                if self._entries[ref] is not None:
+                    popular.setdefault(self._entries[ref][0], []).append(ref)
+            self._popular = popular
+            self._stale = ranked != len(self._entries)
+            self._claimed = False
+            self._ranked_at = time.time()
+
+    def complete(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> List[Dict]:
+        """Best entries whose label has a word starting with ``prefix``.
+
+        Args:
+            prefix: Typed text (folded like the labels)
+            limit: Maximum number of completions
+            kind: Only this kind ("prompt", "category", "author", "tag")
+
+        Returns:
+            ``{"kind", "id", "label"}`` dicts, best first
+        """
+        key = fold(prefix)
+        if not key or limit <= 0:
+            return []
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_left(self._keys, key + "\uffff", lo)
+            # A walk visits about limit * entries / matches items
+            if hi - lo <= max(SCAN_LIMIT, math.isqrt(int(limit * len(self._entry_of) * WALK_COST))):
+                refs = {r for r in self._refs[lo:hi] if kind is None or self._entries[r][0] == kind}
+                entries = [self._entries[r] for r in refs]
+            else:
+                entries = self._walk_popular(key, limit, kind)
+        best = heapq.nlargest(limit, entries, key=lambda e: (self._score_of(e[0], e[1]), e[2]))
+        return [{"kind": k, "id": item_id, "label": label} for k, item_id, label in best]
+
+    def _walk_popular(self, key: str, limit: int, kind: Optional[str]) -> List[Tuple[str, str, str]]:
+        """First ``limit`` matches per kind in popularity order (caller holds the lock)."""
+        found = []
+        needle = " " + key
+        for popular_kind, refs in self._popular.items():
+            if kind is not None and popular_kind != kind:
+                continue
+            hits = 0
+            for ref in refs:
+                entry = self._entries[ref]
+                if entry is None:
+                    continue
+                if needle in self._folded[ref]:
+                    found.append(entry)
+                    hits += 1
+                    if hits >= limit:
+                        break
+        return found
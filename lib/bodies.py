@@ -0,0 +1,111 @@
+"""Compressed storage for large prompt text bodies."""
+
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# Large text fields kept out of the resident prompt summaries
+BODY_FIELDS = (
+    "craft_context",
+    "craft_role",
+    "craft_action",
+    "craft_format",
+    "craft_tone",
+    "full_text",
+)
+
+
+class BodyStore:
+    """zlib-compressed prompt bodies with an LRU of decompressed ones.
+
+    Every body is stored compressed; only the ``cache_size`` most recently
+    opened prompts are kept decompressed, so resident memory follows the
+    number of active prompts rather than total prompt text.
+
+    ``fallback`` is consulted for prompts not stored here (the read-only
+    prompt packs); a ``put`` shadows the fallback copy.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 512,
+        level: int = 6,
+        fallback: Optional[Callable[[str], Optional[Dict[str, str]]]] = None
+    ):
+        self.cache_size = cache_size
+        self.level = level
+        self.fallback = fallback
+        self._compressed: Dict[str, bytes] = {}
+        self._cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._raw_bytes = 0
+        self.caching = True
+        self._lock = threading.Lock()
+
+    def __contains__(self, prompt_id: str) -> bool:
+        return prompt_id in self._compressed
+
+    def put(self, prompt_id: str, bodies: Dict[str, str]) -> None:
+        """Store (or replace) the bodies of a prompt."""
+        raw = json.dumps({f: bodies.get(f) or "" for f in BODY_FIELDS}, ensure_ascii=False).encode("utf-8")
+        blob = zlib.compress(raw, self.level)
+        with self._lock:
+            old = self._compressed.get(prompt_id)
+            if old is not None:
+                self._raw_bytes -= len(zlib.decompress(old))
+            self._compressed[prompt_id] = blob
+            self._raw_bytes += len(raw)
+            self._cache.pop(prompt_id, None)
+
+    def _decode(self, blob: bytes) -> Dict[str, str]:
+        return json.loads(zlib.decompress(blob))
+
+    def get(self, prompt_id: str) -> Optional[Dict[str, str]]:
+        """Get a prompt's bodies, caching the decompressed copy unless caching is off."""
+        with self._lock:
+            bodies = self._cache.get(prompt_id)
+            if bodies is not None:
+                self._cache.move_to_end(prompt_id)
+                return bodies
+            blob = self._compressed.get(prompt_id)
+        if blob is not None:
+            bodies = self._decode(blob)
+        elif self.fallback is not None:
+            bodies = self.fallback(prompt_id)
+        if bodies is None or not self.caching:
+            return bodies
+
+        with self._lock:
+            self._cache[prompt_id] = bodies
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return bodies
+
+    def set_caching(self, enabled: bool) -> None:
+        """Turn the decompressed LRU on or off (off also empties it)."""
+        with self._lock:
+            self.caching = enabled
+            if not enabled:
+                self._cache.clear()
+
+    def peek(self, prompt_id: str) -> Optional[Dict[str, str]]:
+        """Get a prompt's bodies without touching the LRU (for scans)."""
+        with self._lock:
+            bodies = self._cache.get(prompt_id)
+            blob = self._compressed.get(prompt_id)
+        if bodies is not None:
+            return bodies
+        if blob is not None:
+            return self._decode(blob)
+        return self.fallback(prompt_id) if self.fallback is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        """Stored prompt count, raw vs. compressed bytes and LRU size."""
+        with self._lock:
+            return {
+                "prompts": len(self._compressed),
+                "raw_bytes": self._raw_bytes,
+                "compressed_bytes": sum(len(b) for b in self._compressed.values()),
+                "cached": len(self._cache),
+            }
@@ -0,0 +1,128 @@
+"""Striped in-memory counters for hot per-prompt statistics."""
+
+import itertools
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+# Stripes per counter: concurrent sessions rarely share a stripe lock
+DEFAULT_STRIPES = 16
+
+# Threads take stripe slots round-robin on first use (thread idents are
+# aligned addresses, so ``ident % n`` would put every thread on stripe 0)
+_next_slot = itertools.count()
+_thread_slot = threading.local()
+
+
+def _slot() -> int:
+    """This thread's stripe slot."""
+    slot = getattr(_thread_slot, "slot", None)
+    if slot is None:
+        slot = _thread_slot.slot = next(_next_slot)
+    return slot
+
+
+class StripedCounter:
+    """Monotonic counter set split across lock stripes.
+
+    Each thread increments its own round-robin stripe, so clicks
+    from different sessions do not serialize on one lock. Reads merge the
+    stripes lazily.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES):
+        self._stripes: List[Tuple[threading.Lock, Dict[Hashable, int]]] = [
+            (threading.Lock(), defaultdict(int)) for _ in range(stripes)
+        ]
+
+    def incr(self, key: Hashable, n: int = 1) -> None:
+        """Add ``n`` to the count for ``key``."""
+        lock, counts = self._stripes[_slot() % len(self._stripes)]
+        with lock:
+            counts[key] += n
+
+    def get(self, key: Hashable) -> int:
+        """Return the merged count for ``key``."""
+        total = 0
+        for lock, counts in self._stripes:
+            with lock:
+                total += counts.get(key, 0)
+        return total
+
+    def totals(self) -> Dict[Hashable, int]:
+        """Return merged counts for all keys."""
+        merged: Dict[Hashable, int] = defaultdict(int)
+        for lock, counts in self._stripes:
+            with lock:
+                items = list(counts.items())
+            for key, value in items:
+                merged[key] += value
+        return dict(merged)
+
+
+class CounterService:
+    """Named striped counters flushed periodically into the store.
+
+    Counts are monotonic; a flush hands only the increase since the previous
+    flush to ``apply``.
+    """
+
+    def __init__(self, apply: Callable[[str, Hashable, int], None], flush_interval: float = 5.0):
+        self._apply = apply
+        self.flush_interval = flush_interval
+        self._counters: Dict[str, StripedCounter] = {}
+        self._flushed: Dict[str, Dict[Hashable, int]] = {}
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def counter(self, name: str) -> StripedCounter:
+        """Get (or create) a named counter."""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._flush_lock:
+                counter = self._counters.setdefault(name, StripedCounter())
+                self._flushed.setdefault(name, {})
+        return counter
+
+    def incr(self, name: str, key: Hashable, n: int = 1) -> None:
+        """Increment a counter and flush if the interval has elapsed."""
+        self.counter(name).incr(key, n)
+        self.maybe_flush()
+
+    def pending(self, name: str, key: Hashable) -> int:
+        """Return the count for ``key`` not yet flushed to the store."""
+        if name not in self._counters:
+            return 0
+        return self._counters[name].get(key) - self._flushed[name].get(key, 0)
+
+    def maybe_flush(self) -> None:
+        """Flush if the interval has elapsed and no other flush is running."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush(blocking=False)
+
+    def flush(self, blocking: bool = True) -> int:
+        """Apply the increase of every counter since the last flush.
+
+        Args:
+            blocking: Wait for a concurrent flush instead of skipping
+
+        Returns:
+            Number of keys updated
+        """
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            updated = 0
+            for name, counter in list(self._counters.items()):
+                flushed = self._flushed[name]
+                for key, total in counter.totals().items():
+                    delta = total - flushed.get(key, 0)
+                    if delta:
+                        self._apply(name, key, delta)
+                        flushed[key] = total
+                        updated += 1
+            self._last_flush = time.monotonic()
+            return updated
+        finally:
+            self._flush_lock.release()
@@ -1,9 +1,64 @@
 """In-memory data store for AI Prompt Studio."""
 
+import os
+import threading
+import time
 import uuid
-from typing import Optional, List, Dict
-from datetime import datetime
+from typing import Optional, List, Dict, Iterable
+from datetime import datetime, timedelta
 import config
+from lib.admission import get_admission
+from lib.archive import SubmissionArchive, stub
+from lib.autocomplete import PrefixIndex
+from lib.bodies import BodyStore, BODY_FIELDS
+from lib.counters import CounterService
+from lib.facets import FACET_FIELDS, FacetIndex
+from lib.jobs import JobQueue
+from lib.memory import MemoryMonitor, deep_size, HARD
+from lib.packs import PackError, PackOverlay, PromptPack
+from lib.query import HashIndex, Query
+from lib.ratings import RatingStore
+from lib.recommend import SimilarityIndex
+from lib.slugs import SlugRegistry, slugify
+from lib.snapshot import PublishedSnapshot
+from lib.templates import TemplateError, build_full_text, compile_template
+from lib.trending import TrendingIndex
+from lib.users import UserPartitions
+from lib.versioning import PromptHistory, VERSIONED_FIELDS, next_version
+
+
+# Prompt fields fed by the striped counters
+COUNTER_FIELDS = {"uses": "uses_total", "views": "views_total"}
+
+# Change events and the collection whose generation they move
+EVENT_COLLECTIONS = {
+    "submission_created": "submissions",
+    "submission_status_changed": "submissions",
+    "rating_added": "ratings",
+}
+
+# Fields with maintained equality indexes, per collection
+INDEXED_FIELDS = {
+    "prompts": ("status", "metier_id", "category_id", "author_id"),
+    "submissions": ("status", "created_by"),
+}
+
+# Summary fields the views sort on, gathered into columns for pack prompts
+SORT_FIELDS = ("avg_rating", "uses_total", "views_total", "created_at")
+
+# Prompt fields needed to render cards and lists
+CARD_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "category_id",
+    "category_name",
+    "author_display_name_snapshot",
+    "avg_rating",
+    "uses_total",
+    "created_at",
+    "tags",
+)
 
 
 class DataStore:
@@ -13,37 +68,268 @@ class DataStore:
         self.metiers: List[Dict] = []
         self.categories: List[Dict] = []
         self.authors: List[Dict] = []
-        self.prompts: List[Dict] = []
+        self.slugs = SlugRegistry()  # name -> record per metier/category/author namespace, and by id
+        self.prompts: List[Dict] = []  # summaries; bodies live in self.bodies
         self.submissions: List[Dict] = []
-        self.ratings: List[Dict] = []
-        self.bookmarks: List[Dict] = []
+        self.ratings = RatingStore()
+        self.prompt_history: Dict[str, PromptHistory] = {}
+        self._templates: Dict[str, Optional[List[str]]] = {}  # prompt_id -> compiled segments (None: static)
+        self.bodies = BodyStore(config.BODY_CACHE_SIZE, fallback=self._pack_bodies)
+        self._prompts_by_id = PackOverlay()  # writable summaries over read-only packs
+        self._submissions_by_id: Dict[str, Dict] = {}
+        self.archive = SubmissionArchive(config.SUBMISSION_ARCHIVE_DIR)
+        self._archive_checked_at = time.time()
+        self.users = UserPartitions(
+            config.USER_PARTITION_DIR,
+            idle_seconds=config.USER_IDLE_SECONDS,
+            max_resident=config.USER_MAX_RESIDENT
+        )
+        self._indexes: Dict[str, Dict[str, HashIndex]] = {
+            collection: {f: HashIndex(f) for f in fields}
+            for collection, fields in INDEXED_FIELDS.items()
+        }
+        self.counters = CounterService(self._apply_counter, config.COUNTER_FLUSH_SECONDS)
+        self.published_snapshot = PublishedSnapshot()
+        self.similarity = SimilarityIndex()
+        self.trending = TrendingIndex(config.TRENDING_HALF_LIFE_HOURS)
+        self.facets = FacetIndex()
+        self.completions = PrefixIndex(self._completion_score, config.AUTOCOMPLETE_RERANK_SECONDS)
+        self.admission = get_admission()
+        self.jobs = JobQueue(workers=config.JOB_WORKERS, max_retries=config.JOB_MAX_RETRIES)
+        self.memory = MemoryMonitor(
+            self.memory_sizes,
+            soft_bytes=config.MEMORY_SOFT_BUDGET_MB * 2**20,
+            hard_bytes=config.MEMORY_HARD_BUDGET_MB * 2**20,
+            interval=config.MEMORY_CHECK_SECONDS,
+            on_level=self._on_memory_level
+        )
+        
+        # Per-collection change counters
+        self._generations: Dict[str, int] = {}
+        self._generations_lock = threading.Lock()  # bumps come from sessions, jobs and API threads
         
         # Seed data
         self._seed_data()
+        for path in config.PROMPT_PACKS:
+            if os.path.exists(path):
+                try:
+                    self.load_pack(path)
+                except PackError as e:
+                    from lib.utils import write_log
+                    write_log("pack_error", "system", {"path": path, "error": str(e)})
     
     def _seed_data(self):
         """Initialize with seed data."""
         # Seed metiers
         for metier_data in config.SEED_METIERS:
             metier = metier_data.copy()
-            metier.setdefault("id", f"metier_{metier_data['name'].lower()}")
+            if "id" not in metier:
+                metier, _ = self.slugs.get_or_create("metier", "", metier["name"], lambda mid, _slug: {**metier, "id": mid})
+            else:
+                self.slugs.register("metier", "", metier["name"], metier)
             self.metiers.append(metier)
         
-        # Seed categories
+        # Seed categories keep their historical ids ("cat_négociation"), used
+        # by existing links and stored references; the folded id is an alias
         for cat_data in config.SEED_CATEGORIES:
-            category = {
-                "id": f"cat_{cat_data['name'].lower().replace(' ', '_')}",
-                "metier_id": cat_data["metier_id"],
-                "name": cat_data["name"],
-                "is_active": cat_data.get("is_active", True)
-            }
-            self.categories.append(category)
+            legacy_id = "cat_" + cat_data["name"].lower().replace(" ", "_")
+            category, created = self.slugs.get_or_create(
+                "category", cat_data["metier_id"], cat_data["name"],
+                lambda _cat_id, _slug: {
+                    "id": legacy_id,
+                    "metier_id": cat_data["metier_id"],
+                    "name": cat_data["name"],
+                    "is_active": cat_data.get("is_active", True)
+                }
+            )
+            if created:
+                self.slugs.alias("category", self.slugs.default_id("category", cat_data["name"]), legacy_id)
+                self.categories.append(category)
         
         # Seed authors
         for author_data in config.SEED_AUTHORS:
             author = author_data.copy()
-            author.setdefault("normalized_key", f"auth_{author_data['display_name'].lower()}")
+            author.setdefault("normalized_key", slugify(author_data["display_name"]))
+            self.slugs.register("author", "", author["display_name"], author)
             self.authors.append(author)
+        
+        self.completions.add_many(
+            [("category", c["id"], c["name"]) for c in self.categories]
+            + [("author", a["id"], a["display_name"]) for a in self.authors]
+        )
+    
+    def load_pack(self, path: str) -> PromptPack:
+        """Open a read-only prompt pack and layer it under the store.
+        
+        Reference records are merged and the pack's indexed columns are
+        added to the prompt indexes; summaries and bodies stay in the
+        mapped file until first accessed. The snapshot and similarity
+        index are filled by a background job.
+        
+        Raises:
+            PackError: If the file is not a readable prompt pack
+        """
+        pack = PromptPack(path)
+        shadowed = {prompt_id for prompt_id in pack.ids if prompt_id in self._prompts_by_id}
+        self._prompts_by_id.attach(pack)
+        
+        for existing, records, key in (
+            (self.metiers, pack.metiers, "id"),
+            (self.categories, pack.categories, "id"),
+            (self.authors, pack.authors, "id"),
+        ):
+            known = {r.get(key) for r in existing}
+            existing.extend(r for r in records if r.get(key) not in known)
+        for kind, records, namespace_of, name_of in (
+            ("metier", pack.metiers, lambda r: "", lambda r: r.get("name")),
+            ("category", pack.categories, lambda r: r.get("metier_id") or "", lambda r: r.get("name")),
+            ("author", pack.authors, lambda r: "", lambda r: r.get("display_name")),
+        ):
+            for record in records:
+                if record.get("id") and self.slugs.get(kind, record["id"]) is None:
+                    self.slugs.register(kind, namespace_of(record), name_of(record) or record["id"], record)
+        self.completions.add_many(
+            [("category", c["id"], c["name"]) for c in pack.categories]
+            + [("author", a["id"], a["display_name"]) for a in pack.authors]
+        )
+        
+        for field, index in self._indexes["prompts"].items():
+            values = pack.column(field)
+            if values is None:
+                continue
+            for prompt_id, value in zip(pack.ids, values):
+                if prompt_id not in shadowed:
+                    index.add(prompt_id, value)
+        
+        columns = {facet: pack.column(field) for facet, field in FACET_FIELDS.items()}
+        statuses = pack.column("status")
+        self.facets.add_many(
+            (prompt_id, {
+                facet: _as_list(values[i]) for facet, values in columns.items() if values is not None
+            })
+            for i, prompt_id in enumerate(pack.ids)
+            if prompt_id not in shadowed and (statuses is None or statuses[i] == "published")
+        )
+        tags = pack.column("tags") or ()
+        self.completions.add_many([("tag", tag, tag) for tag in {t for row in tags for t in row or ()}])
+        
+        self._bump("prompts")
+        self._bump("categories")
+        self.jobs.submit("index_pack", lambda: self._index_pack(pack), pack=pack.name)
+        return pack
+    
+    def _pack_bodies(self, prompt_id: str) -> Optional[Dict[str, str]]:
+        """Bodies of a prompt that only exists in a pack."""
+        for pack in self._prompts_by_id.packs:
+            if prompt_id in pack:
+                return pack.bodies(prompt_id)
+        return None
+    
+    def _index_pack(self, pack: PromptPack) -> None:
+        """Add a pack's published prompts to the snapshot, similarity and completion indexes.
+        
+        Only summaries are decoded: pack prompts are matched for similarity
+        on their title and description, and bodies stay compressed on disk
+        until a prompt is opened (an edit reindexes it with its full text).
+        """
+        pack.derive(SORT_FIELDS)
+        titles = []
+        for prompt_id in pack.ids:
+            summary = self._prompts_by_id.peek(prompt_id)
+            if not summary or summary.get("status") != "published":
+                continue
+            self.published_snapshot.upsert(summary)
+            self.similarity.add(summary)
+            titles.append(("prompt", prompt_id, summary.get("title") or ""))
+        self.completions.add_many(titles)
+    
+    def list_packs(self) -> List[Dict]:
+        """Describe the loaded prompt packs."""
+        return [pack.info() for pack in self._prompts_by_id.packs]
+    
+    def memory_sizes(self) -> Dict[str, int]:
+        """Approximate bytes held per collection, index and derived structure.
+        
+        Mapped prompt packs are not included (see ``list_packs``); their
+        pages belong to the OS page cache.
+        """
+        sizes = {
+            "prompts": deep_size(self._prompts_by_id),
+            "prompt bodies": deep_size(self.bodies),
+            "prompt history": deep_size(self.prompt_history),
+            "templates": deep_size(self._templates),
+            "submissions": deep_size([self.submissions, self._submissions_by_id]),
+            "ratings": deep_size(self.ratings),
+            "user partitions": deep_size(self.users),
+            "reference data": deep_size([self.metiers, self.categories, self.authors]),
+            "published snapshot": deep_size(self.published_snapshot),
+            "similarity index": deep_size(self.similarity),
+            "trending": deep_size(self.trending),
+            "facets": deep_size(self.facets),
+            "completions": deep_size(self.completions),
+            "counters": deep_size(self.counters),
+            "jobs": deep_size(self.jobs),
+        }
+        for collection, indexes in self._indexes.items():
+            for field, index in indexes.items():
+                sizes[f"index {collection}.{field}"] = deep_size(index)
+        return sizes
+    
+    def _on_memory_level(self, level: str, total_bytes: int) -> None:
+        """Log a budget crossing; above the hard budget, stop optional caching."""
+        from lib.utils import write_log
+        
+        write_log("memory_budget", "system", {
+            "level": level,
+            "total_mb": round(total_bytes / 2**20, 1),
+            "soft_mb": config.MEMORY_SOFT_BUDGET_MB,
+            "hard_mb": config.MEMORY_HARD_BUDGET_MB,
+        })
+        caching = level != HARD
+        self.bodies.set_caching(caching)
+        self.similarity.set_caching(caching)
+        self.published_snapshot.set_caching(caching)
+    
+    def generation(self, collection: str) -> int:
+        """Get the change counter of a collection."""
+        return self._generations.get(collection, 0)
+    
+    def _bump(self, collection: str) -> None:
+        """Mark a collection as changed."""
+        with self._generations_lock:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+    
+    def _emit(self, event: str) -> None:
+        """Move the generation of the collection an event changes."""
+        self._bump(EVENT_COLLECTIONS[event])
+    
+    def _index_add(self, collection: str, record: Dict) -> None:
+        """Add a record to every index of its collection."""
+        for field, index in self._indexes[collection].items():
+            index.add(record["id"], record.get(field))
+    
+    def _index_set(self, collection: str, record: Dict, field: str, value) -> None:
+        """Change an indexed field of a record."""
+        self._indexes[collection][field].update(record["id"], record.get(field), value)
+        record[field] = value
+    
+    def query(self, collection: str) -> Query:
+        """Start a query on "prompts" or "submissions".
+        
+        Example:
+            db.query("prompts").where("category_id", cat_id).order_by("avg_rating", descending=True).limit(3).all()
+        """
+        if self.memory.due():
+            self.jobs.submit("memory_check", self.memory.check)
+        if time.time() - self._archive_checked_at >= config.SUBMISSION_ARCHIVE_CHECK_SECONDS:
+            self._archive_checked_at = time.time()
+            self.jobs.submit("archive_submissions", self.archive_processed)
+        if collection == "prompts":
+            self.counters.maybe_flush()
+            return Query(collection, self._prompts_by_id, self._indexes[collection], self._project)
+        if collection == "submissions":
+            return Query(collection, self._submissions_by_id, self._indexes[collection])
+        raise ValueError(f"Unknown collection: {collection}")
     
     def list_metiers(self, active_only: bool = True) -> List[Dict]:
         """List all metiers."""
@@ -61,29 +347,24 @@ class DataStore:
     
     def get_category(self, category_id: str) -> Optional[Dict]:
         """Get a category by ID."""
-        for cat in self.categories:
-            if cat["id"] == category_id:
-                return cat
-        return None
+        return self.slugs.get("category", category_id)
     
     def get_or_create_category(self, metier_id: str, name: str) -> Dict:
-        """Get or create a category."""
-        # Normalize name for ID
-        cat_id = f"cat_{name.lower().replace(' ', '_')}"
-        
-        # Check if exists
-        for cat in self.categories:
-            if cat["id"] == cat_id and cat["metier_id"] == metier_id:
-                return cat
-        
-        # Create new
-        new_cat = {
-            "id": cat_id,
-            "metier_id": metier_id,
-            "name": name,
-            "is_active": True
-        }
+        """Get or create a category.
+        
+        Names are matched within the metier up to case, accents and
+        punctuation; a new category's id is unique across metiers.
+        """
+        new_cat, created = self.slugs.get_or_create(
+            "category", metier_id, name,
+            lambda cat_id, _slug: {"id": cat_id, "metier_id": metier_id, "name": name, "is_active": True}
+        )
+        if not created:
+            return new_cat
+        
         self.categories.append(new_cat)
+        self.completions.add("category", new_cat["id"], name)
+        self._bump("categories")
         return new_cat
     
     def list_authors(self, active_only: bool = True) -> List[Dict]:
@@ -95,34 +376,39 @@ class DataStore:
     
     def get_author(self, author_id: str) -> Optional[Dict]:
         """Get an author by ID."""
-        for author in self.authors:
-            if author["id"] == author_id:
-                return author
-        return None
+        return self.slugs.get("author", author_id)
     
     def get_or_create_author(self, display_name: str) -> Dict:
-        """Get or create an author."""
-        from lib.utils import normalize_key
-        
-        normalized = normalize_key(display_name)
-        
-        # Check if exists
-        for author in self.authors:
-            if author.get("normalized_key") == normalized:
-                return author
-        
-        # Create new
-        new_author = {
-            "id": f"auth_{normalized}",
-            "display_name": display_name,
-            "normalized_key": normalized,
-            "is_active": True
-        }
+        """Get or create an author (matched up to case, accents and punctuation)."""
+        new_author, created = self.slugs.get_or_create(
+            "author", "", display_name,
+            lambda author_id, slug: {
+                "id": author_id,
+                "display_name": display_name,
+                "normalized_key": slug,
+                "is_active": True
+            }
+        )
+        if not created:
+            return new_author
+        
         self.authors.append(new_author)
+        self.completions.add("author", new_author["id"], display_name)
         return new_author
     
-    def create_submission(self, payload: Dict) -> Dict:
-        """Create a new submission."""
+    def create_submission(self, payload: Dict, admit: bool = True) -> Dict:
+        """Create a new submission.
+        
+        Args:
+            payload: Submission fields
+            admit: Apply write admission control; False for internal
+                callers (tools) and callers that already admitted the write
+        
+        Raises:
+            Throttled: If the author has submitted too much too quickly
+        """
+        if admit:
+            self.admission.admit("create_submission", payload.get("created_by", "guest"))
         sub_id = str(uuid.uuid4())
         submission = {
             "id": sub_id,
@@ -142,30 +428,65 @@ class DataStore:
             "craft_format": payload.get("craft_format"),
             "craft_tone": payload.get("craft_tone"),
             "full_text": payload.get("full_text"),
+            "tags": list(payload.get("tags") or []),
             "review_comment": "",
             "published_prompt_id": None
         }
         self.submissions.append(submission)
+        self._submissions_by_id[sub_id] = submission
+        self._index_add("submissions", submission)
+        self._emit("submission_created")
         return submission
     
-    def list_submissions(self, status: Optional[str] = None) -> List[Dict]:
-        """List submissions."""
-        result = self.submissions
+    def list_submissions(self, status: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> List[Dict]:
+        """List submissions, optionally projected to ``fields``."""
+        q = self.query("submissions")
         if status:
-            result = [s for s in result if s.get("status") == status]
-        return result
+            q = q.where("status", status)
+        if fields:
+            q = q.select(*fields)
+        return q.all()
     
     def get_submission(self, submission_id: str) -> Optional[Dict]:
-        """Get a submission by ID."""
-        for sub in self.submissions:
-            if sub["id"] == submission_id:
-                return sub
-        return None
+        """Get a submission by ID (archived ones are read back from disk)."""
+        submission = self._submissions_by_id.get(submission_id)
+        if submission and submission.get("archived"):
+            return {**(self.archive.load(submission_id) or {}), **submission}
+        return submission
+    
+    def archive_processed(self, older_than_days: Optional[float] = None) -> int:
+        """Move reviewed submissions to the on-disk archive, keeping stubs.
+        
+        Args:
+            older_than_days: Minimum age since review (default
+                ``config.SUBMISSION_ARCHIVE_AFTER_DAYS``)
+            
+        Returns:
+            Number of submissions archived
+        """
+        if older_than_days is None:
+            older_than_days = config.SUBMISSION_ARCHIVE_AFTER_DAYS
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        due = [
+            s for s in self.query("submissions").where("status", {"approved", "rejected"}, op="in").all()
+            if not s.get("archived") and (s.get("reviewed_at") or s.get("created_at") or "") <= cutoff
+        ]
+        if not due:
+            return 0
+        
+        count = self.archive.write_segment(due)
+        for submission in due:
+            # Replace in place: the list, the ID map and the indexes share the record
+            slim = stub(submission)
+            submission.clear()
+            submission.update(slim)
+        self._bump("submissions")
+        return count
     
     def approve_submission(self, sub_id: str) -> Optional[Dict]:
         """Approve a submission and create a published prompt."""
         submission = self.get_submission(sub_id)
-        if not submission:
+        if not submission or submission.get("archived"):
             return None
         
         # Create prompt from submission
@@ -185,116 +506,468 @@ class DataStore:
             "craft_format": submission["craft_format"],
             "craft_tone": submission["craft_tone"],
             "full_text": submission["full_text"],
+            "tags": list(submission.get("tags") or []),
             "avg_rating": 0.0,
             "uses_total": 0,
+            "views_total": 0,
             "status": "published",
             "version": "1.0",
             "created_at": datetime.now().isoformat()
         }
-        self.prompts.append(prompt)
+        self._store_prompt(prompt)
+        self._compile_template(prompt_id, prompt["full_text"])
+        self._bump("prompts")
+        self._schedule_derived(prompt)
         
         # Update submission
-        submission["status"] = "approved"
+        self._index_set("submissions", submission, "status", "approved")
         submission["published_prompt_id"] = prompt_id
+        submission["reviewed_at"] = datetime.now().isoformat()
+        self._emit("submission_status_changed")
         
         return prompt
     
+    def _store_prompt(self, prompt: Dict) -> Dict:
+        """Keep a prompt's summary resident and its bodies compressed."""
+        self.bodies.put(prompt["id"], prompt)
+        summary = {k: v for k, v in prompt.items() if k not in BODY_FIELDS}
+        self.prompts.append(summary)
+        self._prompts_by_id[prompt["id"]] = summary
+        self._index_add("prompts", summary)
+        if summary.get("status") == "published":
+            self.facets.add(summary["id"], _facet_values(summary))
+            self.completions.add("prompt", summary["id"], summary.get("title") or "")
+            for tag in summary.get("tags") or ():
+                self.completions.add("tag", tag, tag)
+        return summary
+    
+    def _project(self, summary: Dict, fields: Iterable[str]) -> Dict:
+        """Copy the requested fields of a prompt, loading bodies only if asked."""
+        projected = {"id": summary["id"]}
+        wanted_bodies = []
+        for f in fields:
+            if f in BODY_FIELDS:
+                wanted_bodies.append(f)
+            else:
+                projected[f] = summary.get(f)
+        if wanted_bodies:
+            bodies = self.bodies.peek(summary["id"]) or {}
+            for f in wanted_bodies:
+                projected[f] = bodies.get(f, "")
+        return projected
+    
+    def _schedule_derived(self, prompt: Dict) -> None:
+        """Queue the derived work for a published or edited prompt."""
+        prompt_id = prompt["id"]
+        self.jobs.submit(
+            "refresh_snapshot",
+            lambda: self.published_snapshot.upsert(self._prompts_by_id[prompt_id]),
+            prompt_id=prompt_id
+        )
+        self.jobs.submit(
+            "index_similarity",
+            lambda: self.similarity.refresh(prompt_id, lambda: self._current_prompt(prompt_id)),
+            prompt_id=prompt_id
+        )
+    
+    def _current_prompt(self, prompt_id: str) -> Optional[Dict]:
+        """A prompt's summary and bodies as they are now, without promoting it."""
+        summary = self._prompts_by_id.peek(prompt_id)
+        if summary is None:
+            return None
+        return {**summary, **(self.bodies.peek(prompt_id) or {})}
+    
     def reject_submission(self, sub_id: str, comment: str = "") -> None:
         """Reject a submission."""
         submission = self.get_submission(sub_id)
-        if submission:
-            submission["status"] = "rejected"
+        if submission and not submission.get("archived"):
+            self._index_set("submissions", submission, "status", "rejected")
             submission["review_comment"] = comment
+            submission["reviewed_at"] = datetime.now().isoformat()
+            self._emit("submission_status_changed")
     
-    def list_prompts(self, metier_id: Optional[str] = None, category_id: Optional[str] = None) -> List[Dict]:
-        """List published prompts."""
-        result = [p for p in self.prompts if p.get("status") == "published"]
+    def list_prompts(
+        self,
+        metier_id: Optional[str] = None,
+        category_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """List published prompts.
+        
+        Without ``fields`` the resident summaries are returned (no CRAFT
+        fields or ``full_text``). With ``fields`` each prompt is projected to
+        those fields; body fields are decompressed only when requested.
+        """
+        q = self.query("prompts").where("status", "published")
         
         if metier_id:
-            result = [p for p in result if p.get("metier_id") == metier_id]
+            q = q.where("metier_id", metier_id)
         
         if category_id:
-            result = [p for p in result if p.get("category_id") == category_id]
+            q = q.where("category_id", category_id)
+        
+        if fields:
+            q = q.select(*fields)
+        
+        return q.all()
+    
+    def search_prompts(
+        self,
+        query: str,
+        metier_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Token AND search over title, description, full text and author.
         
+        Summary fields are checked first; a body is decompressed only when
+        they do not already match every term. The scan stops after ``limit``
+        matches.
+        """
+        terms = query.lower().split()
+        result = []
+        for p in self.list_prompts(metier_id=metier_id):
+            text = f"{p.get('title', '')} {p.get('description', '')} {p.get('author_display_name_snapshot', '')}".lower()
+            missing = [t for t in terms if t not in text]
+            if missing:
+                full_text = ((self.bodies.peek(p["id"]) or {}).get("full_text") or "").lower()
+                if not all(t in full_text for t in missing):
+                    continue
+            result.append(self._project(p, fields) if fields else p)
+            if limit is not None and len(result) >= limit:
+                break
         return result
     
+    def complete(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> List[Dict]:
+        """Search-box completions for a typed prefix.
+        
+        Prompt titles, category, author and tag names with a word starting
+        with ``prefix``; prompts rank by rating then uses, the others by
+        number of published prompts.
+        
+        Args:
+            prefix: Typed text
+            limit: Maximum number of completions
+            kind: Only "prompt", "category", "author" or "tag" completions
+            
+        Returns:
+            ``{"kind", "id", "label"}`` dicts, best first
+        """
+        if self.completions.rerank_due():
+            self.jobs.submit("rerank_completions", self.completions.rerank)
+        return self.completions.complete(prefix, limit, kind)
+    
+    def _completion_score(self, kind: str, item_id: str) -> tuple:
+        """Ranking key of a completion."""
+        if kind == "prompt":
+            summary = self._prompts_by_id.peek(item_id) or {}
+            return (summary.get("avg_rating") or 0.0, summary.get("uses_total") or 0)
+        return (self.facets.count(kind, item_id),)
+    
     def get_prompt(self, prompt_id: str) -> Optional[Dict]:
-        """Get a prompt by ID."""
-        for prompt in self.prompts:
-            if prompt["id"] == prompt_id:
-                return prompt
-        return None
+        """Get a full prompt (summary plus decompressed bodies) by ID."""
+        summary = self._prompts_by_id.get(prompt_id)
+        if summary is None:
+            return None
+        return {**summary, **(self.bodies.get(prompt_id) or {})}
+    
+    def update_prompt(self, prompt_id: str, changes: Dict, edited_by: str = "", note: str = "") -> Optional[Dict]:
+        """Edit a published prompt and record the new revision.
+        
+        Only versioned fields are applied. When CRAFT fields change and no
+        ``full_text`` is given, the full text is rebuilt from them.
+        
+        Returns:
+            The updated prompt, or None if not found
+        """
+        summary = self._prompts_by_id.writable(prompt_id)
+        if not summary:
+            return None
+        prompt = self.get_prompt(prompt_id)
+        
+        updates = {f: changes[f] for f in VERSIONED_FIELDS if f in changes and changes[f] != prompt.get(f)}
+        if "full_text" not in changes and any(f.startswith("craft_") for f in updates):
+            updates["full_text"] = build_full_text({**prompt, **updates})
+        if not updates:
+            return prompt
+        
+        if prompt_id not in self.prompt_history:
+            self._start_history(prompt)
+        prompt.update(updates)
+        self.bodies.put(prompt_id, prompt)
+        summary.update({k: v for k, v in updates.items() if k not in BODY_FIELDS})
+        if "title" in updates and summary.get("status") == "published":
+            self.completions.add("prompt", prompt_id, updates["title"] or "")
+        if "full_text" in updates:
+            self._compile_template(prompt_id, updates["full_text"])
+        summary["version"] = prompt["version"] = next_version(prompt.get("version", "1.0"))
+        summary["updated_at"] = prompt["updated_at"] = datetime.now().isoformat()
+        
+        self.prompt_history[prompt_id].record(prompt, edited_by, note)
+        self._bump("prompts")
+        self._schedule_derived(prompt)
+        return prompt
+    
+    def _start_history(self, prompt: Dict) -> PromptHistory:
+        """Start a prompt's revision log with the prompt as published.
+        
+        Histories are created on the first edit: until then the only
+        revision is the prompt itself, whose bodies stay compressed in the
+        BodyStore instead of being copied into a checkpoint.
+        """
+        submission = next(
+            (s for s in self.submissions if s.get("published_prompt_id") == prompt["id"]), None
+        )
+        history = self.prompt_history[prompt["id"]] = PromptHistory(
+            prompt,
+            edited_by=submission["created_by"] if submission else "",
+            note="Initial publication" if submission else ""
+        )
+        return history
+    
+    def _compile_template(self, prompt_id: str, full_text: str) -> Optional[List[str]]:
+        """Parse a prompt's placeholders once and keep the segments.
+        
+        Text that does not compile (validated at submission, so only older
+        or imported prompts) is treated as static.
+        """
+        try:
+            segments = compile_template(full_text)
+        except TemplateError:
+            segments = None
+        self._templates[prompt_id] = segments
+        return segments
+    
+    def get_template(self, prompt_id: str) -> Optional[List[str]]:
+        """Compiled template segments of a prompt, or None if it has no placeholders.
+        
+        Prompts not compiled at approval (pack prompts) are compiled on
+        first request.
+        """
+        if prompt_id in self._templates:
+            return self._templates[prompt_id]
+        bodies = self.bodies.get(prompt_id)
+        if bodies is None:
+            return None
+        return self._compile_template(prompt_id, bodies.get("full_text") or "")
+    
+    def list_prompt_versions(self, prompt_id: str) -> List[Dict]:
+        """List revision metadata for a prompt, newest first (empty until it is edited)."""
+        history = self.prompt_history.get(prompt_id)
+        return history.list_versions() if history else []
+    
+    def get_prompt_version(self, prompt_id: str, version: str) -> Optional[Dict]:
+        """Rebuild a historical version of a prompt."""
+        history = self.prompt_history.get(prompt_id)
+        if history is not None:
+            return history.get_version(version)
+        prompt = self.get_prompt(prompt_id)
+        if not prompt or prompt.get("version", "1.0") != version:
+            return None
+        return {f: prompt.get(f) or "" for f in VERSIONED_FIELDS}
+    
+    def related_prompts(self, prompt_id: str, k: int = 5, fields: Iterable[str] = CARD_FIELDS) -> List[Dict]:
+        """List the published prompts most similar to a prompt."""
+        related = []
+        for related_id, _score in self.similarity.similar(prompt_id, k):
+            summary = self._prompts_by_id.get(related_id)
+            if summary and summary.get("status") == "published":
+                related.append(self._project(summary, fields))
+        return related
+    
+    def _apply_counter(self, name: str, prompt_id: str, delta: int) -> None:
+        """Add a flushed counter delta to the prompt field it feeds."""
+        prompt = self._prompts_by_id.writable(prompt_id)
+        if prompt:
+            field = COUNTER_FIELDS[name]
+            prompt[field] = prompt.get(field, 0) + delta
+            self.published_snapshot.update_metrics(prompt)
+            self.completions.mark_stale()
+            self._bump("prompts")
+    
+    def _record_trending(self, prompt_id: str, event: str, weight: float = 1.0) -> None:
+        """Feed an event into the prompt's trending score."""
+        prompt = self._prompts_by_id.get(prompt_id)
+        if prompt and prompt.get("category_id"):
+            self.trending.record(prompt_id, prompt["category_id"], event, weight)
+    
+    def record_use(self, prompt_id: str) -> None:
+        """Count a use (copy / open in Copilot) of a prompt."""
+        self.counters.incr("uses", prompt_id)
+        self._record_trending(prompt_id, "use")
+    
+    def record_view(self, prompt_id: str) -> None:
+        """Count a view of a prompt's detail page."""
+        self.counters.incr("views", prompt_id)
+        self._record_trending(prompt_id, "view")
+    
+    def list_trending(
+        self,
+        category_id: str,
+        limit: Optional[int] = None,
+        fields: Iterable[str] = CARD_FIELDS
+    ) -> List[Dict]:
+        """List a category's published prompts by trending score.
+        
+        Prompts with recent views, uses or ratings come first, hottest
+        first; the rest follow, newest first.
+        """
+        ranked = []
+        for prompt_id in self.trending.top(category_id):
+            summary = self._prompts_by_id.get(prompt_id)
+            if summary and summary.get("status") == "published":
+                ranked.append(self._project(summary, fields))
+                if limit is not None and len(ranked) >= limit:
+                    return ranked
+        
+        seen = {p["id"] for p in ranked}
+        rest = (
+            self.query("prompts").where("category_id", category_id).where("status", "published")
+            .order_by("created_at", descending=True).select(*fields)
+        )
+        if limit is not None:
+            rest = rest.limit(limit)  # enough even if every ranked prompt comes back
+        ranked.extend(p for p in rest.all() if p["id"] not in seen)
+        return ranked[:limit] if limit is not None else ranked
+    
+    def filter_prompts(
+        self,
+        filters: Dict[str, Iterable[str]],
+        limit: Optional[int] = None,
+        fields: Iterable[str] = CARD_FIELDS
+    ) -> List[Dict]:
+        """List published prompts matching facet filters, best rated first.
+        
+        Args:
+            filters: Facet ("category", "author", "tag") -> accepted values;
+                values of one facet are OR-ed, facets are AND-ed
+            limit: Maximum number of prompts
+            fields: Fields to project
+        """
+        summaries = self._prompts_by_id
+        matches = [i for i in self.facets.ids(self.facets.match(filters)) if i in summaries]
+        matches.sort(
+            key=lambda i: (summaries.value(i, "avg_rating") or 0.0, summaries.value(i, "uses_total") or 0),
+            reverse=True
+        )
+        if limit is not None:
+            matches = matches[:limit]
+        return [self._project(summaries[i], fields) for i in matches]
+    
+    def count_filtered(self, filters: Dict[str, Iterable[str]]) -> int:
+        """Number of published prompts matching facet filters."""
+        return self.facets.match(filters).bit_count()
+    
+    def facet_counts(self, filters: Optional[Dict[str, Iterable[str]]] = None) -> Dict[str, Dict[str, int]]:
+        """Published prompts per facet value under the other facets' filters."""
+        return self.facets.counts(filters or {})
+    
+    def get_counts(self, prompt_id: str) -> Dict[str, int]:
+        """Get live use/view counts, including increments not yet flushed."""
+        prompt = self._prompts_by_id.get(prompt_id) or {}
+        return {
+            name: prompt.get(field, 0) + self.counters.pending(name, prompt_id)
+            for name, field in COUNTER_FIELDS.items()
+        }
     
     def _recompute_avg_rating(self, prompt_id: str) -> None:
-        """Recompute average rating for a prompt."""
-        prompt_ratings = [r for r in self.ratings if r.get("prompt_id") == prompt_id]
-        if prompt_ratings:
-            avg = sum(r["stars"] for r in prompt_ratings) / len(prompt_ratings)
-            prompt = self.get_prompt(prompt_id)
-            if prompt:
-                prompt["avg_rating"] = avg
-        else:
-            prompt = self.get_prompt(prompt_id)
-            if prompt:
-                prompt["avg_rating"] = 0.0
+        """Refresh a prompt's average rating from the rating store."""
+        prompt = self._prompts_by_id.writable(prompt_id)
+        if not prompt:
+            return
+        prompt["avg_rating"] = self.ratings.mean(prompt_id)
+        self.published_snapshot.update_metrics(prompt)
+        self.completions.mark_stale()
+        self._bump("prompts")
     
     def rate_prompt(self, user_key: str, prompt_id: str, stars: int) -> None:
-        """Rate a prompt."""
-        # Remove existing rating
-        self.ratings = [r for r in self.ratings 
-                       if not (r.get("user_key") == user_key and r.get("prompt_id") == prompt_id)]
-        
-        # Add new rating
-        rating = {
-            "user_key": user_key,
-            "prompt_id": prompt_id,
-            "stars": stars,
-            "created_at": datetime.now().isoformat()
-        }
-        self.ratings.append(rating)
+        """Rate a prompt (replaces the user's previous rating).
+        
+        Raises:
+            Throttled: If the user is rating too quickly
+        """
+        self.admission.admit("rate_prompt", user_key)
+        self.ratings.rate(user_key, prompt_id, stars)
+        self._record_trending(prompt_id, "rating", stars / 5)
         
         # Recompute average
         self._recompute_avg_rating(prompt_id)
+        self._emit("rating_added")
+    
+    def get_user_rating(self, user_key: str, prompt_id: str) -> Optional[int]:
+        """Get a user's stars for a prompt, or None if they have not rated it."""
+        return self.ratings.get(user_key, prompt_id)
+    
+    def get_rating_summary(self, prompt_id: str) -> Dict:
+        """Get a prompt's average, rating count, Bayesian average and 1-5 star histogram."""
+        return self.ratings.summary(prompt_id)
+    
+    def list_user_ratings(self, user_key: str) -> List[Dict]:
+        """List a user's ratings (prompt_id, stars, rated_at epoch), newest first."""
+        return self.users.get(user_key).cached(
+            "ratings", self.ratings.generation, lambda: self.ratings.user_history(user_key)
+        )
+    
+    def list_user_submissions(self, user_key: str) -> List[Dict]:
+        """List the submissions created by a user (archived ones as stubs)."""
+        return self.users.get(user_key).cached(
+            "submissions",
+            self.generation("submissions"),
+            lambda: self.query("submissions").where("created_by", user_key).all()
+        )
     
     def toggle_bookmark(self, user_key: str, prompt_id: str) -> bool:
         """Toggle bookmark for a prompt.
         
         Returns:
             True if added, False if removed
+        
+        Raises:
+            Throttled: If the user is toggling too quickly
         """
-        # Check if exists
-        for bm in self.bookmarks:
-            if bm.get("user_key") == user_key and bm.get("prompt_id") == prompt_id:
-                self.bookmarks.remove(bm)
-                return False
-        
-        # Add new bookmark
-        bookmark = {
-            "user_key": user_key,
-            "prompt_id": prompt_id,
-            "created_at": datetime.now().isoformat()
-        }
-        self.bookmarks.append(bookmark)
-        return True
+        self.admission.admit("toggle_bookmark", user_key)
+        
+        def toggle(partition) -> bool:
+            added = partition.bookmarks.pop(prompt_id, None) is None
+            if added:
+                partition.bookmarks[prompt_id] = {
+                    "user_key": user_key,
+                    "prompt_id": prompt_id,
+                    "created_at": datetime.now().isoformat()
+                }
+            return added
+        
+        return self.users.update(user_key, toggle)
     
     def is_bookmarked(self, user_key: str, prompt_id: str) -> bool:
         """Check if a prompt is bookmarked."""
-        for bm in self.bookmarks:
-            if bm.get("user_key") == user_key and bm.get("prompt_id") == prompt_id:
-                return True
-        return False
-    
-    def list_bookmarks(self, user_key: str) -> List[Dict]:
-        """List bookmarked prompts for a user."""
-        bookmark_prompt_ids = [bm["prompt_id"] for bm in self.bookmarks 
-                             if bm.get("user_key") == user_key]
-        return [self.get_prompt(pid) for pid in bookmark_prompt_ids if self.get_prompt(pid)]
+        return prompt_id in self.users.get(user_key).bookmarks
+    
+    def list_bookmarks(self, user_key: str, fields: Optional[Iterable[str]] = None) -> List[Dict]:
+        """List bookmarked prompts for a user (summaries, or projected to ``fields``)."""
+        partition = self.users.get(user_key)
+        summaries = [self._prompts_by_id[pid] for pid in list(partition.bookmarks) if pid in self._prompts_by_id]
+        if fields:
+            return [self._project(s, fields) for s in summaries]
+        return summaries
 
 
 # Global instance
 _db = DataStore()
 
 
+def _as_list(value) -> List:
+    """A facet column value as a list (tags are lists, other fields scalars)."""
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _facet_values(summary: Dict) -> Dict[str, List]:
+    """Facet values of a prompt summary."""
+    return {facet: _as_list(summary.get(field)) for facet, field in FACET_FIELDS.items()}
+
+
 def get_db() -> DataStore:
     """Get the global database instance."""
     return _db
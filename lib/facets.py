@@ -0,0 +1,159 @@
+"""Bitmap facet index for combined category / tag / author filters."""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Facets kept per published prompt, and the summary field feeding each
+FACET_FIELDS = {"category": "category_id", "author": "author_id", "tag": "tags"}
+
+
+def _bitmap(ordinals: Iterable[int], size: int) -> int:
+    """Build a bitmap int from bit positions."""
+    bits = np.zeros(size, dtype=bool)
+    bits[np.fromiter(ordinals, dtype=np.int64)] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class FacetIndex:
+    """One bitmap per facet value over dense prompt ordinals.
+
+    Every prompt gets an ordinal (its bit position); a bitmap is a Python
+    int with bit ``i`` set when prompt ``i`` has the value. A filter is an
+    OR within a facet and an AND across facets, so combined filters and
+    live counts are a handful of big-int ``&``/``|`` and ``bit_count``
+    calls (12.5 KB per bitmap at 100k prompts).
+    """
+
+    def __init__(self, facets: Iterable[str] = FACET_FIELDS):
+        self._ordinal_of: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._values_of: List[Dict[str, List[str]]] = []
+        self._bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in facets}
+        self._all = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._all.bit_count()
+
+    def add(self, prompt_id: str, values: Dict[str, Iterable[str]]) -> None:
+        """Index (or re-index) a prompt's facet values."""
+        with self._lock:
+            ordinal = self._ordinal_of.get(prompt_id)
+            if ordinal is None:
+                ordinal = self._ordinal_of[prompt_id] = len(self._ids)
+                self._ids.append(prompt_id)
+                self._values_of.append({})
+            else:
+                self._clear(ordinal)
+
+            bit = 1 << ordinal
+            kept: Dict[str, List[str]] = {}
+            for facet, facet_values in values.items():
+                bitmaps = self._bitmaps[facet]
+                kept[facet] = [v for v in dict.fromkeys(facet_values) if v]
+                for value in kept[facet]:
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+            self._values_of[ordinal] = kept
+            self._all |= bit
+
+    def add_many(self, items: Iterable[Tuple[str, Dict[str, Iterable[str]]]]) -> None:
+        """Index many new prompts at once (building each bitmap in one pass).
+
+        Prompts already indexed are re-indexed one by one.
+        """
+        with self._lock:
+            positions: Dict[Tuple[str, str], List[int]] = {}
+            added: List[int] = []
+            for prompt_id, values in items:
+                if prompt_id in self._ordinal_of:
+                    self.add(prompt_id, values)
+                    continue
+                ordinal = self._ordinal_of[prompt_id] = len(self._ids)
+                self._ids.append(prompt_id)
+                added.append(ordinal)
+                kept = {facet: [v for v in dict.fromkeys(vs) if v] for facet, vs in values.items()}
+                self._values_of.append(kept)
+                for facet, facet_values in kept.items():
+                    for value in facet_values:
+                        positions.setdefault((facet, value), []).append(ordinal)
+            if not added:
+                return
+
+            size = len(self._ids)
+            self._all |= _bitmap(added, size)
+            for (facet, value), ordinals in positions.items():
+                bitmaps = self._bitmaps[facet]
+                bitmaps[value] = bitmaps.get(value, 0) | _bitmap(ordinals, size)
+
+    def remove(self, prompt_id: str) -> None:
+        """Drop a prompt from every bitmap (its ordinal is not reused)."""
+        with self._lock:
+            ordinal = self._ordinal_of.get(prompt_id)
+            if ordinal is not None:
+                self._clear(ordinal)
+                self._values_of[ordinal] = {}
+
+    def _clear(self, ordinal: int) -> None:
+        """Unset a prompt's bits (caller holds the lock)."""
+        mask = ~(1 << ordinal)
+        for facet, facet_values in self._values_of[ordinal].items():
+            bitmaps = self._bitmaps[facet]
+            for value in facet_values:
+                remaining = bitmaps[value] & mask
+                if remaining:
+                    bitmaps[value] = remaining
+                else:
+                    del bitmaps[value]
+        self._all &= mask
+
+    def match(self, selected: Dict[str, Iterable[str]], skip: Optional[str] = None) -> int:
+        """Bitmap of prompts matching the selection (empty facets are ignored).
+
+        Args:
+            selected: Facet -> accepted values (OR within a facet)
+            skip: Facet to leave out (for that facet's own counts)
+        """
+        with self._lock:
+            result = self._all
+            for facet, values in selected.items():
+                values = list(values)
+                if facet == skip or not values:
+                    continue
+                bitmaps = self._bitmaps[facet]
+                union = 0
+                for value in values:
+                    union |= bitmaps.get(value, 0)
+                result &= union
+            return result
+
+    def ids(self, bitmap: int) -> List[str]:
+        """Prompt IDs of the set bits, in ordinal order."""
+        if not bitmap:
+            return []
+        raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+        ordinals = np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+        return [self._ids[i] for i in ordinals.tolist()]
+
+    def counts(self, selected: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, int]]:
+        """Live counts per facet value.
+
+        Each facet is counted against the selection on the *other* facets,
+        so picking a tag narrows the category and author counts while the
+        other tags stay selectable.
+        """
+        with self._lock:
+            result = {}
+            for facet, bitmaps in self._bitmaps.items():
+                base = self.match(selected, skip=facet)
+                result[facet] = {value: (bitmap & base).bit_count() for value, bitmap in bitmaps.items()}
+            return result
+
+    def count(self, facet: str, value: str) -> int:
+        """Number of prompts with a facet value."""
+        return self._bitmaps[facet].get(value, 0).bit_count()
+
+    def values(self, facet: str) -> List[str]:
+        """Known values of a facet, sorted."""
+        return sorted(self._bitmaps[facet])
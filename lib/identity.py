@@ -0,0 +1,135 @@
+"""Resolve who the current visitor is."""
+
+import hashlib
+import hmac
+import ipaddress
+import os
+import re
+from typing import Iterable, Mapping, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import config
+
+GUEST = "guest"
+
+# Accepted user keys (emails, SSO logins, UPNs)
+_USER_KEY_RE = re.compile(r"^[a-z0-9._@+\\-]{1,128}$")
+
+# Streamlit reports loopback connections without an address
+_LOOPBACK = "127.0.0.1"
+
+
+def normalize_user_key(value: Optional[str]) -> Optional[str]:
+    """Lowercase and validate an identity value, or None if unusable."""
+    if not isinstance(value, str) or not value:
+        return None
+    value = value.strip().lower()
+    return value if _USER_KEY_RE.match(value) else None
+
+
+def _signature(user_key: str, secret: str) -> str:
+    return hmac.new(secret.encode("utf-8"), user_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def sign_user_key(user_key: str, secret: str) -> str:
+    """The identity cookie value for ``user_key``: ``"<user>.<signature>"``."""
+    user_key = normalize_user_key(user_key)
+    if not user_key or not secret:
+        raise ValueError("A valid user key and a secret are required")
+    return f"{user_key}.{_signature(user_key, secret)}"
+
+
+def verify_user_key(value: Optional[str], secret: str) -> Optional[str]:
+    """The user key of a signed cookie value, or None if it is not validly signed."""
+    if not secret or not isinstance(value, str) or "." not in value:
+        return None
+    user_key, signature = value.rsplit(".", 1)
+    user_key = normalize_user_key(user_key)
+    if not user_key or not hmac.compare_digest(signature, _signature(user_key, secret)):
+        return None
+    return user_key
+
+
+def is_trusted_proxy(remote_ip: Optional[str], proxies: Iterable[str]) -> bool:
+    """Whether a connection comes from one of ``proxies`` (addresses or networks)."""
+    try:
+        address = ipaddress.ip_address(remote_ip or _LOOPBACK)
+    except ValueError:
+        return False
+    for proxy in proxies:
+        try:
+            if address in ipaddress.ip_network(proxy, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def client_key() -> Optional[str]:
+    """Identify the current client of an anonymous visitor (for rate limits).
+
+    The client address when it is a direct connection, else (loopback or a
+    trusted proxy, which many visitors share) the Streamlit session id.
+
+    Returns:
+        A key, or None outside a client session (background work)
+    """
+    try:
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is None:
+            return None
+        remote_ip = st.context.ip_address
+    except Exception:
+        return None
+    if isinstance(remote_ip, str) and remote_ip and not is_trusted_proxy(remote_ip, config.IDENTITY_TRUSTED_PROXIES):
+        return "ip:" + remote_ip
+    return "session:" + ctx.session_id
+
+
+def resolve_user_key(
+    headers: Optional[Mapping[str, str]] = None,
+    cookies: Optional[Mapping[str, str]] = None,
+    environ: Optional[Mapping[str, str]] = None,
+    remote_ip: Optional[str] = None
+) -> str:
+    """Identify the visitor, from the most to the least trusted source.
+
+    1. ``config.IDENTITY_HEADER``, set by the authenticating reverse proxy;
+       only on connections from ``config.IDENTITY_TRUSTED_PROXIES``
+    2. ``config.IDENTITY_COOKIE``, set by the SSO front end; only when
+       signed with ``config.IDENTITY_COOKIE_SECRET``
+    3. ``PROMPT_STUDIO_USER`` in the environment (local runs and tests)
+    4. ``"guest"``
+
+    Args:
+        headers: Request headers (default: the current Streamlit request)
+        cookies: Request cookies (default: the current Streamlit request)
+        environ: Environment (default: ``os.environ``)
+        remote_ip: Address of the connecting peer (default: the current
+            Streamlit request; None means loopback)
+
+    Returns:
+        A normalized user key
+    """
+    if headers is None or cookies is None:
+        try:
+            headers = st.context.headers if headers is None else headers
+            cookies = st.context.cookies if cookies is None else cookies
+            remote_ip = st.context.ip_address if remote_ip is None else remote_ip
+        except Exception:
+            headers, cookies = headers or {}, cookies or {}  # no request (bare mode)
+    environ = os.environ if environ is None else environ
+
+    header_trusted = config.IDENTITY_HEADER and is_trusted_proxy(remote_ip, config.IDENTITY_TRUSTED_PROXIES)
+    for value in (
+        headers.get(config.IDENTITY_HEADER) if header_trusted else None,
+        verify_user_key(cookies.get(config.IDENTITY_COOKIE), config.IDENTITY_COOKIE_SECRET)
+        if config.IDENTITY_COOKIE else None,
+        environ.get("PROMPT_STUDIO_USER"),
+    ):
+        user_key = normalize_user_key(value)
+        if user_key:
+            return user_key
+    return GUEST
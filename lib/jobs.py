@@ -0,0 +1,146 @@
+"""In-process background job queue for derived store work."""
+
+import itertools
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+class JobQueue:
+    """Worker thread pool with retries and a bounded status table.
+
+    Jobs are plain callables. Each job gets a status row (a dict, like the
+    store's records) that moves through queued -> running -> done, or to
+    retrying / failed when it raises.
+    """
+
+    def __init__(self, workers: int = 2, max_retries: int = 3, retry_delay: float = 0.5, history: int = 200):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.history = history
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._funcs: Dict[str, Callable[[], None]] = {}
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._ids = itertools.count(1)
+        self._latencies: List[float] = []
+
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, name: str, func: Callable[[], None], **meta) -> str:
+        """Queue a job.
+
+        Args:
+            name: Job type (e.g. "index_similarity")
+            func: Callable doing the work
+            **meta: Extra fields shown in the status table (e.g. prompt_id)
+
+        Returns:
+            The job ID
+        """
+        job_id = str(next(self._ids))
+        with self._lock:
+            self._funcs[job_id] = func
+            self._jobs[job_id] = {
+                "id": job_id,
+                "name": name,
+                "status": "queued",
+                "attempts": 0,
+                "error": "",
+                "enqueued_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "_enqueued": time.monotonic(),
+                **meta,
+            }
+            self._pending += 1
+            self._trim()
+        self._queue.put(job_id)
+        return job_id
+
+    def _trim(self) -> None:
+        """Drop the oldest finished rows beyond the history limit."""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j for j, row in self._jobs.items() if row["status"] in ("done", "failed")][:excess]:
+            del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                func = self._funcs.get(job_id)
+                if job is None or func is None:
+                    continue
+                job["status"] = "running"
+                job["attempts"] += 1
+
+            try:
+                func()
+            except Exception as e:
+                with self._lock:
+                    job["error"] = f"{type(e).__name__}: {e}"
+                    job["traceback"] = traceback.format_exc()
+                    if job["attempts"] <= self.max_retries:
+                        job["status"] = "retrying"
+                        delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+                        timer = threading.Timer(delay, self._queue.put, args=(job_id,))
+                        timer.daemon = True
+                        timer.start()
+                        continue
+                    job["status"] = "failed"
+                    self._finish(job_id)
+            else:
+                with self._lock:
+                    job["status"] = "done"
+                    job["error"] = ""
+                    job.pop("traceback", None)
+                    self._finish(job_id)
+
+    def _finish(self, job_id: str) -> None:
+        """Record completion (caller holds the lock)."""
+        job = self._jobs[job_id]
+        job["finished_at"] = datetime.now().isoformat()
+        job["latency_ms"] = round((time.monotonic() - job["_enqueued"]) * 1000, 1)
+        self._latencies = (self._latencies + [job["latency_ms"]])[-self.history:]
+        self._funcs.pop(job_id, None)
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued job has finished.
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        """List status rows, newest first."""
+        with self._lock:
+            rows = list(self._jobs.values())[-limit:]
+        return [{k: v for k, v in row.items() if not k.startswith("_")} for row in reversed(rows)]
+
+    def stats(self) -> Dict:
+        """Queue depth, in-flight/failed counts and job latency."""
+        with self._lock:
+            statuses = [row["status"] for row in self._jobs.values()]
+            latencies = sorted(self._latencies)
+        return {
+            "depth": self._pending,
+            "running": statuses.count("running"),
+            "retrying": statuses.count("retrying"),
+            "failed": statuses.count("failed"),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p95_latency_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+        }
@@ -0,0 +1,198 @@
+"""Approximate memory accounting and budgets for the in-memory store."""
+
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# Containers longer than this are measured on a sample and extrapolated
+SAMPLE_SIZE = 500
+
+OK, SOFT, HARD = "ok", "soft", "hard"
+
+
+def deep_size(obj: Any, sample: int = SAMPLE_SIZE, _seen: Optional[set] = None) -> int:
+    """Approximate bytes held by ``obj`` and everything it references.
+
+    Walks dicts, lists, tuples, sets and object attributes; NumPy arrays
+    count their buffers. Containers with more than ``sample`` items are
+    measured on ``sample`` items taken at an even stride and scaled up by
+    item lengths, so sizing a large collection stays cheap. Shared objects
+    are counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(getattr(obj, "nbytes", None), int):
+        return obj.nbytes  # Arrow tables and arrays
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+
+    if isinstance(obj, dict):
+        n = len(obj)
+        if n > sample:
+            pairs = list(_spread(obj.items(), n, sample))
+            scale = _scale(obj.items(), pairs, n, sample)
+        else:
+            pairs, scale = list(obj.items()), 1.0
+        items: List[Any] = [x for kv in pairs for x in kv]
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        n = len(obj)
+        first = next(iter(obj), None)
+        if isinstance(first, (int, float)) and not isinstance(first, bool):
+            return size + n * sys.getsizeof(first)  # numeric column stored as a list
+        if n > sample:
+            items = list(_spread(obj, n, sample))
+            scale = _scale(obj, items, n, sample)
+        else:
+            items, scale = list(obj), 1.0
+    else:
+        attrs = getattr(obj, "__dict__", None)
+        if attrs is None:
+            return size
+        return size + deep_size(attrs, sample, seen)
+
+    return size + int(sum(deep_size(item, sample, seen) for item in items) * scale)
+
+
+def _spread(iterable: Iterable, n: int, sample: int) -> Iterator:
+    """Up to ``sample`` items taken at an even stride (less order bias than a prefix)."""
+    step = max(1, -(-n // sample))
+    return itertools.islice(iterable, 0, None, step)
+
+
+def _scale(population: Iterable, measured: List, n: int, sample: int) -> float:
+    """Factor from the measured items to the whole container.
+
+    Weights a wider (20x) cheap sample, so that a few huge entries among
+    many small ones are neither missed nor over-extrapolated.
+    """
+    wide = list(map(_weight, _spread(population, n, sample * 20)))
+    estimated_total = sum(wide) * n / len(wide)
+    return estimated_total / max(sum(map(_weight, measured)), 1)
+
+
+def _weight(value: Any) -> int:
+    """Cheap size proxy: 1 + length, summed through small tuples."""
+    if isinstance(value, tuple) and len(value) <= 4:
+        return 1 + sum(_weight(v) for v in value)
+    try:
+        return 1 + len(value)
+    except TypeError:
+        return 1
+
+
+def top_allocations(limit: int = 15) -> Optional[List[Dict]]:
+    """Largest allocation sites since tracing started, or None if not tracing."""
+    if not tracemalloc.is_tracing():
+        return None
+    stats = tracemalloc.take_snapshot().statistics("lineno")
+    return [
+        {
+            "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+def is_tracing() -> bool:
+    """Whether tracemalloc is running (process-wide)."""
+    return tracemalloc.is_tracing()
+
+
+def set_tracing(enabled: bool) -> None:
+    """Start or stop tracemalloc (it slows allocations while on)."""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryMonitor:
+    """Periodic store sizing against soft and hard budgets.
+
+    ``measure`` returns ``{component: bytes}``. :meth:`due` hands out at
+    most one measurement per ``interval`` seconds; each crossing into a
+    different budget level is passed to ``on_level(level, total_bytes)``
+    once.
+    """
+
+    def __init__(
+        self,
+        measure: Callable[[], Dict[str, int]],
+        soft_bytes: int,
+        hard_bytes: int,
+        interval: float = 30.0,
+        on_level: Optional[Callable[[str, int], None]] = None,
+        history: int = 240
+    ):
+        self._measure = measure
+        self.soft_bytes = soft_bytes
+        self.hard_bytes = hard_bytes
+        self.interval = interval
+        self._on_level = on_level
+        self.level = OK
+        self.last: Dict[str, int] = {}
+        self.last_at = 0.0
+        self.history: deque = deque(maxlen=history)  # (epoch seconds, total bytes)
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        """Claim the next periodic measurement (True once per interval)."""
+        with self._lock:
+            if self._claimed or time.time() - self.last_at < self.interval:
+                return False
+            self._claimed = True
+            return True
+
+    def check(self) -> Dict[str, int]:
+        """Measure now, record the sample and apply the budget level."""
+        try:
+            sizes = self._measure()
+        finally:
+            with self._lock:
+                self.last_at = time.time()
+                self._claimed = False
+        total = sum(sizes.values())
+        self.last = sizes
+        self.history.append((self.last_at, total))
+
+        level = HARD if total >= self.hard_bytes else SOFT if total >= self.soft_bytes else OK
+        if level != self.level:
+            self.level = level
+            if self._on_level is not None:
+                self._on_level(level, total)
+        return sizes
+
+    def growth_per_hour(self) -> Optional[float]:
+        """Bytes per hour over the recorded history, or None with too few samples."""
+        if len(self.history) < 2:
+            return None
+        (t0, b0), (t1, b1) = self.history[0], self.history[-1]
+        if t1 <= t0:
+            return None
+        return (b1 - b0) / (t1 - t0) * 3600
@@ -0,0 +1,349 @@
+"""Read-only prompt packs: prebuilt catalogs opened with ``mmap``.
+
+A pack is a single binary file shipped with a deployment. It is mapped
+read-only at startup, so opening it costs one small metadata read and
+worker processes share the same page-cache pages. Records are decoded
+only when the store first touches them.
+
+Layout (little endian)::
+
+    header   magic, format version, record count, meta offset/length, table offset
+    meta     UTF-8 JSON: name, version, created_at, metiers, categories,
+             authors, ids and the indexed columns (one value per record)
+    table    per record: summary offset/length, body offset/length
+    records  summary JSON, then zlib-compressed body JSON (BodyStore encoding)
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from lib.bodies import BODY_FIELDS
+
+MAGIC = b"PSPACK\x00\x00"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIQQQ")
+_ENTRY = struct.Struct("<QIQI")
+
+# Summary defaults for pack prompts that do not carry them
+SUMMARY_DEFAULTS = {
+    "avg_rating": 0.0,
+    "uses_total": 0,
+    "views_total": 0,
+    "status": "published",
+    "version": "1.0",
+}
+
+
+class PackError(ValueError):
+    """Raised when a file is not a readable prompt pack."""
+
+
+def write_pack(
+    path: str,
+    prompts: Iterable[Dict],
+    name: str,
+    version: str,
+    metiers: Iterable[Dict] = (),
+    categories: Iterable[Dict] = (),
+    authors: Iterable[Dict] = (),
+    columns: Iterable[str] = ("status", "metier_id", "category_id", "author_id"),
+    level: int = 6
+) -> int:
+    """Build a prompt pack file.
+
+    Args:
+        path: Output file (written atomically)
+        prompts: Full prompt records; each needs an ``id``
+        name: Pack name (e.g. "sales-essentials")
+        version: Pack version string
+        metiers, categories, authors: Reference records shipped with the pack
+        columns: Summary fields stored as columns, so the store can index
+            them without decoding records
+        level: zlib level for bodies
+
+    Returns:
+        The number of prompts written
+    """
+    columns = tuple(columns)
+    created_at = datetime.now().isoformat()
+    ids: List[str] = []
+    column_values: Dict[str, List] = {c: [] for c in columns}
+    blobs: List[bytes] = []
+    entries: List[tuple] = []
+    offset = 0
+
+    for prompt in prompts:
+        summary = {**SUMMARY_DEFAULTS, "created_at": created_at}
+        summary.update({k: v for k, v in prompt.items() if k not in BODY_FIELDS})
+        bodies = {f: prompt.get(f) or "" for f in BODY_FIELDS}
+        summary_blob = json.dumps(summary, ensure_ascii=False).encode("utf-8")
+        body_blob = zlib.compress(json.dumps(bodies, ensure_ascii=False).encode("utf-8"), level)
+
+        ids.append(summary["id"])
+        for c in columns:
+            column_values[c].append(summary.get(c))
+        entries.append((offset, len(summary_blob), offset + len(summary_blob), len(body_blob)))
+        blobs.extend((summary_blob, body_blob))
+        offset += len(summary_blob) + len(body_blob)
+
+    if len(set(ids)) != len(ids):
+        raise PackError("Duplicate prompt IDs in pack")
+
+    meta = json.dumps({
+        "name": name,
+        "version": version,
+        "created_at": created_at,
+        "metiers": list(metiers),
+        "categories": list(categories),
+        "authors": list(authors),
+        "ids": ids,
+        "columns": column_values,
+    }, ensure_ascii=False).encode("utf-8")
+
+    meta_offset = _HEADER.size
+    table_offset = meta_offset + len(meta)
+    records_offset = table_offset + _ENTRY.size * len(entries)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(ids), meta_offset, len(meta), table_offset))
+        f.write(meta)
+        for s_off, s_len, b_off, b_len in entries:
+            f.write(_ENTRY.pack(records_offset + s_off, s_len, records_offset + b_off, b_len))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+class PromptPack:
+    """A memory-mapped prompt pack.
+
+    Only the header and metadata are read on open; summaries and bodies are
+    decoded from the mapping on each call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PackError(f"Empty pack file: {path}")
+
+        try:
+            magic, fmt, _, count, meta_offset, meta_len, table_offset = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise PackError(f"Truncated pack header: {path}")
+        if magic != MAGIC:
+            self.close()
+            raise PackError(f"Not a prompt pack: {path}")
+        if fmt != FORMAT_VERSION:
+            self.close()
+            raise PackError(f"Unsupported pack format {fmt} (expected {FORMAT_VERSION}): {path}")
+
+        try:
+            meta = json.loads(self._map[meta_offset:meta_offset + meta_len])
+            self.name: str = meta["name"]
+            self.version: str = meta["version"]
+            self.created_at: str = meta["created_at"]
+            self.metiers: List[Dict] = meta["metiers"]
+            self.categories: List[Dict] = meta["categories"]
+            self.authors: List[Dict] = meta["authors"]
+            self.ids: List[str] = meta["ids"]
+            self._columns: Dict[str, List] = meta["columns"]
+            self._ordinals = {prompt_id: i for i, prompt_id in enumerate(self.ids)}
+        except (ValueError, KeyError, TypeError):
+            self.close()
+            raise PackError(f"Corrupt pack metadata: {path}")
+        self._table_offset = table_offset
+        self._derived: Dict[str, List] = {}  # summary fields gathered into columns on demand
+        self._derived_lock = threading.Lock()
+        if len(self.ids) != count:
+            self.close()
+            raise PackError(f"Corrupt pack index: {path}")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, prompt_id: str) -> bool:
+        return prompt_id in self._ordinals
+
+    def _entry(self, prompt_id: str) -> Optional[tuple]:
+        ordinal = self._ordinals.get(prompt_id)
+        if ordinal is None:
+            return None
+        return _ENTRY.unpack_from(self._map, self._table_offset + ordinal * _ENTRY.size)
+
+    def summary(self, prompt_id: str) -> Optional[Dict]:
+        """Decode a prompt's summary (a fresh dict per call)."""
+        entry = self._entry(prompt_id)
+        if entry is None:
+            return None
+        s_off, s_len, _, _ = entry
+        return json.loads(self._map[s_off:s_off + s_len])
+
+    def bodies(self, prompt_id: str) -> Optional[Dict[str, str]]:
+        """Decompress and decode a prompt's bodies."""
+        entry = self._entry(prompt_id)
+        if entry is None:
+            return None
+        _, _, b_off, b_len = entry
+        return json.loads(zlib.decompress(self._map[b_off:b_off + b_len]))
+
+    def column(self, field: str) -> Optional[List]:
+        """Values of an indexed column, aligned with :attr:`ids`."""
+        return self._columns.get(field)
+
+    def value(self, prompt_id: str, field: str):
+        """One summary field of a prompt, without decoding the summary.
+
+        Fields that are not stored columns (sort keys such as
+        ``avg_rating``) are gathered into a column from all summaries on
+        first use, once per pack.
+        """
+        values = self._columns.get(field) or self._derived.get(field)
+        if values is None:
+            self.derive((field,))
+            values = self._derived[field]
+        return values[self._ordinals[prompt_id]]
+
+    def derive(self, fields: Iterable[str]) -> None:
+        """Gather summary fields into columns in one pass over the summaries."""
+        with self._derived_lock:
+            missing = [f for f in fields if f not in self._columns and f not in self._derived]
+            if not missing:
+                return
+            columns: Dict[str, List] = {f: [] for f in missing}
+            for prompt_id in self.ids:
+                summary = self.summary(prompt_id) or {}
+                for f, values in columns.items():
+                    values.append(summary.get(f))
+            self._derived.update(columns)
+
+    def info(self) -> Dict:
+        """Pack name, version, size on disk and prompt count."""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "created_at": self.created_at,
+            "path": self.path,
+            "prompts": len(self.ids),
+            "bytes": len(self._map),
+        }
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+
+class PackOverlay(Mapping):
+    """Prompt summaries: a writable dict layered over read-only packs.
+
+    Lookups hit the writable layer first. Reads (``[]``, ``get``, scans)
+    decode pack summaries on each call without keeping them, so the pack
+    stays on disk; :meth:`writable` decodes a summary into the writable
+    layer once, so edits (ratings, counters, new versions) apply to that
+    copy and shadow the pack.
+    """
+
+    def __init__(self):
+        self._local: Dict[str, Dict] = {}
+        self._packs: List[PromptPack] = []
+        self._pack_ids = 0  # distinct IDs across packs, not local when attached
+        self._promoted = 0  # of which since put in the writable layer
+        self._lock = threading.Lock()
+
+    @property
+    def packs(self) -> List[PromptPack]:
+        return list(self._packs)
+
+    def attach(self, pack: PromptPack) -> None:
+        """Add a pack under the writable layer (earlier packs win on ID clashes)."""
+        with self._lock:
+            self._pack_ids += sum(1 for prompt_id in pack.ids if prompt_id not in self)
+            self._packs.append(pack)
+
+    def __setitem__(self, prompt_id: str, summary: Dict) -> None:
+        with self._lock:
+            if prompt_id not in self._local and any(prompt_id in pack for pack in self._packs):
+                self._promoted += 1
+            self._local[prompt_id] = summary
+
+    def __getitem__(self, prompt_id: str) -> Dict:
+        summary = self.peek(prompt_id)
+        if summary is None:
+            raise KeyError(prompt_id)
+        return summary
+
+    def peek(self, prompt_id: str) -> Optional[Dict]:
+        """Get a summary without keeping a decoded pack copy (read-only use)."""
+        summary = self._local.get(prompt_id)
+        if summary is not None:
+            return summary
+        for pack in self._packs:
+            if prompt_id in pack:
+                return pack.summary(prompt_id)
+        return None
+
+    def value(self, prompt_id: str, field: str):
+        """One summary field of a prompt, decoding nothing for pack prompts.
+
+        Raises:
+            KeyError: If the prompt is unknown
+        """
+        summary = self._local.get(prompt_id)
+        if summary is not None:
+            return summary.get(field)
+        for pack in self._packs:
+            if prompt_id in pack:
+                return pack.value(prompt_id, field)
+        raise KeyError(prompt_id)
+
+    def writable(self, prompt_id: str) -> Optional[Dict]:
+        """Get the summary to edit, promoting a pack summary into the writable layer."""
+        summary = self._local.get(prompt_id)
+        if summary is not None:
+            return summary
+        for pack in self._packs:
+            if prompt_id in pack:
+                with self._lock:
+                    summary = self._local.get(prompt_id)
+                    if summary is None:
+                        summary = self._local[prompt_id] = pack.summary(prompt_id)
+                        self._promoted += 1
+                return summary
+        return None
+
+    def __contains__(self, prompt_id: object) -> bool:
+        return prompt_id in self._local or any(prompt_id in pack for pack in self._packs)
+
+    def _pack_only_ids(self) -> Iterator[str]:
+        seen = set(self._local)
+        for pack in self._packs:
+            for prompt_id in pack.ids:
+                if prompt_id not in seen:
+                    seen.add(prompt_id)
+                    yield prompt_id
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._local)
+        yield from self._pack_only_ids()
+
+    def __len__(self) -> int:
+        return len(self._local) + self._pack_ids - self._promoted
+
+    def decoded(self) -> int:
+        """Number of summaries resident in the writable layer."""
+        return len(self._local)
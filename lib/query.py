@@ -0,0 +1,246 @@
+"""Composable store queries with a small index-aware planner."""
+
+import base64
+import heapq
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class HashIndex:
+    """Equality index: field value -> insertion-ordered set of record IDs."""
+
+    def __init__(self, field: str):
+        self.field = field
+        self._ids: Dict[Any, Dict[str, None]] = {}
+
+    def add(self, record_id: str, value: Any) -> None:
+        self._ids.setdefault(value, {})[record_id] = None
+
+    def remove(self, record_id: str, value: Any) -> None:
+        ids = self._ids.get(value)
+        if ids is not None:
+            ids.pop(record_id, None)
+            if not ids:
+                del self._ids[value]
+
+    def update(self, record_id: str, old: Any, new: Any) -> None:
+        if old != new:
+            self.remove(record_id, old)
+            self.add(record_id, new)
+
+    def lookup(self, value: Any) -> Dict[str, None]:
+        return self._ids.get(value, {})
+
+    def count(self, value: Any) -> int:
+        return len(self._ids.get(value, ()))
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """Order None last and keep mixed None/value columns comparable."""
+    return (1, "") if value is None else (0, value)
+
+
+def encode_cursor(sort_value: Any, record_id: str) -> str:
+    """Encode the position after a row as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, record_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode a cursor from :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is not one :func:`encode_cursor` produces
+    """
+    decoded = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    if not isinstance(decoded, list) or len(decoded) != 2:
+        raise ValueError("Invalid cursor")
+    sort_value, record_id = decoded
+    if not isinstance(record_id, str) or isinstance(sort_value, (list, dict)):
+        raise ValueError("Invalid cursor")
+    return sort_value, record_id
+
+
+class Query:
+    """Builder for filtered, sorted, paginated and projected reads.
+
+    Obtained from ``DataStore.query(collection)``. Filters are equality or
+    membership tests; the planner drives the read from the most selective
+    maintained index and only scans the collection when no filter is
+    indexed. Filtering and sorting work on record IDs and field values
+    (``records.value(id, field)`` when the collection provides it, so pack
+    prompts are not decoded); only the returned rows are fetched.
+
+    Example::
+
+        db.query("prompts").where("category_id", cat_id).order_by("avg_rating", descending=True).limit(3).all()
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        records: Dict[str, Dict],
+        indexes: Dict[str, HashIndex],
+        project: Optional[Callable[[Dict, Iterable[str]], Dict]] = None
+    ):
+        self.collection = collection
+        self._records = records
+        self._value: Callable[[str, str], Any] = getattr(
+            records, "value", lambda record_id, field: records[record_id].get(field)
+        )
+        self._indexes = indexes
+        self._project = project
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: Optional[Tuple[str, bool]] = None
+        self._limit: Optional[int] = None
+        self._cursor: Optional[str] = None
+        self._fields: Optional[Tuple[str, ...]] = None
+
+    # -- builder ------------------------------------------------------------
+
+    def where(self, field: str, value: Any, op: str = "eq") -> "Query":
+        """Filter on ``field == value`` (``op="eq"``) or ``field in value`` (``op="in"``)."""
+        if op not in ("eq", "in"):
+            raise ValueError(f"Unsupported operator: {op}")
+        self._filters.append((field, op, set(value) if op == "in" else value))
+        return self
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        """Sort by ``field`` (ties broken by record ID)."""
+        self._order = (field, descending)
+        return self
+
+    def limit(self, n: int) -> "Query":
+        """Return at most ``n`` rows."""
+        self._limit = n
+        return self
+
+    def after(self, cursor: Optional[str]) -> "Query":
+        """Resume after the cursor returned by :meth:`page`."""
+        self._cursor = cursor
+        return self
+
+    def select(self, *fields: str) -> "Query":
+        """Project rows to ``fields`` (the ID is always included)."""
+        self._fields = tuple(fields)
+        return self
+
+    # -- planning -----------------------------------------------------------
+
+    def _plan(self) -> Dict:
+        """Pick the most selective indexed filter, or a full scan."""
+        best = None
+        for pos, (field, op, value) in enumerate(self._filters):
+            index = self._indexes.get(field)
+            if index is None:
+                continue
+            estimate = index.count(value) if op == "eq" else sum(index.count(v) for v in value)
+            if best is None or estimate < best["candidates"]:
+                best = {"strategy": "index", "index": field, "op": op, "candidates": estimate, "filter": pos}
+
+        if best is None:
+            return {"strategy": "scan", "index": None, "candidates": len(self._records), "filter": None}
+        return best
+
+    def explain(self) -> Dict:
+        """Describe how the query would run (for debugging slow pages)."""
+        plan = self._plan()
+        residual = [
+            f"{field} {op} {value!r}"
+            for pos, (field, op, value) in enumerate(self._filters)
+            if pos != plan["filter"]
+        ]
+        return {
+            "collection": self.collection,
+            **{k: v for k, v in plan.items() if k != "filter"},
+            "residual_filters": residual,
+            "available_indexes": sorted(self._indexes),
+            "order_by": self._order,
+            "limit": self._limit,
+            "cursor": bool(self._cursor),
+            "projection": list(self._fields) if self._fields else None,
+        }
+
+    def _candidates(self, plan: Dict) -> List[str]:
+        if plan["strategy"] == "scan":
+            return list(self._records)
+        index = self._indexes[plan["index"]]
+        value = self._filters[plan["filter"]][2]
+        if plan["op"] == "eq":
+            ids: Iterable[str] = list(index.lookup(value))
+        else:
+            ids = [i for v in value for i in index.lookup(v)]
+        return [i for i in ids if i in self._records]
+
+    def _matches(self, record_id: str, skip: Optional[int]) -> bool:
+        for pos, (field, op, value) in enumerate(self._filters):
+            if pos == skip:
+                continue
+            actual = self._value(record_id, field)
+            if (op == "eq" and actual != value) or (op == "in" and actual not in value):
+                return False
+        return True
+
+    # -- execution ----------------------------------------------------------
+
+    def _rows(self) -> List[Dict]:
+        return [self._records[i] for i in self._row_ids()]
+
+    def _row_ids(self) -> List[str]:
+        plan = self._plan()
+        ids = [i for i in self._candidates(plan) if self._matches(i, plan["filter"])]
+
+        if self._order is None:
+            if self._cursor:
+                _, last_id = decode_cursor(self._cursor)
+                ids = ids[ids.index(last_id) + 1:] if last_id in ids else ids
+            return ids[:self._limit] if self._limit is not None else ids
+
+        field, descending = self._order
+
+        def key(record_id: str) -> Tuple:
+            return (_sort_key(self._value(record_id, field)), record_id)
+
+        if self._cursor:
+            cursor_value, cursor_id = decode_cursor(self._cursor)
+            cursor_key = (_sort_key(cursor_value), cursor_id)
+            ids = [i for i in ids if (key(i) < cursor_key if descending else key(i) > cursor_key)]
+
+        if self._limit is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return pick(self._limit, ids, key=key)
+        return sorted(ids, key=key, reverse=descending)
+
+    def _output(self, rows: List[Dict]) -> List[Dict]:
+        if not self._fields:
+            return rows
+        if self._project is not None:
+            return [self._project(r, self._fields) for r in rows]
+        return [{"id": r["id"], **{f: r.get(f) for f in self._fields}} for r in rows]
+
+    def all(self) -> List[Dict]:
+        """Run the query and return the rows."""
+        return self._output(self._rows())
+
+    def first(self) -> Optional[Dict]:
+        """Return the first row, or None."""
+        self._limit = 1
+        rows = self.all()
+        return rows[0] if rows else None
+
+    def count(self) -> int:
+        """Count matching rows (ignores limit and cursor)."""
+        plan = self._plan()
+        return sum(1 for i in self._candidates(plan) if self._matches(i, plan["filter"]))
+
+    def page(self) -> Tuple[List[Dict], Optional[str]]:
+        """Run the query and return ``(rows, next_cursor)``.
+
+        ``next_cursor`` is None when there are no more rows.
+        """
+        rows = self._rows()
+        next_cursor = None
+        if rows and self._limit is not None and len(rows) == self._limit:
+            last = rows[-1]
+            sort_value = last.get(self._order[0]) if self._order else None
+            next_cursor = encode_cursor(sort_value, last["id"])
+        return self._output(rows), next_cursor
@@ -0,0 +1,229 @@
+"""Columnar star ratings with vectorized aggregates."""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STARS = (1, 2, 3, 4, 5)
+
+# Weight of the catalog-wide mean in Bayesian averages (in "virtual ratings")
+BAYES_PRIOR_WEIGHT = 5
+
+# New (user, prompt) rows are looked up in a small dict until there are
+# this many (or 1/16 of all rows), then merged into the sorted key index
+RECENT_ROWS = 1024
+
+
+class RatingStore:
+    """One row per (user, prompt) rating in parallel NumPy arrays.
+
+    Prompt IDs and user keys are interned to int32 indices; stars are uint8
+    and timestamps int64 epoch seconds. A user's row for a prompt is found
+    by binary search over sorted packed ``user << 32 | prompt`` keys (plus
+    a small dict of rows added since the last merge), so the whole store
+    costs about 30 bytes a rating, plus the intern tables and array growth
+    slack. A user re-rating a prompt overwrites their row in place. Per-prompt running
+    sums make the mean O(1); histograms, counts, Bayesian averages and user
+    histories are single ``bincount`` / mask passes over the columns (the
+    histogram matrix is then patched in place by later ratings).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._prompt_of: Dict[str, int] = {}
+        self._prompt_keys: List[str] = []
+        self._user_of: Dict[str, int] = {}
+        self._user_keys: List[str] = []
+        self._sorted_keys = np.zeros(0, dtype=np.int64)  # packed keys of merged rows, ascending
+        self._sorted_rows = np.zeros(0, dtype=np.int32)
+        self._recent: Dict[int, int] = {}  # packed key -> row, for rows not merged yet
+        self._prompt = np.zeros(capacity, dtype=np.int32)
+        self._user = np.zeros(capacity, dtype=np.int32)
+        self._stars = np.zeros(capacity, dtype=np.uint8)
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._sum = np.zeros(64, dtype=np.int64)
+        self._count = np.zeros(64, dtype=np.int64)
+        self._size = 0
+        self._total_sum = 0
+        self.generation = 0
+        self._histograms: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _intern(key: str, index: Dict[str, int], keys: List[str]) -> int:
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(keys)
+            keys.append(key)
+        return i
+
+    @staticmethod
+    def _grow(values: np.ndarray, needed: int) -> np.ndarray:
+        if needed <= len(values):
+            return values
+        grown = np.zeros(max(needed, len(values) * 2), dtype=values.dtype)
+        grown[:len(values)] = values
+        return grown
+
+    def _find(self, key: int) -> Optional[int]:
+        """Row of a packed (user, prompt) key, or None."""
+        row = self._recent.get(key)
+        if row is not None:
+            return row
+        keys = self._sorted_keys
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key:
+            return int(self._sorted_rows[i])
+        return None
+
+    def _merge_recent(self) -> None:
+        """Rebuild the sorted key index over all rows."""
+        n = self._size
+        keys = (self._user[:n].astype(np.int64) << 32) | self._prompt[:n]
+        order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[order]
+        self._sorted_rows = order.astype(np.int32)
+        self._recent = {}
+
+    def rate(self, user_key: str, prompt_id: str, stars: int, ts: Optional[int] = None) -> Optional[int]:
+        """Add or replace a user's rating of a prompt.
+
+        Returns:
+            The user's previous stars for the prompt, or None
+        """
+        if stars not in STARS:
+            raise ValueError(f"stars must be 1-5, got {stars}")
+        with self._lock:
+            p = self._intern(prompt_id, self._prompt_of, self._prompt_keys)
+            u = self._intern(user_key, self._user_of, self._user_keys)
+            self._sum = self._grow(self._sum, p + 1)
+            self._count = self._grow(self._count, p + 1)
+
+            key = (u << 32) | p
+            row = self._find(key)
+            previous = None
+            if row is None:
+                row = self._size
+                self._size += 1
+                for name in ("_prompt", "_user", "_stars", "_ts"):
+                    setattr(self, name, self._grow(getattr(self, name), self._size))
+                self._prompt[row] = p
+                self._user[row] = u
+                self._count[p] += 1
+                self._recent[key] = row
+                if len(self._recent) > max(RECENT_ROWS, self._size // 16):
+                    self._merge_recent()
+            else:
+                previous = int(self._stars[row])
+                self._sum[p] -= previous
+
+            self._stars[row] = stars
+            self._ts[row] = int(time.time()) if ts is None else ts
+            self._sum[p] += stars
+            self._total_sum += stars - (previous or 0)
+            self.generation += 1
+            if self._histograms is not None:
+                # Patch the cached histograms instead of recounting
+                if p >= len(self._histograms):
+                    self._histograms = np.vstack([
+                        self._histograms,
+                        np.zeros((len(self._prompt_keys) - len(self._histograms), 6), dtype=self._histograms.dtype),
+                    ])
+                if previous is not None:
+                    self._histograms[p, previous] -= 1
+                self._histograms[p, stars] += 1
+            return previous
+
+    def get(self, user_key: str, prompt_id: str) -> Optional[int]:
+        """A user's stars for a prompt, or None."""
+        u = self._user_of.get(user_key)
+        p = self._prompt_of.get(prompt_id)
+        if u is None or p is None:
+            return None
+        with self._lock:
+            row = self._find((u << 32) | p)
+            return int(self._stars[row]) if row is not None else None
+
+    def mean(self, prompt_id: str) -> float:
+        """Plain average stars of a prompt (0.0 when unrated)."""
+        p = self._prompt_of.get(prompt_id)
+        if p is None or not self._count[p]:
+            return 0.0
+        return float(self._sum[p] / self._count[p])
+
+    def _histogram_matrix(self) -> np.ndarray:
+        """Star counts per prompt index, shape (prompts, 6); column 0 unused."""
+        with self._lock:
+            if self._histograms is None:
+                n = self._size
+                flat = self._prompt[:n].astype(np.int64) * 6 + self._stars[:n]
+                self._histograms = np.bincount(flat, minlength=len(self._prompt_keys) * 6).reshape(-1, 6)
+            return self._histograms
+
+    def histogram(self, prompt_id: str) -> List[int]:
+        """Rating counts for 1..5 stars."""
+        p = self._prompt_of.get(prompt_id)
+        if p is None:
+            return [0] * len(STARS)
+        return self._histogram_matrix()[p, 1:].tolist()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of ratings per rated prompt."""
+        with self._lock:
+            n = len(self._prompt_keys)
+            return dict(zip(self._prompt_keys, self._count[:n].tolist()))
+
+    def bayesian_averages(self, prior_weight: float = BAYES_PRIOR_WEIGHT) -> Dict[str, float]:
+        """Averages shrunk toward the catalog mean, for every rated prompt.
+
+        ``(C * m + sum) / (C + n)`` with ``m`` the mean of all ratings and
+        ``C`` the prior weight, so a single 5-star rating does not outrank
+        a prompt with dozens of 4.5s.
+        """
+        with self._lock:
+            n = len(self._prompt_keys)
+            sums, counts = self._sum[:n], self._count[:n]
+            total = counts.sum()
+            prior = sums.sum() / total if total else 0.0
+            averages = (prior_weight * prior + sums) / (prior_weight + counts)
+            return dict(zip(self._prompt_keys, averages.tolist()))
+
+    def summary(self, prompt_id: str, prior_weight: float = BAYES_PRIOR_WEIGHT) -> Dict:
+        """Mean, count, Bayesian average and histogram of a prompt."""
+        with self._lock:
+            total = self._size
+            prior = self._total_sum / total if total else 0.0
+            p = self._prompt_of.get(prompt_id)
+            s, c = (int(self._sum[p]), int(self._count[p])) if p is not None else (0, 0)
+        return {
+            "avg": s / c if c else 0.0,
+            "count": c,
+            "bayesian": float((prior_weight * prior + s) / (prior_weight + c)) if (c or total) else 0.0,
+            "histogram": self.histogram(prompt_id),
+        }
+
+    def user_history(self, user_key: str) -> List[Dict]:
+        """A user's ratings, newest first."""
+        u = self._user_of.get(user_key)
+        if u is None:
+            return []
+        with self._lock:
+            n = self._size
+            rows = np.flatnonzero(self._user[:n] == u)
+            rows = rows[np.argsort(-self._ts[rows], kind="stable")]
+            prompts, stars, ts = self._prompt[rows], self._stars[rows], self._ts[rows]
+        return [
+            {"prompt_id": self._prompt_keys[p], "stars": int(s), "rated_at": int(t)}
+            for p, s, t in zip(prompts.tolist(), stars.tolist(), ts.tolist())
+        ]
+
+    def nbytes(self) -> int:
+        """Bytes held by the column and key arrays (excluding the intern tables)."""
+        return sum(a.nbytes for a in (
+            self._prompt, self._user, self._stars, self._ts, self._sum, self._count,
+            self._sorted_keys, self._sorted_rows,
+        ))
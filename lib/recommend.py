@@ -0,0 +1,228 @@
+"""Related-prompt recommendations from a sparse TF-IDF index."""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Prompt fields indexed for similarity (title and description weigh double)
+WEIGHTED_FIELDS = [
+    ("title", 2),
+    ("description", 2),
+    ("craft_context", 1),
+    ("craft_role", 1),
+    ("craft_action", 1),
+    ("craft_format", 1),
+    ("craft_tone", 1),
+]
+
+STOPWORDS = frozenset(
+    "the a an and or of to in for on with is are be as by at it this that you your "
+    "le la les un une des et ou de du en pour sur avec est sont au aux ce cette vous votre".split()
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, dropping stopwords and 1-char tokens."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class SimilarityIndex:
+    """Sparse TF-IDF matrix with vectorized cosine top-k queries.
+
+    The matrix is kept as COO triplets (doc, term, tf) in growable NumPy
+    arrays plus per-term posting lists, so adding a prompt only appends its
+    own non-zeros. IDF weights and row norms are recomputed lazily, in one
+    vectorized pass, the first time a query runs after the index changed.
+    Results are cached per prompt until the next change.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._terms: Dict[str, int] = {}
+        self._doc_ids: List[str] = []
+        self._doc_of: Dict[str, int] = {}
+        self._rows: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._alive = np.zeros(16, dtype=bool)
+        self._postings: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._posting_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._coo_doc = np.zeros(256, dtype=np.int32)
+        self._coo_term = np.zeros(256, dtype=np.int32)
+        self._coo_tf = np.zeros(256, dtype=np.float32)
+        self._nnz = 0
+        self._weights_generation = -1
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._cache: Dict[Tuple[str, int], List[Tuple[str, float]]] = {}
+        self.caching = True
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return int(self._alive[:len(self._doc_ids)].sum())
+
+    @staticmethod
+    def _grow(values: np.ndarray, needed: int) -> np.ndarray:
+        if needed <= len(values):
+            return values
+        grown = np.zeros(max(needed, len(values) * 2), dtype=values.dtype)
+        grown[:len(values)] = values
+        return grown
+
+    def add(self, prompt: Dict) -> None:
+        """Index a prompt, replacing any previous version of it."""
+        with self._lock:
+            self._add(prompt)
+
+    def refresh(self, prompt_id: str, load: Callable[[], Optional[Dict]]) -> None:
+        """Reindex a prompt from its current version, read under the index lock.
+
+        Refreshes of the same prompt then cannot apply out of order: the one
+        that runs last also read last, so it indexes the latest version.
+        ``load`` returning None drops the prompt.
+        """
+        with self._lock:
+            prompt = load()
+            if prompt is None:
+                self.remove(prompt_id)
+            else:
+                self._add(prompt)
+
+    def _add(self, prompt: Dict) -> None:
+        self.remove(prompt["id"])
+
+        counts: Counter = Counter()
+        for field, weight in WEIGHTED_FIELDS:
+            for term in tokenize(prompt.get(field) or ""):
+                counts[term] += weight
+        if not counts:
+            return
+
+        doc = len(self._doc_ids)
+        self._doc_ids.append(prompt["id"])
+        self._doc_of[prompt["id"]] = doc
+        self._alive = self._grow(self._alive, doc + 1)
+        self._alive[doc] = True
+        row_terms = np.zeros(len(counts), dtype=np.int32)
+        row_tfs = np.zeros(len(counts), dtype=np.float32)
+        self._rows.append((row_terms, row_tfs))
+
+        end = self._nnz + len(counts)
+        self._coo_doc = self._grow(self._coo_doc, end)
+        self._coo_term = self._grow(self._coo_term, end)
+        self._coo_tf = self._grow(self._coo_tf, end)
+
+        for offset, (term, count) in enumerate(counts.items()):
+            term_id = self._terms.setdefault(term, len(self._terms))
+            tf = 1.0 + math.log(count)
+            docs, tfs = self._postings.setdefault(term_id, ([], []))
+            docs.append(doc)
+            tfs.append(tf)
+            self._posting_arrays.pop(term_id, None)
+            self._coo_doc[self._nnz + offset] = doc
+            self._coo_term[self._nnz + offset] = term_id
+            self._coo_tf[self._nnz + offset] = tf
+            row_terms[offset] = term_id
+            row_tfs[offset] = tf
+        self._nnz = end
+        self._changed()
+
+    def remove(self, prompt_id: str) -> None:
+        """Drop a prompt from results (its row is masked, not compacted)."""
+        with self._lock:
+            doc = self._doc_of.pop(prompt_id, None)
+            if doc is not None:
+                self._alive[doc] = False
+                self._changed()
+
+    def _changed(self) -> None:
+        self.generation += 1
+        self._cache.clear()
+
+    def set_caching(self, enabled: bool) -> None:
+        """Turn the per-prompt result cache on or off (off also empties it)."""
+        with self._lock:
+            self.caching = enabled
+            if not enabled:
+                self._cache.clear()
+
+    def _refresh_weights(self) -> None:
+        """Recompute IDF and row norms for the current generation."""
+        if self._weights_generation == self.generation:
+            return
+        n_docs = len(self._doc_ids)
+        doc = self._coo_doc[:self._nnz]
+        term = self._coo_term[:self._nnz]
+        alive = self._alive[doc]
+        df = np.bincount(term[alive], minlength=len(self._terms))
+        self._idf = (np.log((1 + max(len(self), 1)) / (1 + df)) + 1).astype(np.float32)
+        weights = self._coo_tf[:self._nnz] * self._idf[term]
+        self._norms = np.sqrt(np.bincount(doc, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+        self._weights_generation = self.generation
+
+    def _posting(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._posting_arrays.get(term_id)
+        if arrays is None:
+            docs, tfs = self._postings[term_id]
+            arrays = (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            self._posting_arrays[term_id] = arrays
+        return arrays
+
+    def similar(self, prompt_id: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Return the ``k`` most similar prompts by cosine similarity.
+
+        Args:
+            prompt_id: Prompt to find neighbours for
+            k: Number of results
+
+        Returns:
+            List of (prompt_id, score) pairs, best first
+        """
+        with self._lock:
+            return self._similar(prompt_id, k)
+
+    def _similar(self, prompt_id: str, k: int) -> List[Tuple[str, float]]:
+        cache_key = (prompt_id, k)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        doc = self._doc_of.get(prompt_id)
+        if doc is None:
+            return []
+        self._refresh_weights()
+
+        # Query row: this document's non-zeros
+        row_terms, row_tfs = self._rows[doc]
+        query_weights = row_tfs * self._idf[row_terms] * self._idf[row_terms]
+
+        doc_chunks, weight_chunks = [], []
+        for term_id, query_weight in zip(row_terms.tolist(), query_weights.tolist()):
+            docs, tfs = self._posting(term_id)
+            doc_chunks.append(docs)
+            weight_chunks.append(tfs * query_weight)
+
+        # Sparse dot products of the query row with every row, in one pass
+        scores = np.bincount(
+            np.concatenate(doc_chunks),
+            weights=np.concatenate(weight_chunks),
+            minlength=len(self._doc_ids),
+        )
+        denom = self._norms * self._norms[doc]
+        np.divide(scores, denom, out=scores, where=denom > 0)
+        scores[~self._alive[:len(self._doc_ids)]] = 0
+        scores[doc] = 0
+
+        k = min(k, int((scores > 0).sum()))
+        if k <= 0:
+            result: List[Tuple[str, float]] = []
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            result = [(self._doc_ids[i], float(scores[i])) for i in top]
+        if self.caching:
+            self._cache[cache_key] = result
+        return result
@@ -0,0 +1,138 @@
+"""URL-friendly slugs and the registry that maps them to reference records."""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+# Letters that do not decompose into a base letter plus accents
+_LETTERS = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ð": "d", "ł": "l", "þ": "th", "ı": "i",
+})
+
+_NON_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+# Id prefix and word separator per entity type (separators keep the
+# historical ids, e.g. "cat_account_planning")
+ID_FORMATS = {
+    "metier": ("metier_", "_"),
+    "category": ("cat_", "_"),
+    "author": ("auth_", "-"),
+}
+
+
+@lru_cache(maxsize=8192)
+def slugify(text: str, sep: str = "-") -> str:
+    """Fold a display name into a slug ("Négociation" -> "negociation").
+
+    Accents are stripped, case is folded and runs of other characters
+    become ``sep``. Names with no Latin letters or digits get a short hash,
+    so they still have a stable, distinct slug.
+    """
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKD", text.casefold().translate(_LETTERS))
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    slug = _NON_SLUG_RE.sub(sep, folded).strip(sep)
+    if not slug and text.strip():
+        slug = "x" + hashlib.sha1(unicodedata.normalize("NFC", text.strip()).encode("utf-8")).hexdigest()[:8]
+    return slug
+
+
+class SlugRegistry:
+    """Slug -> record maps per entity type and namespace, plus ids per type.
+
+    A category's namespace is its metier, so the same name can exist under
+    two metiers; authors and metiers use the empty namespace. Ids are
+    ``prefix + slug`` and unique per type: when one is taken (by a record
+    in another namespace) the next free ``_2``, ``_3``... suffix is used,
+    so the same sequence of creations always yields the same ids.
+    """
+
+    def __init__(self, id_formats: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.id_formats = id_formats or ID_FORMATS
+        self._by_slug: Dict[Tuple[str, str], Dict[str, Dict]] = {}  # (type, namespace) -> slug -> record
+        self._by_id: Dict[str, Dict[str, Dict]] = {}  # type -> id -> record
+        self._aliases: Dict[str, Dict[str, str]] = {}  # type -> former id -> id
+        self._lock = threading.RLock()
+
+    def register(self, kind: str, namespace: str, name: str, record: Dict) -> bool:
+        """Record an existing entity (seeds, packs).
+
+        Returns:
+            False if its slug already belonged to another record of the
+            namespace (that record keeps it; this one is found by id only)
+        """
+        slug = slugify(name)
+        with self._lock:
+            self._by_id.setdefault(kind, {}).setdefault(record["id"], record)
+            slugs = self._by_slug.setdefault((kind, namespace), {})
+            owner = slugs.setdefault(slug, record)
+            return owner is record or owner["id"] == record["id"]
+
+    def find(self, kind: str, namespace: str, name: str) -> Optional[Dict]:
+        """The record named ``name`` (up to case, accents and punctuation), if any."""
+        return self._by_slug.get((kind, namespace), {}).get(slugify(name))
+
+    def get(self, kind: str, entity_id: str) -> Optional[Dict]:
+        """A record by id or alias."""
+        records = self._by_id.get(kind, {})
+        record = records.get(entity_id)
+        if record is None:
+            target = self._aliases.get(kind, {}).get(entity_id)
+            record = records.get(target) if target is not None else None
+        return record
+
+    def alias(self, kind: str, alias_id: str, entity_id: str) -> bool:
+        """Make ``alias_id`` resolve to the record ``entity_id``.
+
+        Returns:
+            False if ``alias_id`` already names another record
+        """
+        with self._lock:
+            if alias_id == entity_id:
+                return True
+            if alias_id in self._by_id.get(kind, {}):
+                return False
+            return self._aliases.setdefault(kind, {}).setdefault(alias_id, entity_id) == entity_id
+
+    def default_id(self, kind: str, name: str) -> str:
+        """The id a new record named ``name`` gets when it is free."""
+        prefix, sep = self.id_formats.get(kind, (kind + "_", "-"))
+        return prefix + slugify(name, sep)
+
+    def get_or_create(self, kind: str, namespace: str, name: str,
+                      factory: Callable[[str, str], Dict]) -> Tuple[Dict, bool]:
+        """Find a record by name or create it with a fresh id, atomically.
+
+        Args:
+            factory: Builds the new record from ``(entity_id, slug)``
+
+        Returns:
+            The record and whether it was created
+        """
+        slug = slugify(name)
+        with self._lock:
+            slugs = self._by_slug.setdefault((kind, namespace), {})
+            record = slugs.get(slug)
+            if record is not None:
+                return record, False
+            record = factory(self._unique_id(kind, name), slug)
+            slugs[slug] = record
+            self._by_id.setdefault(kind, {})[record["id"]] = record
+            return record, True
+
+    def _unique_id(self, kind: str, name: str) -> str:
+        base = self.default_id(kind, name)
+        taken = self._by_id.get(kind, {})
+        aliases = self._aliases.get(kind, {})
+        entity_id, n = base, 1
+        while entity_id in taken or entity_id in aliases:
+            n += 1
+            entity_id = f"{base}_{n}"
+        return entity_id
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._by_id.values())
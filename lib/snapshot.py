@@ -0,0 +1,157 @@
+"""Columnar snapshot of the published catalog for admin tables."""
+
+import io
+import threading
+from typing import Optional, Dict, List
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# (column label, prompt field) for text columns
+TEXT_COLUMNS = [
+    ("ID", "id"),
+    ("Title", "title"),
+    ("Category", "category_name"),
+    ("Author", "author_display_name_snapshot"),
+    ("Version", "version"),
+]
+
+# (column label, prompt field, dtype) for metric columns
+METRIC_COLUMNS = [
+    ("Rating", "avg_rating", np.float64),
+    ("Uses", "uses_total", np.int64),
+    ("Views", "views_total", np.int64),
+]
+
+COLUMN_ORDER = ["ID", "Title", "Category", "Author", "Rating", "Uses", "Views", "Version"]
+
+# Text columns searched by the admin filter box
+SEARCH_COLUMNS = ["Title", "Category", "Author"]
+
+
+class PublishedSnapshot:
+    """Incrementally maintained Arrow table of published prompts.
+
+    Text columns are rebuilt only when a prompt is added or edited. Metric
+    columns live in NumPy arrays patched in place when ratings or counters
+    change, and are wrapped into Arrow without copying. Safe to update from
+    background jobs while sessions read it.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._text: Dict[str, List[str]] = {label: [] for label, _ in TEXT_COLUMNS}
+        self._metrics: Dict[str, np.ndarray] = {
+            label: np.zeros(16, dtype=dtype) for label, _, dtype in METRIC_COLUMNS
+        }
+        self._size = 0
+        self._text_arrays: Optional[Dict[str, pa.Array]] = None
+        self._table: Optional[pa.Table] = None
+        self._csv: Optional[bytes] = None
+        self.caching = True
+        self.generation = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _changed(self, text: bool) -> None:
+        if text:
+            self._text_arrays = None
+        self._table = None
+        self._csv = None
+        self.generation += 1
+
+    def upsert(self, prompt: Dict) -> None:
+        """Add a published prompt or refresh its row after an edit."""
+        with self._lock:
+            self._upsert(prompt)
+
+    def _upsert(self, prompt: Dict) -> None:
+        row = self._rows.get(prompt["id"])
+        if row is None:
+            row = self._size
+            self._rows[prompt["id"]] = row
+            self._size += 1
+            for label, _ in TEXT_COLUMNS:
+                self._text[label].append("")
+            if self._size > len(self._metrics["Rating"]):
+                for label, values in self._metrics.items():
+                    grown = np.zeros(len(values) * 2, dtype=values.dtype)
+                    grown[:len(values)] = values
+                    self._metrics[label] = grown
+
+        for label, field in TEXT_COLUMNS:
+            value = prompt.get(field) or ""
+            self._text[label][row] = value[:8] + "..." if field == "id" else str(value)
+        self._set_metrics(row, prompt)
+        self._changed(text=True)
+
+    def update_metrics(self, prompt: Dict) -> None:
+        """Patch a row's rating/uses/views in place."""
+        with self._lock:
+            row = self._rows.get(prompt["id"])
+            if row is not None:
+                self._set_metrics(row, prompt)
+                self._changed(text=False)
+
+    def _set_metrics(self, row: int, prompt: Dict) -> None:
+        for label, field, _ in METRIC_COLUMNS:
+            self._metrics[label][row] = prompt.get(field) or 0
+
+    def table(self) -> pa.Table:
+        """Return the current snapshot as an Arrow table."""
+        with self._lock:
+            if self._table is None:
+                if self._text_arrays is None:
+                    self._text_arrays = {
+                        label: pa.array(values, type=pa.string()) for label, values in self._text.items()
+                    }
+                columns = dict(self._text_arrays)
+                for label, values in self._metrics.items():
+                    # Copy: the arrays are patched in place on later updates
+                    columns[label] = pa.array(values[:self._size].copy())
+                self._table = pa.table({label: columns[label] for label in COLUMN_ORDER})
+            return self._table
+
+    def view(self, search: str = "", sort_by: Optional[str] = None, descending: bool = True) -> pa.Table:
+        """Filter and sort the snapshot with Arrow compute kernels.
+
+        Args:
+            search: Case-insensitive substring matched against title, category and author
+            sort_by: Column label to sort on
+            descending: Sort order
+
+        Returns:
+            Filtered and sorted Arrow table
+        """
+        table = self.table()
+        if search:
+            mask = None
+            for label in SEARCH_COLUMNS:
+                match = pc.match_substring(table[label], search, ignore_case=True)
+                mask = match if mask is None else pc.or_(mask, match)
+            table = table.filter(mask)
+        if sort_by:
+            table = table.sort_by([(sort_by, "descending" if descending else "ascending")])
+        return table
+
+    def to_csv(self) -> bytes:
+        """Return the snapshot as CSV, cached until the catalog changes."""
+        with self._lock:
+            if self._csv is not None:
+                return self._csv
+            buffer = io.BytesIO()
+            pa_csv.write_csv(self.table(), buffer)
+            if self.caching:
+                self._csv = buffer.getvalue()
+            return buffer.getvalue()
+
+    def set_caching(self, enabled: bool) -> None:
+        """Turn the CSV export cache on or off (off also drops it)."""
+        with self._lock:
+            self.caching = enabled
+            if not enabled:
+                self._csv = None
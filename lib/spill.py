@@ -0,0 +1,57 @@
+"""Per-process directories for files the in-memory store spills to disk."""
+
+import itertools
+import os
+import re
+import shutil
+import threading
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROCESS_DIR_RE = re.compile(r"^p(\d+)-\d+$")
+
+_created = set()  # directory names handed out in this process
+_counter = itertools.count(1)
+_lock = threading.Lock()
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # no harmless liveness probe: leave other processes' files alone
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_dir(root: str) -> str:
+    """A fresh directory under ``root`` owned by this process (``p<pid>-<n>``).
+
+    The store lives in memory, so spilled files are only meaningful to the
+    process that wrote them, and several worker processes may share
+    ``root``. Directories of processes that are no longer running are
+    removed, including ones left by an earlier process with this pid; those
+    of live processes, and earlier ones of this process, are kept. A
+    relative ``root`` is resolved against the app directory, not the
+    working directory.
+
+    Returns:
+        The directory path; it is created when first written to
+    """
+    root = os.path.join(_ROOT, root)
+    pid = os.getpid()
+    with _lock:
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                match = _PROCESS_DIR_RE.match(name)
+                if not match or name in _created:
+                    continue
+                owner = int(match.group(1))
+                if owner == pid or not _pid_alive(owner):
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        name = f"p{pid}-{next(_counter)}"
+        _created.add(name)
+    return os.path.join(root, name)
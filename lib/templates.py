@@ -0,0 +1,82 @@
+"""Prompt full-text assembly and ``{placeholder}`` templates."""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+CRAFT_FIELDS = ("craft_context", "craft_role", "craft_action", "craft_format", "craft_tone")
+
+# Most placeholders a prompt may declare
+MAX_PLACEHOLDERS = 20
+
+# "{{name}}" is a literal "{name}"; other braces (JSON examples...) are plain text
+_PLACEHOLDER_RE = re.compile(r"\{\{([A-Za-z_][A-Za-z0-9_]*)\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+# Brace groups that look like a placeholder but are not a valid name
+_MALFORMED_RE = re.compile(r"(?<!\{)\{\s*([A-Za-z_][A-Za-z0-9_ \-.]*?)\s*\}(?!\})")
+
+
+class TemplateError(ValueError):
+    """A prompt's placeholders cannot be compiled."""
+
+
+def build_full_text(fields: Dict) -> str:
+    """Join a prompt's CRAFT fields into its full text."""
+    return "\n\n".join(fields.get(f) or "" for f in CRAFT_FIELDS)
+
+
+def validate_template(text: str) -> List[str]:
+    """Problems with the placeholders of a prompt text (empty when valid)."""
+    errors = []
+    for match in _MALFORMED_RE.finditer(text or ""):
+        if not _PLACEHOLDER_RE.fullmatch(match.group(0)):
+            suggestion = re.sub(r"[^A-Za-z0-9_]+", "_", match.group(1)).strip("_")
+            errors.append(f"Invalid placeholder {match.group(0)}: use letters, digits and _ (e.g. {{{suggestion}}})")
+    names = placeholders(_compile(text or ""))
+    if len(names) > MAX_PLACEHOLDERS:
+        errors.append(f"Too many placeholders ({len(names)}, at most {MAX_PLACEHOLDERS})")
+    return errors
+
+
+def compile_template(text: str) -> Optional[List[str]]:
+    """Parse a prompt text into segments, once.
+
+    Returns:
+        Literal text and placeholder names alternating (names at odd
+        indexes), or None when the text has no placeholders
+
+    Raises:
+        TemplateError: If :func:`validate_template` reports problems
+    """
+    errors = validate_template(text)
+    if errors:
+        raise TemplateError("; ".join(errors))
+    segments = _compile(text or "")
+    return segments if len(segments) > 1 else None
+
+
+def _compile(text: str) -> List[str]:
+    segments = [""]
+    pos = 0
+    for match in _PLACEHOLDER_RE.finditer(text):
+        escaped, name = match.groups()
+        segments[-1] += text[pos:match.start()]
+        if escaped:
+            segments[-1] += "{" + escaped + "}"
+        else:
+            segments.extend((name, ""))
+        pos = match.end()
+    segments[-1] += text[pos:]
+    return segments
+
+
+def placeholders(segments: Optional[Sequence[str]]) -> List[str]:
+    """Distinct placeholder names of compiled segments, in order of appearance."""
+    return list(dict.fromkeys(segments[1::2])) if segments else []
+
+
+def render(segments: Sequence[str], values: Dict[str, str]) -> str:
+    """Fill compiled segments; unfilled placeholders stay as ``{name}``."""
+    return "".join(
+        segment if i % 2 == 0 else (values.get(segment) or "{" + segment + "}")
+        for i, segment in enumerate(segments)
+    )
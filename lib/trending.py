@@ -0,0 +1,89 @@
+"""Time-decayed "trending" scores with a maintained order per category."""
+
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Score added per event (ratings are scaled by stars / 5)
+EVENT_WEIGHTS = {"view": 1.0, "use": 3.0, "rating": 2.0}
+
+# Rescale stored scores before exp() growth gets near float limits
+_MAX_EXPONENT = 50.0
+
+
+class TrendingIndex:
+    """Exponentially decayed event scores, ranked per category.
+
+    A score is ``sum(weight * 2 ** -(age / half_life))`` over a prompt's
+    events. Scores are stored relative to a fixed epoch, as
+    ``weight * exp(rate * (t - epoch))``: every score decays by the same
+    factor, so an event is an O(1) addition and the relative order never
+    changes with time alone. Each category keeps its prompts in a sorted
+    list that is patched by bisection on every event.
+    """
+
+    def __init__(self, half_life_hours: float = 48.0):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self._epoch = time.time()
+        self._scores: Dict[str, float] = {}
+        self._category_of: Dict[str, str] = {}
+        self._ranked: Dict[str, List[Tuple[float, str]]] = {}  # category -> [(-score, prompt_id)]
+        self._lock = threading.Lock()
+
+    def record(self, prompt_id: str, category_id: str, event: str, weight: float = 1.0,
+               ts: Optional[float] = None) -> None:
+        """Add an event ("view", "use" or "rating") to a prompt's score."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            exponent = self.rate * (ts - self._epoch)
+            if exponent > _MAX_EXPONENT:
+                self._rebase(ts)
+                exponent = 0.0
+            added = EVENT_WEIGHTS[event] * weight * math.exp(exponent)
+
+            ranked = self._ranked.setdefault(category_id, [])
+            old = self._scores.get(prompt_id)
+            if old is not None:
+                self._unrank(self._category_of[prompt_id], old, prompt_id)
+            score = (old or 0.0) + added
+            self._scores[prompt_id] = score
+            self._category_of[prompt_id] = category_id
+            bisect.insort(ranked, (-score, prompt_id))
+
+    def _unrank(self, category_id: str, score: float, prompt_id: str) -> None:
+        ranked = self._ranked[category_id]
+        i = bisect.bisect_left(ranked, (-score, prompt_id))
+        if i < len(ranked) and ranked[i][1] == prompt_id:
+            del ranked[i]
+
+    def _rebase(self, ts: float) -> None:
+        """Move the epoch to ``ts`` (caller holds the lock; order is unchanged)."""
+        factor = math.exp(-self.rate * (ts - self._epoch))
+        self._epoch = ts
+        self._scores = {pid: s * factor for pid, s in self._scores.items()}
+        self._ranked = {
+            cat: [(neg * factor, pid) for neg, pid in ranked]
+            for cat, ranked in self._ranked.items()
+        }
+
+    def remove(self, prompt_id: str) -> None:
+        """Forget a prompt's score."""
+        with self._lock:
+            score = self._scores.pop(prompt_id, None)
+            if score is not None:
+                self._unrank(self._category_of.pop(prompt_id), score, prompt_id)
+
+    def score(self, prompt_id: str, now: Optional[float] = None) -> float:
+        """A prompt's current decayed score."""
+        now = time.time() if now is None else now
+        with self._lock:
+            stored = self._scores.get(prompt_id, 0.0)
+            return stored * math.exp(-self.rate * (now - self._epoch))
+
+    def top(self, category_id: str, k: Optional[int] = None) -> List[str]:
+        """Prompt IDs of a category with any activity, hottest first."""
+        with self._lock:
+            ranked = self._ranked.get(category_id, [])
+            return [pid for _, pid in (ranked[:k] if k is not None else ranked)]
@@ -0,0 +1,147 @@
+"""Per-user state partitions, loaded on first access and evicted when idle."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from lib.spill import process_dir
+
+PARTITION_SUFFIX = ".json"
+
+
+class UserPartition:
+    """One user's bookmarks and cached per-user views."""
+
+    __slots__ = ("user_key", "bookmarks", "views", "last_seen")
+
+    def __init__(self, user_key: str, bookmarks: Optional[Dict[str, Dict]] = None):
+        self.user_key = user_key
+        self.bookmarks: Dict[str, Dict] = bookmarks or {}  # prompt_id -> bookmark, insertion ordered
+        self.views: Dict[str, tuple] = {}  # name -> (generation, value)
+        self.last_seen = time.time()
+
+    def cached(self, name: str, generation: Any, compute: Callable[[], Any]) -> Any:
+        """A per-user view, recomputed when ``generation`` moves."""
+        entry = self.views.get(name)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        value = compute()
+        self.views[name] = (generation, value)
+        return value
+
+
+class UserPartitions:
+    """LRU of resident user partitions with spill files for the rest.
+
+    Bookmarks are written through to one small JSON file per user, so an
+    evicted partition is simply dropped and read back on the user's next
+    request; cached views are rebuilt. Partitions idle for more than
+    ``idle_seconds`` are evicted (swept at most once a minute), and the
+    least recently used ones go first when more than ``max_resident``
+    users are active. The store is in memory, so each process spills to its
+    own subdirectory of ``directory`` (:func:`lib.spill.process_dir`);
+    spill files of processes that have exited are removed when the
+    partitions open.
+    """
+
+    def __init__(self, directory: str, idle_seconds: float = 1800.0, max_resident: int = 1000):
+        self.directory = process_dir(directory)
+        self.idle_seconds = idle_seconds
+        self.max_resident = max_resident
+        self._resident: "OrderedDict[str, UserPartition]" = OrderedDict()
+        self._stats = {"loads": 0, "evictions": 0}
+        self._swept_at = time.time()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def _path(self, user_key: str) -> str:
+        digest = hashlib.sha1(user_key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, digest + PARTITION_SUFFIX)
+
+    def get(self, user_key: str) -> UserPartition:
+        """A user's partition, loading it from its spill file if needed."""
+        with self._lock:
+            partition = self._resident.get(user_key)
+            if partition is None:
+                partition = self._resident[user_key] = UserPartition(user_key, self._load_bookmarks(user_key))
+                self._stats["loads"] += 1
+            else:
+                self._resident.move_to_end(user_key)
+            partition.last_seen = time.time()
+            self._maybe_evict()
+            return partition
+
+    def _load_bookmarks(self, user_key: str) -> Dict[str, Dict]:
+        try:
+            with open(self._path(user_key), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {b["prompt_id"]: b for b in data.get("bookmarks", [])}
+
+    def update(self, user_key: str, mutate: Callable[[UserPartition], Any]) -> Any:
+        """Change a user's partition and write it through, under the lock.
+
+        Args:
+            mutate: Applies the change to the partition
+
+        Returns:
+            What ``mutate`` returned
+        """
+        with self._lock:
+            partition = self.get(user_key)
+            result = mutate(partition)
+            self.save(partition)
+            return result
+
+    def save(self, partition: UserPartition) -> None:
+        """Write a partition's bookmarks to its spill file."""
+        path = self._path(partition.user_key)
+        with self._lock:
+            if not partition.bookmarks:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"user_key": partition.user_key, "bookmarks": list(partition.bookmarks.values())}, f)
+            os.replace(tmp, path)
+
+    def _maybe_evict(self) -> None:
+        """Drop idle and over-capacity partitions (caller holds the lock)."""
+        now = time.time()
+        if now - self._swept_at >= 60:
+            self._swept_at = now
+            while self._resident:
+                user_key, oldest = next(iter(self._resident.items()))
+                if now - oldest.last_seen < self.idle_seconds:
+                    break
+                del self._resident[user_key]
+                self._stats["evictions"] += 1
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def evict_idle(self) -> int:
+        """Evict idle partitions now.
+
+        Returns:
+            Number of partitions evicted
+        """
+        with self._lock:
+            before = self._stats["evictions"]
+            self._swept_at = 0.0
+            self._maybe_evict()
+            return self._stats["evictions"] - before
+
+    def stats(self) -> Dict[str, int]:
+        """Resident partitions, loads and evictions so far."""
+        with self._lock:
+            return {"resident": len(self._resident), **self._stats}
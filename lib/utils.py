@@ -2,10 +2,25 @@
 
 import re
 import csv
+import gzip
+import json
 import os
-from datetime import datetime
-from typing import Optional
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Iterator, List
 import streamlit as st
+from lib.admission import Throttled, get_admission
+from lib.slugs import slugify
+
+LOG_DIR = "logs"
+LOG_FIELDS = ("timestamp", "event", "user_key", "meta")
+
+# Live (uncompressed) log files: YYYY-MM-DD.csv or YYYY-MM-DD_partN.csv
+_LIVE_LOG_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:_part\d+)?\.csv$')
+
+_last_maintenance_day: Optional[str] = None
+_maintenance_lock = threading.Lock()
 
 def normalize_key(name: str) -> str:
     """Normalize a name to a URL-friendly key.
@@ -14,15 +29,23 @@ def normalize_key(name: str) -> str:
         name: The display name to normalize
         
     Returns:
-        Lowercase key with special characters replaced by hyphens
+        Lowercase, accent-free key with other characters replaced by
+        hyphens ("Négociation" -> "negociation"); memoized
+    """
+    return slugify(name)
+
+
+def parse_tags(text: str) -> List[str]:
+    """Split a comma-separated tag input into clean tags.
+    
+    Args:
+        text: Raw input such as "Email, cold outreach,email"
+        
+    Returns:
+        Lowercase, whitespace-collapsed tags without duplicates, in input order
     """
-    if not name:
-        return ""
-    # Remove accents, convert to lowercase, replace non-alphanumeric with hyphens
-    name = name.lower()
-    name = re.sub(r'[^a-z0-9]+', '-', name)
-    name = name.strip('-')
-    return name
+    tags = (" ".join(part.split()).lower() for part in (text or "").split(","))
+    return list(dict.fromkeys(tag for tag in tags if tag))
 
 
 def write_log(event: str, user_key: str = "", meta: dict | None = None) -> None:
@@ -31,19 +54,28 @@ def write_log(event: str, user_key: str = "", meta: dict | None = None) -> None:
     Args:
         event: Event name (e.g., 'view_prompt', 'create_submission')
         user_key: User identifier
-        meta: Optional metadata dictionary
+        meta: Optional metadata dictionary, stored as JSON in the ``meta``
+            column so every row of a file shares the same header
+    
+    Rows over the admission limits are dropped (and counted) rather than
+    raising into the caller.
     """
+    try:
+        get_admission().admit("write_log", user_key)
+    except Throttled:
+        return
+    
     if meta is None:
         meta = {}
     
     # Ensure logs directory exists
-    os.makedirs("logs", exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
     
     # Get today's date for filename
     today = datetime.now().strftime("%Y-%m-%d")
     
     # Check if we need to rotate (keep file size reasonable)
-    log_file = f"logs/{today}.csv"
+    log_file = os.path.join(LOG_DIR, f"{today}.csv")
     part_num = 1
     
     # Find available filename
@@ -51,7 +83,7 @@ def write_log(event: str, user_key: str = "", meta: dict | None = None) -> None:
         file_size = os.path.getsize(log_file)
         if file_size > 10 * 1024 * 1024:  # 10 MB threshold
             part_num += 1
-            log_file = f"logs/{today}_part{part_num}.csv"
+            log_file = os.path.join(LOG_DIR, f"{today}_part{part_num}.csv")
         else:
             break
     
@@ -60,14 +92,13 @@ def write_log(event: str, user_key: str = "", meta: dict | None = None) -> None:
         "timestamp": datetime.now().isoformat(),
         "event": event,
         "user_key": user_key,
-        **meta
+        "meta": json.dumps(meta, ensure_ascii=False) if meta else ""
     }
     
     # Write to CSV
     file_exists = os.path.exists(log_file)
     with open(log_file, 'a', newline='', encoding='utf-8') as f:
-        fieldnames = ['timestamp', 'event', 'user_key'] + list(meta.keys())
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
         
         if not file_exists:
             writer.writeheader()
@@ -75,24 +106,206 @@ def write_log(event: str, user_key: str = "", meta: dict | None = None) -> None:
         writer.writerow(row)
 
 
-def purge_old_logs(days: int = 90) -> None:
-    """Remove log files older than specified days.
+def _log_day(filename: str) -> Optional[str]:
+    """Return the YYYY-MM-DD day a live log file belongs to, if any."""
+    match = _LIVE_LOG_RE.match(filename)
+    return match.group(1) if match else None
+
+
+def iter_log_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Iterate over the rows of a live or archived log file.
     
     Args:
-        days: Number of days to keep logs (default 90)
+        path: Path to a ``.csv`` or compressed ``.csv.gz`` log file
+        
+    Yields:
+        One dict per logged event
     """
-    if not os.path.exists("logs"):
-        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            # Values beyond the header (rows logged with other meta keys)
+            extra = row.pop(None, None)
+            if extra:
+                row["extra"] = "|".join(extra)
+            yield row
+
+
+def log_meta(row: Dict[str, str]) -> Dict:
+    """Decode the metadata of a log row.
     
-    cutoff_date = datetime.now().timestamp() - (days * 24 * 60 * 60)
+    Args:
+        row: Row from :func:`iter_log_rows`
+        
+    Returns:
+        Metadata dict (legacy per-key columns are included as-is)
+    """
+    meta = {k: v for k, v in row.items() if k not in LOG_FIELDS and v not in (None, "")}
+    if row.get("meta"):
+        try:
+            meta.update(json.loads(row["meta"]))
+        except ValueError:
+            pass
+    return meta
+
+
+def list_log_files(log_dir: str = LOG_DIR) -> List[str]:
+    """List live and archived log files, newest first.
+    
+    Args:
+        log_dir: Logs directory to scan
+        
+    Returns:
+        Paths relative to the logs directory (e.g. ``2024-05-01.csv`` or
+        ``2024/04/2024-04-30.csv.gz``)
+    """
+    if not os.path.exists(log_dir):
+        return []
+    
+    files = []
+    for root, _dirs, names in os.walk(log_dir):
+        for name in names:
+            if name.endswith(".csv") or name.endswith(".csv.gz"):
+                rel = os.path.relpath(os.path.join(root, name), log_dir)
+                files.append(rel.replace(os.sep, "/"))
+    
+    return sorted(files, key=lambda f: os.path.basename(f), reverse=True)
+
+
+def compact_logs(today: Optional[str] = None) -> List[str]:
+    """Merge each closed day's log parts into one compressed archive.
     
-    for filename in os.listdir("logs"):
-        file_path = os.path.join("logs", filename)
-        if os.path.getmtime(file_path) < cutoff_date:
+    All ``YYYY-MM-DD.csv`` / ``YYYY-MM-DD_partN.csv`` files of a day before
+    ``today`` are merged, sorted by timestamp and written to
+    ``logs/YYYY/MM/YYYY-MM-DD.csv.gz``. The live parts are removed once the
+    archive is in place.
+    
+    Args:
+        today: Current day as YYYY-MM-DD (defaults to the local date)
+        
+    Returns:
+        Paths of the archives written
+    """
+    if not os.path.exists(LOG_DIR):
+        return []
+    
+    if today is None:
+        today = datetime.now().strftime("%Y-%m-%d")
+    
+    # Group closed days' parts
+    parts_by_day: Dict[str, List[str]] = {}
+    for filename in os.listdir(LOG_DIR):
+        day = _log_day(filename)
+        if day and day < today:
+            parts_by_day.setdefault(day, []).append(os.path.join(LOG_DIR, filename))
+    
+    written = []
+    for day, parts in sorted(parts_by_day.items()):
+        year, month, _ = day.split("-")
+        archive_dir = os.path.join(LOG_DIR, year, month)
+        archive = os.path.join(archive_dir, f"{day}.csv.gz")
+        os.makedirs(archive_dir, exist_ok=True)
+        
+        # Merge previous archive (if any) with the day's parts
+        sources = ([archive] if os.path.exists(archive) else []) + sorted(parts)
+        fieldnames = list(LOG_FIELDS)
+        rows = []
+        for source in sources:
+            for row in iter_log_rows(source):
+                for key in row:
+                    if key not in fieldnames:
+                        fieldnames.append(key)
+                rows.append(row)
+        rows.sort(key=lambda r: r.get("timestamp") or "")
+        
+        tmp_path = archive + ".tmp"
+        with gzip.open(tmp_path, 'wt', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, archive)
+        
+        for part in parts:
             try:
-                os.remove(file_path)
+                os.remove(part)
             except OSError:
                 pass
+        written.append(archive)
+    
+    return written
+
+
+def purge_old_logs(days: int = 90) -> None:
+    """Remove log partitions older than specified days.
+    
+    Retention works on partition names only: whole ``YYYY/MM`` directories
+    are dropped once the month is entirely past the cutoff, and day files
+    are dropped by the date in their name.
+    
+    Args:
+        days: Number of days to keep logs (default 90)
+    """
+    if not os.path.exists(LOG_DIR):
+        return
+    
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    cutoff_month = cutoff[:7]
+    
+    for entry in os.listdir(LOG_DIR):
+        entry_path = os.path.join(LOG_DIR, entry)
+        
+        # Live day files
+        day = _log_day(entry)
+        if day:
+            if day < cutoff:
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            continue
+        
+        # Archive partitions: logs/YYYY/MM/
+        if not (entry.isdigit() and len(entry) == 4 and os.path.isdir(entry_path)):
+            continue
+        for month in os.listdir(entry_path):
+            month_path = os.path.join(entry_path, month)
+            month_key = f"{entry}-{month}"
+            if month_key < cutoff_month:
+                shutil.rmtree(month_path, ignore_errors=True)
+            elif month_key == cutoff_month:
+                for name in os.listdir(month_path):
+                    if name[:10] < cutoff:
+                        try:
+                            os.remove(os.path.join(month_path, name))
+                        except OSError:
+                            pass
+        if not os.listdir(entry_path):
+            os.rmdir(entry_path)
+
+
+def log_maintenance_due() -> bool:
+    """Claim today's log maintenance: True for the first caller of the day."""
+    global _last_maintenance_day
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    with _maintenance_lock:
+        if _last_maintenance_day == today:
+            return False
+        _last_maintenance_day = today
+        return True
+
+
+def run_log_maintenance(days: int = 90) -> None:
+    """Compact closed days and apply retention.
+    
+    Reads and rewrites the whole log directory, so it runs as a background
+    job (see ``app.main``), never inside a page run.
+    
+    Args:
+        days: Number of days to keep logs (default 90)
+    """
+    compact_logs(datetime.now().strftime("%Y-%m-%d"))
+    purge_old_logs(days)
 
 
 def toast(msg: str) -> None:
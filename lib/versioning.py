@@ -0,0 +1,143 @@
+"""Delta-encoded revision history for published prompts."""
+
+from difflib import SequenceMatcher
+from typing import Optional, List, Dict, Union
+
+# Prompt fields tracked across revisions
+VERSIONED_FIELDS = (
+    "title",
+    "description",
+    "craft_context",
+    "craft_role",
+    "craft_action",
+    "craft_format",
+    "craft_tone",
+    "full_text",
+)
+
+# A full copy is stored every N revisions, so rebuilding any version
+# applies at most N - 1 deltas
+CHECKPOINT_INTERVAL = 10
+
+# Delta op: [start, end] copies base[start:end], a string is inserted as-is
+DeltaOp = Union[List[int], str]
+
+
+def encode_delta(old: str, new: str) -> List[DeltaOp]:
+    """Encode ``new`` as copy/insert operations against ``old``.
+
+    Args:
+        old: Previous text
+        new: Current text
+
+    Returns:
+        List of delta operations
+    """
+    ops: List[DeltaOp] = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(new[j1:j2])
+    return ops
+
+
+def apply_delta(old: str, ops: List[DeltaOp]) -> str:
+    """Rebuild a text from its base and delta operations.
+
+    Args:
+        old: Base text the delta was encoded against
+        ops: Delta operations from :func:`encode_delta`
+
+    Returns:
+        The reconstructed text
+    """
+    return "".join(op if isinstance(op, str) else old[op[0]:op[1]] for op in ops)
+
+
+def next_version(version: str) -> str:
+    """Bump the minor part of a ``major.minor`` version string."""
+    major, _, minor = (version or "1.0").partition(".")
+    return f"{major}.{int(minor or 0) + 1}"
+
+
+class PromptHistory:
+    """Revision log of one prompt: checkpoints plus per-field deltas."""
+
+    def __init__(self, prompt: Dict, edited_by: str = "", note: str = ""):
+        self.revisions: List[Dict] = []
+        self._latest: Dict[str, str] = {}
+        self._append(prompt, edited_by, note)
+
+    def _append(self, prompt: Dict, edited_by: str, note: str) -> Dict:
+        """Store a revision as a checkpoint or a delta on the previous one."""
+        fields = {f: prompt.get(f) or "" for f in VERSIONED_FIELDS}
+        revision = {
+            "version": prompt.get("version", "1.0"),
+            "edited_at": prompt.get("updated_at") or prompt.get("created_at"),
+            "edited_by": edited_by,
+            "note": note,
+        }
+
+        if len(self.revisions) % CHECKPOINT_INTERVAL == 0:
+            revision["checkpoint"] = fields
+        else:
+            revision["delta"] = {
+                f: encode_delta(self._latest[f], value)
+                for f, value in fields.items()
+                if value != self._latest[f]
+            }
+
+        self.revisions.append(revision)
+        self._latest = fields
+        return revision
+
+    def record(self, prompt: Dict, edited_by: str = "", note: str = "") -> Dict:
+        """Record a new revision of the prompt.
+
+        Args:
+            prompt: The prompt after the edit
+            edited_by: User key of the editor
+            note: Optional change note
+
+        Returns:
+            The stored revision
+        """
+        return self._append(prompt, edited_by, note)
+
+    def list_versions(self) -> List[Dict]:
+        """List revision metadata, newest first."""
+        return [
+            {
+                "version": r["version"],
+                "edited_at": r["edited_at"],
+                "edited_by": r["edited_by"],
+                "note": r["note"],
+                "changed_fields": list(r["checkpoint"] if "checkpoint" in r else r["delta"]),
+            }
+            for r in reversed(self.revisions)
+        ]
+
+    def get_version(self, version: str) -> Optional[Dict[str, str]]:
+        """Rebuild the versioned fields of a historical revision.
+
+        Args:
+            version: Version string (e.g. "1.2")
+
+        Returns:
+            Field values at that version, or None if unknown
+        """
+        index = next((i for i, r in enumerate(self.revisions) if r["version"] == version), None)
+        if index is None:
+            return None
+        if index == len(self.revisions) - 1:
+            return dict(self._latest)
+
+        # Start from the nearest checkpoint and replay the deltas
+        start = index - index % CHECKPOINT_INTERVAL
+        fields = dict(self.revisions[start]["checkpoint"])
+        for revision in self.revisions[start + 1:index + 1]:
+            for field, ops in revision["delta"].items():
+                fields[field] = apply_delta(fields[field], ops)
+        return fields
@@ -0,0 +1 @@
+"""Developer tools for AI Prompt Studio."""
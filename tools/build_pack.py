@@ -0,0 +1,72 @@
+"""Build a read-only prompt pack from a JSON catalog.
+
+The input is either a list of prompts or an object with ``prompts`` and
+optional ``metiers``, ``categories`` and ``authors`` lists. Prompts use the
+store's field names (``title``, ``category_id``, ``craft_*``...); a missing
+``id`` is generated and a missing ``full_text`` is built from the CRAFT
+fields. ``tags`` (a list) is stored as a column for the facet filters.
+
+Usage::
+
+    python -m tools.build_pack catalog.json packs/catalog.pack --name sales-essentials --version 2025.1
+"""
+
+import argparse
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from lib.data_store import INDEXED_FIELDS
+from lib.packs import PromptPack, write_pack
+from lib.templates import build_full_text
+
+
+def normalize_prompt(prompt: Dict) -> Dict:
+    """Fill the ID and full text of a catalog prompt."""
+    prompt = dict(prompt)
+    prompt.setdefault("id", str(uuid.uuid4()))
+    if not prompt.get("full_text"):
+        prompt["full_text"] = build_full_text(prompt)
+    return prompt
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("catalog", help="JSON catalog file")
+    parser.add_argument("output", help="pack file to write")
+    parser.add_argument("--name", required=True, help="pack name")
+    parser.add_argument("--version", required=True, help="pack version")
+    args = parser.parse_args(argv)
+
+    with open(args.catalog, encoding="utf-8") as f:
+        catalog = json.load(f)
+    if isinstance(catalog, list):
+        catalog = {"prompts": catalog}
+
+    started = time.perf_counter()
+    count = write_pack(
+        args.output,
+        (normalize_prompt(p) for p in catalog["prompts"]),
+        name=args.name,
+        version=args.version,
+        metiers=catalog.get("metiers", ()),
+        categories=catalog.get("categories", ()),
+        authors=catalog.get("authors", ()),
+        columns=INDEXED_FIELDS["prompts"] + ("tags",),
+    )
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pack = PromptPack(args.output)
+    opened = time.perf_counter() - started
+    info = pack.info()
+    pack.close()
+    print(
+        f"{args.output}: {count} prompts, {info['bytes'] / 1e6:.1f} MB "
+        f"(built in {built:.2f}s, opens in {opened * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Vendor the Work Sans web fonts into ``assets/fonts/``.
+
+Downloads the Latin subset of Work Sans (SIL Open Font License 1.1) in the
+weights the stylesheet uses, plus the license text, from the Fontsource
+package on the npm CDN. Run it once and commit the files; the app itself
+never fetches anything from external hosts.
+
+Usage::
+
+    python -m tools.fetch_fonts
+"""
+
+import argparse
+import os
+import urllib.request
+from typing import List, Optional
+
+from lib.assets import SOURCE_DIR
+
+PACKAGE_URL = "https://cdn.jsdelivr.net/npm/@fontsource/work-sans@5"
+FONT_DIR = os.path.join(SOURCE_DIR, "fonts")
+
+# Weights referenced by assets/app.css
+WEIGHTS = (400, 600, 700)
+
+
+def fetch(url: str, path: str) -> None:
+    with urllib.request.urlopen(url, timeout=30) as response:
+        data = response.read()
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    print(f"{os.path.relpath(path)}  {len(data):,} bytes")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=FONT_DIR, help="Target directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    for weight in WEIGHTS:
+        # Named <Name>-<weight>.woff2 so lib.assets generates the @font-face rule
+        fetch(f"{PACKAGE_URL}/files/work-sans-latin-{weight}-normal.woff2",
+              os.path.join(args.out, f"WorkSans-{weight}.woff2"))
+    fetch(f"{PACKAGE_URL}/LICENSE", os.path.join(args.out, "OFL.txt"))
+
+
+if __name__ == "__main__":
+    main()
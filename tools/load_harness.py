@@ -0,0 +1,383 @@
+"""Concurrent-session load harness for AI Prompt Studio.
+
+Drives many headless sessions through Streamlit's ``AppTest`` against the
+real views, either with a synthetic traffic mix or by replaying events
+recorded by ``lib.utils.write_log``, and reports per-step rerun latency
+percentiles, throughput and error counts for growing catalog sizes.
+
+Usage::
+
+    python -m tools.load_harness --sessions 200 --catalog-sizes 100,1000,10000
+    python -m tools.load_harness --replay logs --speed 0  # as fast as possible
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+from lib.data_store import get_db
+from lib.utils import LOG_DIR, iter_log_rows, list_log_files, log_meta
+import config
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+SEARCH_TERMS = ["email", "meeting", "follow-up", "pricing", "discovery", "objection", "account", "deal"]
+SORTS = ["Highest rated", "Most used", "Recently added"]
+
+# Synthetic traffic mix: (step, weight)
+TRAFFIC_MIX = [
+    ("home_search", 25),
+    ("category_sort", 20),
+    ("prompt_rate", 20),
+    ("bookmark_toggle", 20),
+    ("new_submission", 10),
+    ("admin_approve", 5),
+]
+
+
+# ---------------------------------------------------------------------------
+# Catalog
+# ---------------------------------------------------------------------------
+
+def grow_catalog(size: int, seed: int = 0) -> None:
+    """Publish synthetic prompts until the catalog holds ``size`` prompts."""
+    db = get_db()
+    rng = random.Random(seed + len(db.prompts))
+    metier = db.list_metiers()[0]
+    categories = db.list_categories(metier["id"])
+    author = db.list_authors()[0]
+
+    while len(db.prompts) < size:
+        n = len(db.prompts)
+        category = categories[n % len(categories)]
+        words = rng.sample(SEARCH_TERMS, 3)
+        fields = {f: f"{f.split('_')[1].title()} for {' '.join(words)} #{n}" for f in
+                  ("craft_context", "craft_role", "craft_action", "craft_format", "craft_tone")}
+        submission = db.create_submission({
+            "title": f"{words[0].title()} {words[1]} prompt {n}",
+            "description": f"Synthetic prompt about {' and '.join(words)}.",
+            "metier_id": metier["id"],
+            "category_id": category["id"],
+            "category_name": category["name"],
+            "author_id": author["id"],
+            "author_display_name_snapshot": author["display_name"],
+            "full_text": "\n\n".join(fields.values()),
+            "created_by": "loadtest",
+            **fields,
+        }, admit=False)
+        db.approve_submission(submission["id"])
+
+
+# ---------------------------------------------------------------------------
+# Session steps
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def share_test_runtime() -> Iterator[None]:
+    """Keep a mock Runtime visible to concurrent ``AppTest`` runs.
+
+    ``AppTest.run`` installs a mock ``Runtime`` singleton and clears it when
+    it returns, which breaks any other run still in flight on another
+    thread. While the context is active, fall back to the most recent mock
+    instead of raising; the original ``Runtime`` methods are restored on exit.
+    """
+    last: Dict[str, Runtime] = {}
+    original = {name: Runtime.__dict__[name] for name in ("instance", "exists")}
+
+    def instance(cls) -> Runtime:
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last:
+            return last["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+    try:
+        yield
+    finally:
+        for name, method in original.items():
+            setattr(Runtime, name, method)
+
+
+class Session:
+    """One headless browser session: an ``AppTest`` plus its user key."""
+
+    def __init__(self, user_key: str, timeout: float):
+        self.user_key = user_key
+        self.timeout = timeout
+
+    def open(self, view: str, **params) -> AppTest:
+        """Load a view in a fresh script run."""
+        at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        at.session_state["user_key"] = self.user_key
+        at.query_params["view"] = view
+        for key, value in params.items():
+            at.query_params[key] = value
+        return at
+
+
+def _button(at: AppTest, label: str):
+    for button in at.button:
+        if button.label == label or button.label.endswith(label):
+            return button
+    raise LookupError(f"button {label!r} not found")
+
+
+def _check(at: AppTest) -> None:
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if at.error:
+        raise RuntimeError(at.error[0].value)
+
+
+def _pick_prompt(rng: random.Random, prompt_id: Optional[str] = None) -> str:
+    db = get_db()
+    if prompt_id and db.get_prompt(prompt_id):
+        return prompt_id
+    return rng.choice(db.prompts)["id"]
+
+
+def _pick_category(rng: random.Random, category_id: Optional[str] = None) -> str:
+    db = get_db()
+    if category_id and db.get_category(category_id):
+        return category_id
+    return rng.choice(db.list_categories(db.list_metiers()[0]["id"]))["id"]
+
+
+def step_home_search(session: Session, rng: random.Random, timed: Callable, query: str = "", **_) -> None:
+    at = session.open("home")
+    timed("home", at.run)
+    at.text_input[0].input(query or rng.choice(SEARCH_TERMS))
+    timed("home:search", at.run)
+    _check(at)
+
+
+def step_category_sort(session: Session, rng: random.Random, timed: Callable,
+                       category_id: str = "", sort: str = "", **_) -> None:
+    at = session.open("category", cat=_pick_category(rng, category_id))
+    timed("category", at.run)
+    at.radio[0].set_value(sort if sort in SORTS else rng.choice(SORTS))
+    timed("category:sort", at.run)
+    _check(at)
+
+
+def step_prompt_rate(session: Session, rng: random.Random, timed: Callable,
+                     prompt_id: str = "", stars: int = 0, **_) -> None:
+    at = session.open("prompt", id=_pick_prompt(rng, prompt_id))
+    timed("prompt", at.run)
+    at.slider[0].set_value(int(stars) if stars else rng.randint(1, 5))
+    _button(at, "Submit rating").click()
+    timed("prompt:rate", at.run)
+    _check(at)
+
+
+def step_bookmark_toggle(session: Session, rng: random.Random, timed: Callable, prompt_id: str = "", **_) -> None:
+    at = session.open("prompt", id=_pick_prompt(rng, prompt_id))
+    timed("prompt", at.run)
+    _button(at, "Save prompt").click()
+    timed("prompt:bookmark", at.run)
+    _check(at)
+
+
+def step_new_submission(session: Session, rng: random.Random, timed: Callable, **_) -> None:
+    at = session.open("new")
+    timed("new", at.run)
+    at.text_input[0].input(f"Load test prompt {rng.randint(0, 10**6)}")
+    for area in at.text_area:
+        if area.label == "Description text":
+            area.input("Submitted by the load harness.")
+        else:
+            area.input(f"{area.label} {rng.choice(SEARCH_TERMS)}")
+    _button(at, "SAVE PROMPT").click()
+    timed("new:save", at.run)
+    _check(at)
+
+
+def step_admin_approve(session: Session, rng: random.Random, timed: Callable, **_) -> None:
+    at = session.open(config.ADMIN_ROUTE)
+    timed("admin", at.run)
+    approve = [b for b in at.button if b.label == "Approve"]
+    if approve:
+        approve[0].click()
+        timed("admin:approve", at.run)
+    _check(at)
+
+
+STEPS: Dict[str, Callable] = {
+    "home_search": step_home_search,
+    "category_sort": step_category_sort,
+    "prompt_rate": step_prompt_rate,
+    "bookmark_toggle": step_bookmark_toggle,
+    "new_submission": step_new_submission,
+    "admin_approve": step_admin_approve,
+}
+
+# Logged event -> (step, meta keys forwarded as step arguments)
+REPLAY_EVENTS = {
+    "search": ("home_search", ("query",)),
+    "view_category": ("category_sort", ("category_id", "sort")),
+    "view_prompt": ("prompt_rate", ("prompt_id",)),
+    "rate_prompt": ("prompt_rate", ("prompt_id", "stars")),
+    "toggle_bookmark": ("bookmark_toggle", ("prompt_id",)),
+    "create_submission": ("new_submission", ()),
+    "approve_submission": ("admin_approve", ()),
+}
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+def synthetic_workload(requests: int, seed: int = 0) -> Iterator[Tuple[float, str, str, Dict]]:
+    """Yield ``(offset_seconds, user_key, step, kwargs)`` from the traffic mix."""
+    rng = random.Random(seed)
+    steps, weights = zip(*TRAFFIC_MIX)
+    for _ in range(requests):
+        yield 0.0, f"user{rng.randint(0, 999)}", rng.choices(steps, weights)[0], {}
+
+
+def replay_workload(log_dir: str = LOG_DIR) -> Iterator[Tuple[float, str, str, Dict]]:
+    """Yield workload items from recorded ``write_log`` events, oldest first."""
+    rows = []
+    for rel_path in list_log_files(log_dir):
+        rows.extend(iter_log_rows(os.path.join(log_dir, rel_path)))
+    rows.sort(key=lambda r: r.get("timestamp") or "")
+
+    start = None
+    for row in rows:
+        mapping = REPLAY_EVENTS.get(row.get("event"))
+        if not mapping:
+            continue
+        step, keys = mapping
+        timestamp = datetime.fromisoformat(row["timestamp"]).timestamp()
+        start = timestamp if start is None else start
+        meta = log_meta(row)
+        yield timestamp - start, row.get("user_key") or "guest", step, {k: meta[k] for k in keys if k in meta}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class Recorder:
+    """Thread-safe collection of rerun latencies and errors."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timed(self, name: str, run: Callable) -> None:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[name].append(elapsed)
+
+    def error(self, name: str) -> None:
+        with self._lock:
+            self.errors[name] += 1
+
+
+def run_workload(workload: Iterator[Tuple[float, str, str, Dict]], sessions: int,
+                 speed: float = 0.0, timeout: float = 30.0, seed: int = 0) -> Tuple[Recorder, float]:
+    """Run a workload with ``sessions`` concurrent sessions.
+
+    Args:
+        workload: Items from :func:`synthetic_workload` or :func:`replay_workload`
+        sessions: Number of concurrent sessions (worker threads)
+        speed: Replay speed multiplier for recorded offsets (0 = no pacing)
+        timeout: Per-rerun timeout in seconds
+        seed: Random seed for step parameters
+
+    Returns:
+        The recorder and the wall-clock duration in seconds
+    """
+    recorder = Recorder()
+    started = time.perf_counter()
+
+    def run_one(item: Tuple[float, str, str, Dict], index: int) -> None:
+        offset, user_key, step, kwargs = item
+        if speed > 0:
+            delay = offset / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        rng = random.Random(seed * 1_000_003 + index)
+        try:
+            STEPS[step](Session(user_key, timeout), rng, recorder.timed, **kwargs)
+        except Exception:
+            recorder.error(step)
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for index, item in enumerate(workload):
+            pool.submit(run_one, item, index)
+
+    return recorder, time.perf_counter() - started
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def format_report(catalog_size: int, recorder: Recorder, duration: float) -> str:
+    """Format per-step latency percentiles, throughput and errors."""
+    lines = [
+        f"Catalog: {catalog_size} prompts | duration {duration:.1f}s",
+        f"{'step':<18}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'rps':>8}",
+    ]
+    for name in sorted(recorder.latencies):
+        values = recorder.latencies[name]
+        lines.append(
+            f"{name:<18}{len(values):>7}"
+            f"{_percentile(values, 50) * 1000:>10.1f}"
+            f"{_percentile(values, 95) * 1000:>10.1f}"
+            f"{_percentile(values, 99) * 1000:>10.1f}"
+            f"{statistics.fmean(values) * 1000:>10.1f}"
+            f"{len(values) / duration:>8.1f}"
+        )
+    total = sum(len(v) for v in recorder.latencies.values())
+    lines.append(f"total reruns {total} | {total / duration:.1f} reruns/s")
+    errors = ", ".join(f"{k}={v}" for k, v in sorted(recorder.errors.items())) or "none"
+    lines.append(f"errors: {errors}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=1000, help="synthetic steps per catalog size")
+    parser.add_argument("--catalog-sizes", default="100,1000,10000", help="comma-separated catalog sizes")
+    parser.add_argument("--replay", metavar="LOG_DIR", help="replay write_log events instead of the synthetic mix")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay speed multiplier (0 = no pacing)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with share_test_runtime():
+        for size in (int(s) for s in args.catalog_sizes.split(",") if s):
+            grow_catalog(size, args.seed)
+            if args.replay:
+                workload = replay_workload(args.replay)
+            else:
+                workload = synthetic_workload(args.requests, args.seed)
+            recorder, duration = run_workload(workload, args.sessions, args.speed, args.timeout, args.seed)
+            print(format_report(len(get_db().prompts), recorder, duration))
+            print()
+
+
+if __name__ == "__main__":
+    main()
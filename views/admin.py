@@ -3,7 +3,9 @@
 import streamlit as st
 import pandas as pd
 from lib.data_store import get_db
-from lib.utils import qp, toast
+from lib.memory import is_tracing, process_rss, set_tracing, top_allocations
+from lib.utils import qp, toast, write_log, list_log_files, LOG_DIR
+import config
 import os
 
 
@@ -14,8 +16,12 @@ def render():
     # Header
     st.markdown("# AI PROMPT STUDIO - ADMIN")
     
-    # Tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["Pending", "Published", "Categories", "Logs"])
+    # Tabs (Diagnostics is hidden unless the URL carries &diag=1)
+    tab_names = ["Pending", "Published", "Categories", "Logs"]
+    show_diagnostics = qp("diag") == "1"
+    if show_diagnostics:
+        tab_names.append("Diagnostics")
+    tab1, tab2, tab3, tab4, *tab_diag = st.tabs(tab_names)
     
     # TAB 1: Pending Submissions
     with tab1:
@@ -28,73 +34,70 @@ def render():
                 # Export logic would go here
                 toast("Export functionality coming soon")
         
-        # View filter
-        submissions = db.list_submissions()
-        
-        # Display submissions
-        if not submissions:
-            st.info("No pending submissions.")
-        else:
-            for sub in submissions:
-                with st.container():
-                    status = sub.get("status", "pending")
-                    status_color = {
-                        "pending": "🟠",
-                        "approved": "🟢",
-                        "rejected": "🔴"
-                    }.get(status, "⚪")
-                    
-                    col1, col2, col3 = st.columns([4, 1, 1])
-                    
-                    with col1:
-                        st.markdown(f"{status_color} **{sub.get('title', 'Unnamed')}**")
-                        st.caption(sub.get("description", "No description"))
-                    
-                    with col2:
-                        if st.button("Review", key=f"review_{sub['id']}", use_container_width=True):
-                            st.session_state["admin_review_id"] = sub["id"]
-                            st.rerun()
-                    
-                    with col3:
-                        if status == "pending":
-                            if st.button("Approve", key=f"approve_{sub['id']}", use_container_width=True, type="primary"):
-                                db.approve_submission(sub["id"])
-                                toast("Approved and published!")
-                                st.rerun()
-                        elif status == "rejected":
-                            st.caption("Rejected")
-                    
-                    st.divider()
+        # Job metrics poll on their own; the queue reruns only when it changed
+        # (the watcher runs after the queue, so a full run never re-triggers it)
+        render_job_status()
+        render_pending_queue()
     
     # TAB 2: Published Prompts
     with tab2:
         st.markdown("## All Published Prompts")
         
-        prompts = db.list_prompts()
+        prompts = db.list_prompts(fields=("id", "title"))
         
         if not prompts:
             st.info("No published prompts.")
         else:
-            # Create dataframe
-            data = []
-            for p in prompts:
-                data.append({
-                    "ID": p["id"][:8] + "...",
-                    "Title": p.get("title", ""),
-                    "Category": p.get("category_name", ""),
-                    "Author": p.get("author_display_name_snapshot", ""),
-                    "Rating": f"{p.get('avg_rating', 0):.1f}",
-                    "Uses": p.get("uses_total", 0),
-                    "Version": p.get("version", "1.0")
-                })
+            # Filter and sort run on the store's columnar snapshot
+            snapshot = db.published_snapshot
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                table_search = st.text_input("Filter", placeholder="Title, category or author", key="published_filter")
+            with col2:
+                sort_by = st.selectbox("Sort by", ["Title", "Rating", "Uses", "Views", "Category"], key="published_sort")
+            with col3:
+                descending = st.toggle("Descending", value=True, key="published_desc")
             
-            df = pd.DataFrame(data)
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(
+                snapshot.view(search=table_search, sort_by=sort_by, descending=descending),
+                use_container_width=True,
+                column_config={"Rating": st.column_config.NumberColumn(format="%.1f")}
+            )
             
-            # Export button
-            if st.button("Export as CSV", key="export_published"):
-                csv = df.to_csv(index=False)
-                st.download_button("Download CSV", csv, "published_prompts.csv", "text/csv")
+            # Export button (CSV is cached until the catalog changes)
+            st.download_button("Export as CSV", snapshot.to_csv(), "published_prompts.csv", "text/csv", key="export_published")
+            
+            # Edit a published prompt (creates a new version)
+            with st.expander("Edit a published prompt"):
+                prompt_titles = {f"{p.get('title', '')} ({p['id'][:8]})": p["id"] for p in prompts}
+                selected = st.selectbox("Prompt", list(prompt_titles.keys()), key="edit_prompt_select")
+                edit_prompt = db.get_prompt(prompt_titles[selected])
+                
+                with st.form(f"edit_prompt_{edit_prompt['id']}_{edit_prompt.get('version', '1.0')}"):
+                    st.caption(f"Current version: {edit_prompt.get('version', '1.0')}")
+                    changes = {
+                        "title": st.text_input("Prompt name", value=edit_prompt.get("title", "")),
+                        "description": st.text_area("Description text", value=edit_prompt.get("description", "")),
+                    }
+                    for field_name, field_label in [
+                        ("craft_context", "[CONTEXT]"),
+                        ("craft_role", "[ROLE]"),
+                        ("craft_action", "[ACTION]"),
+                        ("craft_format", "[FORMAT]"),
+                        ("craft_tone", "[TONE]")
+                    ]:
+                        changes[field_name] = st.text_area(field_label, value=edit_prompt.get(field_name, ""))
+                    note = st.text_input("Change note")
+                    
+                    if st.form_submit_button("SAVE NEW VERSION", type="primary"):
+                        updated = db.update_prompt(
+                            edit_prompt["id"],
+                            changes,
+                            edited_by=st.session_state.get("user_key", "guest"),
+                            note=note
+                        )
+                        toast(f"Saved version {updated.get('version')}")
+                        st.rerun()
     
     # TAB 3: Categories
     with tab3:
@@ -138,9 +141,7 @@ def render():
     with tab4:
         st.markdown("## Logs")
         
-        log_files = []
-        if os.path.exists("logs"):
-            log_files = [f for f in os.listdir("logs") if f.endswith(".csv")]
+        log_files = list_log_files()
         
         if not log_files:
             st.info("No log files yet.")
@@ -148,12 +149,199 @@ def render():
             selected_log = st.selectbox("Select log file", log_files)
             
             if selected_log:
-                df = pd.read_csv(f"logs/{selected_log}")
+                # Archives (.csv.gz) are decompressed transparently
+                df = pd.read_csv(os.path.join(LOG_DIR, selected_log))
                 st.dataframe(df, use_container_width=True)
                 
                 # Export button
                 csv = df.to_csv(index=False)
-                st.download_button("Export CSV", csv, selected_log, "text/csv")
+                export_name = os.path.basename(selected_log).removesuffix(".gz")
+                st.download_button("Export CSV", csv, export_name, "text/csv")
+    
+    # TAB 5: Diagnostics (hidden)
+    if show_diagnostics:
+        with tab_diag[0]:
+            render_diagnostics()
+
+
+def _approve(sub_id: str) -> None:
+    """Approve a submission (button callback)."""
+    prompt = get_db().approve_submission(sub_id)
+    write_log("approve_submission", st.session_state.get("user_key", "guest"),
+              {"submission_id": sub_id, "prompt_id": prompt["id"] if prompt else None})
+    # Shown by the fragment (callbacks must not render elements)
+    st.session_state["admin_flash"] = "Approved and published!"
+
+
+@st.fragment(run_every=config.ADMIN_POLL_SECONDS)
+def render_job_status():
+    """Background job metrics (post-approval processing), polled."""
+    job_stats = get_db().jobs.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Job queue depth", job_stats["depth"])
+    col2.metric("Running", job_stats["running"])
+    col3.metric("Failed", job_stats["failed"])
+    col4.metric("Job latency (avg / p95)", f"{job_stats['avg_latency_ms']:.0f} / {job_stats['p95_latency_ms']:.0f} ms")
+
+
+@st.fragment(run_every=config.ADMIN_POLL_SECONDS)
+def render_pending_queue():
+    """Render the job table and the submissions queue, polled.
+    
+    Polls and Approve clicks rerun only this fragment, never the other
+    tabs. The submission list is re-read from the store only when its
+    generation moved; an idle poll redraws it from session state.
+    """
+    db = get_db()
+    
+    with st.expander("Background jobs"):
+        jobs = db.jobs.list_jobs()
+        if jobs:
+            st.dataframe(
+                pd.DataFrame(jobs, columns=["id", "name", "status", "attempts", "prompt_id", "enqueued_at", "latency_ms", "error"]),
+                use_container_width=True
+            )
+        else:
+            st.caption("No jobs yet.")
+    
+    if "admin_flash" in st.session_state:
+        toast(st.session_state.pop("admin_flash"))
+    
+    # Rebuild the list only when the submissions collection moved
+    version = db.generation("submissions")
+    cache = st.session_state.get("admin_pending_cache")
+    if cache is None or cache["version"] != version:
+        submissions = db.list_submissions(fields=("id", "title", "description", "status", "archived"))
+        pending = sum(1 for s in submissions if s["status"] == "pending")
+        if cache is not None and pending > cache["pending"]:
+            toast(f"{pending - cache['pending']} new submission(s) to review")
+        cache = {"version": version, "submissions": submissions, "pending": pending}
+        st.session_state["admin_pending_cache"] = cache
+    submissions = cache["submissions"]
+    
+    # Display submissions
+    if not submissions:
+        st.info("No pending submissions.")
+    else:
+        for sub in submissions:
+            with st.container():
+                status = sub.get("status", "pending")
+                status_color = {
+                    "pending": "🟠",
+                    "approved": "🟢",
+                    "rejected": "🔴"
+                }.get(status, "⚪")
+                
+                col1, col2, col3 = st.columns([4, 1, 1])
+                
+                with col1:
+                    st.markdown(f"{status_color} **{sub.get('title', 'Unnamed')}**")
+                    st.caption(sub.get("description") or ("Archived" if sub.get("archived") else "No description"))
+                
+                with col2:
+                    if st.button("Review", key=f"review_{sub['id']}", use_container_width=True):
+                        st.session_state["admin_review_id"] = sub["id"]
+                        st.rerun()
+                
+                with col3:
+                    if status == "pending":
+                        # Callback runs before the fragment rerun, so the list is already fresh
+                        st.button("Approve", key=f"approve_{sub['id']}", use_container_width=True, type="primary",
+                                  on_click=_approve, args=(sub["id"],))
+                    elif status == "rejected":
+                        st.caption("Rejected")
+                
+                st.divider()
+    
+    # Submissions that arrived while drawing: refresh this fragment only
+    if db.generation("submissions") != cache["version"]:
+        st.rerun(scope="fragment")
+
+
+def render_diagnostics():
+    """Render store memory accounting, budgets and allocation sites."""
+    db = get_db()
+    monitor = db.memory
+    
+    st.markdown("## Memory")
+    if st.button("Measure now") or not monitor.last:
+        monitor.check()
+    
+    total = sum(monitor.last.values())
+    rss = process_rss()
+    growth = monitor.growth_per_hour()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Store (approx.)", f"{total / 2**20:.1f} MB")
+    col2.metric("Process RSS", f"{rss / 2**20:.0f} MB" if rss else "n/a")
+    col3.metric("Growth", f"{growth / 2**20:+.1f} MB/h" if growth is not None else "n/a")
+    col4.metric("Budget", monitor.level.upper())
+    st.caption(
+        f"Soft budget {config.MEMORY_SOFT_BUDGET_MB} MB (warning logged) · "
+        f"hard budget {config.MEMORY_HARD_BUDGET_MB} MB (optional caches disabled) · "
+        f"measured every {config.MEMORY_CHECK_SECONDS} s while the app is used"
+    )
+    
+    sizes = pd.DataFrame(
+        [{"Component": name, "MB": round(size / 2**20, 3)} for name, size in monitor.last.items()]
+    ).sort_values("MB", ascending=False)
+    st.dataframe(sizes, use_container_width=True, hide_index=True)
+    
+    if len(monitor.history) > 1:
+        history = pd.DataFrame(
+            [{"Time": pd.Timestamp(ts, unit="s"), "Store MB": size / 2**20} for ts, size in monitor.history]
+        ).set_index("Time")
+        st.line_chart(history, height=200, color=config.PRIMARY_COLOR)
+    
+    packs = db.list_packs()
+    if packs:
+        st.markdown("### Mapped prompt packs")
+        st.caption("Memory-mapped files: shared page cache, not counted in the store total.")
+        st.dataframe(pd.DataFrame(packs), use_container_width=True, hide_index=True)
+    
+    st.markdown("### Submission archive")
+    archive = db.archive.info()
+    st.caption(
+        f"{archive['records']} processed submissions in {archive['segments']} segments "
+        f"({archive['bytes'] / 1024:.0f} KB on disk); reviewed more than "
+        f"{config.SUBMISSION_ARCHIVE_AFTER_DAYS} days ago are archived automatically."
+    )
+    if st.button("Archive all processed submissions now"):
+        toast(f"Archived {db.archive_processed(older_than_days=0)} submissions")
+    
+    st.markdown("### User partitions")
+    users = db.users.stats()
+    st.caption(
+        f"{users['resident']} active users resident ({users['loads']} loads, {users['evictions']} evictions); "
+        f"idle for {config.USER_IDLE_SECONDS // 60} min they are evicted."
+    )
+    
+    st.markdown("### Write admission")
+    admission = db.admission.stats()
+    st.dataframe(
+        pd.DataFrame([{"Operation": op, **counts} for op, counts in admission.items()]),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(
+        f"Per-user and global token buckets (see ADMISSION_LIMITS); requests that would wait more than "
+        f"{config.ADMISSION_MAX_WAIT_SECONDS} s are rejected."
+    )
+    
+    st.markdown("### Allocation sites")
+    # Tracing is process-wide: the toggle shows its state, and only an
+    # admin flipping it changes it
+    st.session_state["diag_tracing"] = is_tracing()
+    st.toggle(
+        "Trace allocations (tracemalloc, slows the app while on)",
+        key="diag_tracing",
+        on_change=lambda: set_tracing(st.session_state["diag_tracing"])
+    )
+    if is_tracing():
+        sites = top_allocations()
+        if sites:
+            st.dataframe(pd.DataFrame(sites), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No allocations traced yet; interact with the app and refresh.")
 
 
 def render_review():
@@ -180,13 +368,16 @@ def render_review():
     with col2:
         if submission.get("status") == "pending":
             if st.button("✓ Publish", type="primary"):
-                db.approve_submission(review_id)
+                prompt = db.approve_submission(review_id)
+                write_log("approve_submission", st.session_state.get("user_key", "guest"),
+                          {"submission_id": review_id, "prompt_id": prompt["id"] if prompt else None})
                 toast("Published!")
                 st.session_state.pop("admin_review_id", None)
                 st.rerun()
             
             if st.button("✗ Reject"):
                 db.reject_submission(review_id)
+                write_log("reject_submission", st.session_state.get("user_key", "guest"), {"submission_id": review_id})
                 toast("Rejected")
                 st.rerun()
     
@@ -1,8 +1,37 @@
 """Category page view."""
 
 import streamlit as st
-from lib.data_store import get_db
-from lib.utils import qp
+from lib.admission import Throttled
+from lib.data_store import get_db, CARD_FIELDS
+from lib.utils import qp, toast, write_log
+
+
+def _toggle_bookmark(prompt_id: str, user_key: str) -> None:
+    """Add or remove a prompt from the user's bookmarks."""
+    try:
+        added = get_db().toggle_bookmark(user_key, prompt_id)
+    except Throttled as e:
+        # Shown by the fragment (callbacks must not render elements)
+        st.session_state["category_flash"] = str(e)
+        return
+    write_log("toggle_bookmark", user_key, {"prompt_id": prompt_id, "added": added})
+
+
+@st.fragment
+def render_bookmark(prompt_id: str, user_key: str):
+    """Bookmark toggle of one card; clicking reruns only this card's control."""
+    is_bookmarked = get_db().is_bookmarked(user_key, prompt_id)
+    bookmark_label = "★ Bookmarked" if is_bookmarked else "☆ Bookmark"
+    st.button(
+        bookmark_label,
+        key=f"bookmark_{prompt_id}",
+        use_container_width=True,
+        on_click=_toggle_bookmark,
+        args=(prompt_id, user_key)
+    )
+    flash = st.session_state.pop("category_flash", None)
+    if flash:
+        toast(flash)
 
 
 def render():
@@ -19,27 +48,38 @@ def render():
     if not category:
         st.error("Category not found.")
         st.stop()
+    cat_id = category["id"]  # the link may use an alias
     
     # Header
     st.markdown(f"## {category['name']}")
     
     # Get prompts for this category
-    prompts = db.list_prompts(category_id=cat_id)
+    query = db.query("prompts").where("category_id", cat_id).where("status", "published").select(*CARD_FIELDS)
     
     # Sort options
-    sort_options = ["Highest rated", "Most used", "Recently added"]
+    sort_options = ["Highest rated", "Most used", "Recently added", "Trending"]
     try:
         selected_sort = st.radio("Sort by", sort_options, horizontal=True, index=0)
     except TypeError:
         selected_sort = st.radio("Sort by", sort_options, index=0)
     
+    # Get current user
+    user_key = st.session_state.get("user_key", "guest")
+    
+    if st.session_state.get("last_logged_category") != (cat_id, selected_sort):
+        st.session_state["last_logged_category"] = (cat_id, selected_sort)
+        write_log("view_category", user_key, {"category_id": cat_id, "sort": selected_sort})
+    
     # Apply sorting
-    if selected_sort == "Highest rated":
-        prompts = sorted(prompts, key=lambda x: x.get("avg_rating", 0), reverse=True)
-    elif selected_sort == "Most used":
-        prompts = sorted(prompts, key=lambda x: x.get("uses_total", 0), reverse=True)
-    elif selected_sort == "Recently added":
-        prompts = sorted(prompts, key=lambda x: x.get("created_at", ""), reverse=True)
+    sort_fields = {
+        "Highest rated": "avg_rating",
+        "Most used": "uses_total",
+        "Recently added": "created_at",
+    }
+    if selected_sort == "Trending":
+        prompts = db.list_trending(cat_id)
+    else:
+        prompts = query.order_by(sort_fields[selected_sort], descending=True).all()
     
     # Display prompts as cards
     if not prompts:
@@ -50,9 +90,6 @@ def render():
             st.rerun()
         return
     
-    # Get current user
-    user_key = st.session_state.get("user_key", "guest")
-    
     for prompt in prompts:
         with st.container():
             col1, col2 = st.columns([3, 1])
@@ -75,12 +112,7 @@ def render():
                     st.rerun()
                 
                 # Bookmark button
-                is_bookmarked = db.is_bookmarked(user_key, prompt["id"])
-                bookmark_label = "★ Bookmarked" if is_bookmarked else "☆ Bookmark"
-                
-                if st.button(bookmark_label, key=f"bookmark_{prompt['id']}", use_container_width=True):
-                    added = db.toggle_bookmark(user_key, prompt["id"])
-                    st.rerun()
+                render_bookmark(prompt["id"], user_key)
             
             st.divider()
 
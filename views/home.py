@@ -1,8 +1,8 @@
 """Home page view."""
 
 import streamlit as st
-from lib.data_store import get_db
-from lib.utils import qp
+from lib.data_store import get_db, CARD_FIELDS
+from lib.utils import qp, write_log
 
 
 def render():
@@ -20,6 +20,12 @@ def render():
     
     # Search bar
     search_query = st.text_input("Search", placeholder="Search for prompts...")
+    if search_query and search_query != st.session_state.get("last_logged_search"):
+        st.session_state["last_logged_search"] = search_query
+        write_log("search", st.session_state.get("user_key", "guest"), {"query": search_query})
+    
+    if search_query:
+        render_suggestions(db, search_query)
     
     # Get categories
     metiers = db.list_metiers()
@@ -31,18 +37,11 @@ def render():
     metier = metiers[0]
     categories = db.list_categories(metier["id"])
     
-    # Build category cards with top prompts
-    prompts = db.list_prompts(metier_id=metier["id"])
-    
-    # Apply search filter
+    # Search results (filter applied by the store)
     if search_query:
-        search_terms = search_query.lower().split()
-        filtered_prompts = []
-        for p in prompts:
-            search_text = f"{p.get('title', '')} {p.get('description', '')} {p.get('full_text', '')} {p.get('author_display_name_snapshot', '')}".lower()
-            if all(term in search_text for term in search_terms):
-                filtered_prompts.append(p)
-        prompts = filtered_prompts
+        prompts = db.search_prompts(search_query, metier_id=metier["id"], fields=CARD_FIELDS)
+    
+    render_facets(db)
     
     # Create category cards
     st.markdown("### Prompt Categories")
@@ -55,8 +54,19 @@ def render():
         
         with col:
             # Get top 3 prompts for this category
-            cat_prompts = [p for p in prompts if p.get("category_id") == category["id"]]
-            cat_prompts = sorted(cat_prompts, key=lambda x: x.get("avg_rating", 0), reverse=True)[:3]
+            if search_query:
+                cat_prompts = [p for p in prompts if p.get("category_id") == category["id"]]
+                cat_prompts = sorted(cat_prompts, key=lambda x: x.get("avg_rating", 0), reverse=True)[:3]
+            else:
+                cat_prompts = (
+                    db.query("prompts")
+                    .where("category_id", category["id"])
+                    .where("status", "published")
+                    .order_by("avg_rating", descending=True)
+                    .limit(3)
+                    .select(*CARD_FIELDS)
+                    .all()
+                )
             
             with st.container():
                 st.markdown(f"**{category['name']}**")
@@ -77,3 +87,77 @@ def render():
                     st.session_state['nav_cat'] = category["id"]
                     st.rerun()
 
+
+def render_suggestions(db, search_query: str):
+    """Render completions of the search text as one-click shortcuts.
+    
+    Prompts open their page, categories their category page; authors and
+    tags become facet filters.
+    """
+    suggestions = db.complete(search_query, limit=5, kind="prompt")
+    for kind in ("category", "author", "tag"):
+        suggestions += db.complete(search_query, limit=2, kind=kind)
+    if not suggestions:
+        return
+    
+    icons = {"prompt": "📝", "category": "📁", "author": "👤", "tag": "#"}
+    cols = st.columns(min(len(suggestions), 4))
+    for idx, suggestion in enumerate(suggestions):
+        with cols[idx % len(cols)]:
+            label = f"{icons[suggestion['kind']]} {suggestion['label']}"
+            if st.button(label, key=f"suggest_{suggestion['kind']}_{suggestion['id']}", use_container_width=True):
+                if suggestion["kind"] == "prompt":
+                    st.session_state['nav_view'] = 'prompt'
+                    st.session_state['nav_id'] = suggestion["id"]
+                elif suggestion["kind"] == "category":
+                    st.session_state['nav_view'] = 'category'
+                    st.session_state['nav_cat'] = suggestion["id"]
+                else:
+                    selected = st.session_state.setdefault(f"facet_{suggestion['kind']}", [])
+                    if suggestion["id"] not in selected:
+                        st.session_state[f"facet_{suggestion['kind']}"] = selected + [suggestion["id"]]
+                st.rerun()
+
+
+def render_facets(db):
+    """Render the combined category / tag / author filters and their results."""
+    facets = ("category", "tag", "author")
+    selected = {facet: st.session_state.get(f"facet_{facet}", []) for facet in facets}
+    counts = db.facet_counts(selected)
+    names = {
+        "category": lambda v: (db.get_category(v) or {}).get("name", v),
+        "author": lambda v: (db.get_author(v) or {}).get("display_name", v),
+        "tag": lambda v: f"#{v}",
+    }
+    
+    with st.expander("Browse by category, tag and author", expanded=any(selected.values())):
+        cols = st.columns(3)
+        for col, facet in zip(cols, facets):
+            facet_counts = counts.get(facet, {})
+            options = sorted(
+                (v for v, n in facet_counts.items() if n or v in selected[facet]),
+                key=lambda v: (-facet_counts[v], names[facet](v).lower())
+            )
+            with col:
+                st.multiselect(
+                    facet.title(),
+                    options,
+                    key=f"facet_{facet}",
+                    format_func=lambda v, facet=facet: f"{names[facet](v)} ({counts[facet].get(v, 0)})"
+                )
+        
+        if not any(selected.values()):
+            return
+        
+        results = db.filter_prompts(selected, limit=20)
+        st.caption(f"{db.count_filtered(selected)} matching prompts")
+        for prompt in results:
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.markdown(f"**{prompt.get('title', 'Unnamed Prompt')}**")
+                st.caption(f"{prompt.get('category_name', '')} | ⭐ {prompt.get('avg_rating', 0):.1f}")
+            with col2:
+                if st.button("Open", key=f"facet_open_{prompt['id']}"):
+                    st.session_state['nav_view'] = 'prompt'
+                    st.session_state['nav_id'] = prompt["id"]
+                    st.rerun()
@@ -1,8 +1,9 @@
 """My saved bookmarks page view."""
 
 import streamlit as st
-from lib.data_store import get_db
-from lib.utils import qp
+from lib.admission import Throttled
+from lib.data_store import get_db, CARD_FIELDS
+from lib.utils import qp, toast, write_log
 
 
 def render():
@@ -14,7 +15,7 @@ def render():
     
     st.markdown("## My Saved Prompts")
     
-    bookmarks = db.list_bookmarks(user_key)
+    bookmarks = db.list_bookmarks(user_key, fields=CARD_FIELDS)
     
     if not bookmarks:
         st.info("You haven't saved any prompts yet.")
@@ -37,8 +38,13 @@ def render():
                     st.rerun()
                 
                 if st.button("Remove", key=f"remove_{prompt['id']}", use_container_width=True):
-                    db.toggle_bookmark(user_key, prompt["id"])
-                    st.rerun()
+                    try:
+                        db.toggle_bookmark(user_key, prompt["id"])
+                    except Throttled as e:
+                        toast(str(e))
+                    else:
+                        write_log("toggle_bookmark", user_key, {"prompt_id": prompt["id"], "added": False})
+                        st.rerun()
             
             st.divider()
 
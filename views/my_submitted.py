@@ -15,8 +15,7 @@ def render():
     st.markdown("## My Submitted Prompts")
     
     # Get user's submissions
-    all_subs = db.list_submissions()
-    user_subs = [s for s in all_subs if s.get("created_by") == user_key]
+    user_subs = db.list_user_submissions(user_key)
     
     if not user_subs:
         st.info("You haven't submitted any prompts yet.")
@@ -40,6 +39,18 @@ def render():
                 st.error("✗ Rejected")
             
             st.markdown(f"### {submission.get('title', 'Unnamed')}")
+            
+            # Archived submissions keep only a stub in memory; details load on request
+            loaded = st.session_state.setdefault("loaded_submissions", set())
+            if submission.get("archived"):
+                if submission["id"] not in loaded:
+                    if st.button("Show details", key=f"load_{submission['id']}"):
+                        loaded.add(submission["id"])
+                        st.rerun()
+                    st.divider()
+                    continue
+                submission = db.get_submission(submission["id"])
+            
             st.markdown(submission.get("description", "No description"))
             
             # Expandable preview
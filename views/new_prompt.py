@@ -1,8 +1,16 @@
 """Create new prompt page view."""
 
+from typing import Dict, List, Optional
+
 import streamlit as st
+from lib.admission import Throttled
 from lib.data_store import get_db
-from lib.utils import qp, toast
+from lib.templates import CRAFT_FIELDS, build_full_text, compile_template, placeholders, validate_template
+from lib.utils import parse_tags, qp, toast, write_log
+
+NEW_CATEGORY = "+ Create new category..."
+NEW_AUTHOR = "+ Create new author..."
+MAX_TAGS = 5
 
 
 def render():
@@ -32,12 +40,11 @@ def render():
         cat_names = {c["name"]: c["id"] for c in categories}
         selected_cat_id = None
     
-    # Form fields
-    title = st.text_input("Prompt name")
-    description = st.text_area("Description text", height=100)
-    
-    # Category selection
-    cat_display_names = list(cat_names.keys()) + ["+ Create new category..."]
+    # Category and author pickers sit outside the form: they only switch
+    # which name fields the form shows. The CRAFT fields sit in their own
+    # fragment so the progress bar follows each edit; everything else is
+    # sent in one batch.
+    cat_display_names = list(cat_names.keys()) + [NEW_CATEGORY]
     cat_index = 0
     if selected_cat_id:
         for idx, cat in enumerate(categories):
@@ -47,111 +54,162 @@ def render():
     
     selected_cat_display = st.selectbox("Category", cat_display_names, index=cat_index)
     
-    if selected_cat_display == "+ Create new category...":
-        new_cat_name = st.text_input("New category name")
-        if new_cat_name:
-            category = db.get_or_create_category(metier["id"], new_cat_name)
-            category_id = category["id"]
-            category_name = category["name"]
-    elif selected_cat_display in cat_names:
-        category_id = cat_names[selected_cat_display]
-        category_name = selected_cat_display
-    else:
-        st.warning("Please select a category.")
-        category_id = None
-        category_name = None
-    
-    # Author selection
     authors = db.list_authors()
     author_names = {a["display_name"]: a["id"] for a in authors}
-    author_display = st.selectbox("Author", list(author_names.keys()) + ["+ Create new author..."])
-    
-    if author_display == "+ Create new author...":
-        new_author_name = st.text_input("New author name")
-        if new_author_name:
-            author = db.get_or_create_author(new_author_name)
-            author_id = author["id"]
-            author_display_name_snapshot = author["display_name"]
-    else:
-        author_id = author_names.get(author_display)
-        author_display_name_snapshot = author_display
+    author_display = st.selectbox("Author", list(author_names.keys()) + [NEW_AUTHOR])
     
-    # CRAFT fields
-    st.markdown("### CRAFT Fields")
-    
-    craft_context = st.text_area("[CONTEXT]", height=100)
-    craft_role = st.text_area("[ROLE]", height=100)
-    craft_action = st.text_area("[ACTION]", height=100)
-    craft_format = st.text_area("[FORMAT]", height=100)
-    craft_tone = st.text_area("[TONE]", height=100)
+    _craft_fields()
+    crafts = {field: st.session_state.get(_craft_key(field), "") for field in CRAFT_FIELDS}
+    full_text = build_full_text(crafts)
     
-    # Count filled fields
-    filled_fields = sum([
-        bool(craft_context),
-        bool(craft_role),
-        bool(craft_action),
-        bool(craft_format),
-        bool(craft_tone)
-    ])
-    st.progress(filled_fields / 5)
-    st.caption(f"Progress: {filled_fields}/5 fields filled")
-    
-    # Tags (optional)
-    tags_input = st.text_input("Tags (5 max)", placeholder="tag1, tag2, tag3")
-    
-    # Preview full text
-    if st.button("Preview Full Text"):
-        full_text = f"{craft_context}\n\n{craft_role}\n\n{craft_action}\n\n{craft_format}\n\n{craft_tone}"
-        st.text_area("Preview", full_text, height=300, disabled=True)
-    
-    # Save button
-    if st.button("SAVE PROMPT", type="primary"):
-        # Validation
-        if not title:
-            st.error("Please enter a prompt name.")
-            return
-        if not description:
-            st.error("Please enter a description.")
-            return
-        if not category_id:
-            st.error("Please select or create a category.")
-            return
-        if not author_id:
-            st.error("Please select or create an author.")
-            return
-        if not all([craft_context, craft_role, craft_action, craft_format, craft_tone]):
-            st.error("Please fill all CRAFT fields.")
-            return
-        
-        # Build full text
-        full_text = f"{craft_context}\n\n{craft_role}\n\n{craft_action}\n\n{craft_format}\n\n{craft_tone}"
-        
-        # Create submission
-        payload = {
-            "title": title,
-            "description": description,
-            "metier_id": metier["id"],
-            "category_id": category_id,
-            "category_name": category_name,
-            "author_id": author_id,
-            "author_display_name_snapshot": author_display_name_snapshot,
-            "craft_context": craft_context,
-            "craft_role": craft_role,
-            "craft_action": craft_action,
-            "craft_format": craft_format,
-            "craft_tone": craft_tone,
-            "full_text": full_text,
-            "created_by": user_key
-        }
+    with st.form("new_prompt_form"):
+        title = st.text_input("Prompt name")
+        description = st.text_area("Description text", height=100)
         
-        submission = db.create_submission(payload)
+        new_cat_name = ""
+        if selected_cat_display == NEW_CATEGORY:
+            new_cat_name = st.text_input("New category name")
+        new_author_name = ""
+        if author_display == NEW_AUTHOR:
+            new_author_name = st.text_input("New author name")
         
-        toast("Prompt submitted for review!")
-        st.balloons()
+        # Tags (optional)
+        tags_input = st.text_input(f"Tags ({MAX_TAGS} max)", placeholder="tag1, tag2, tag3")
         
-        st.success(f"Submission created! ID: {submission['id']}")
+        col1, col2 = st.columns(2)
+        with col1:
+            preview = st.form_submit_button("Preview Full Text", use_container_width=True)
+        with col2:
+            save = st.form_submit_button("SAVE PROMPT", type="primary", use_container_width=True)
         
+        if preview:
+            st.text_area("Preview", full_text, height=300, disabled=True)
+            template_errors = validate_template(full_text)
+            for error in template_errors:
+                st.warning(error)
+            names = [] if template_errors else placeholders(compile_template(full_text))
+            if names:
+                st.caption("Placeholders: " + ", ".join(f"{{{name}}}" for name in names))
+    
+    if save:
+        submission = _save_submission(
+            db, user_key, metier, title, description,
+            category_id=None if selected_cat_display == NEW_CATEGORY else cat_names.get(selected_cat_display),
+            category_name=selected_cat_display, new_cat_name=new_cat_name,
+            author_id=None if author_display == NEW_AUTHOR else author_names.get(author_display),
+            author_name=author_display, new_author_name=new_author_name,
+            crafts=crafts,
+            full_text=full_text,
+            tags=parse_tags(tags_input)
+        )
+        if submission:
+            st.session_state["new_prompt_submission_id"] = submission["id"]
+            toast("Prompt submitted for review!")
+            st.balloons()
+    
+    submission_id = st.session_state.get("new_prompt_submission_id")
+    if submission_id:
+        st.success(f"Submission created! ID: {submission_id}")
         if st.button("View My Submissions"):
+            del st.session_state["new_prompt_submission_id"]
             st.session_state['nav_view'] = 'my_submitted'
             st.rerun()
 
+
+def _craft_key(field: str) -> str:
+    return f"new_prompt_{field}"
+
+
+@st.fragment
+def _craft_fields() -> None:
+    """The CRAFT text areas and their progress bar.
+    
+    Editing a field reruns only this fragment, not the page; the values are
+    read from session state when the form is submitted.
+    """
+    st.markdown("### CRAFT Fields")
+    st.caption("Use {placeholders} such as {client_name} for values filled in before copying.")
+    
+    values = [
+        st.text_area(f"[{field.removeprefix('craft_').upper()}]", height=100, key=_craft_key(field))
+        for field in CRAFT_FIELDS
+    ]
+    
+    # Count filled fields
+    filled_fields = sum(bool(value) for value in values)
+    st.progress(filled_fields / len(CRAFT_FIELDS))
+    st.caption(f"Progress: {filled_fields}/{len(CRAFT_FIELDS)} fields filled")
+
+
+def _save_submission(db, user_key: str, metier: Dict, title: str, description: str,
+                     category_id: Optional[str], category_name: str, new_cat_name: str,
+                     author_id: Optional[str], author_name: str, new_author_name: str,
+                     crafts: Dict[str, str], full_text: str, tags: List[str]) -> Optional[Dict]:
+    """Validate the submitted form and create the submission.
+    
+    A new category or author is only created here, once the form is valid.
+    
+    Returns:
+        The submission, or None if validation failed (the error is shown)
+    """
+    # Validation
+    if not title:
+        st.error("Please enter a prompt name.")
+        return None
+    if not description:
+        st.error("Please enter a description.")
+        return None
+    if not category_id and not new_cat_name.strip():
+        st.error("Please select or create a category.")
+        return None
+    if not author_id and not new_author_name.strip():
+        st.error("Please select or create an author.")
+        return None
+    if not all(crafts.values()):
+        st.error("Please fill all CRAFT fields.")
+        return None
+    template_errors = validate_template(full_text)
+    if template_errors:
+        st.error("Please fix the placeholders: " + "; ".join(template_errors))
+        return None
+    if len(tags) > MAX_TAGS:
+        st.error(f"Please use at most {MAX_TAGS} tags.")
+        return None
+    
+    # Admit the write before creating anything, so a throttled save leaves
+    # no new category or author behind
+    try:
+        db.admission.admit("create_submission", user_key)
+    except Throttled as e:
+        st.error(str(e))
+        return None
+    
+    # Create the new category / author only now that the prompt is saved
+    if not category_id:
+        category = db.get_or_create_category(metier["id"], new_cat_name.strip())
+        category_id = category["id"]
+        category_name = category["name"]
+    
+    if not author_id:
+        author = db.get_or_create_author(new_author_name.strip())
+        author_id = author["id"]
+        author_name = author["display_name"]
+    
+    # Create submission
+    payload = {
+        "title": title,
+        "description": description,
+        "metier_id": metier["id"],
+        "category_id": category_id,
+        "category_name": category_name,
+        "author_id": author_id,
+        "author_display_name_snapshot": author_name,
+        **crafts,
+        "full_text": full_text,
+        "tags": tags,
+        "created_by": user_key
+    }
+    
+    submission = db.create_submission(payload, admit=False)
+    write_log("create_submission", user_key, {"submission_id": submission["id"], "category_id": category_id})
+    return submission
@@ -1,8 +1,104 @@
 """Prompt detail page view."""
 
+from typing import List
+
+import pandas as pd
 import streamlit as st
+import config
+from lib.admission import Throttled
 from lib.data_store import get_db
-from lib.utils import qp, toast
+from lib.templates import placeholders, render as render_filled
+from lib.utils import qp, toast, write_log
+
+
+def _submit_rating(prompt_id: str, user_key: str) -> None:
+    """Store the slider value as the user's rating."""
+    stars = st.session_state["your_rating"]
+    try:
+        get_db().rate_prompt(user_key, prompt_id, stars)
+    except Throttled as e:
+        st.session_state["detail_flash"] = str(e)
+        return
+    write_log("rate_prompt", user_key, {"prompt_id": prompt_id, "stars": stars})
+    st.session_state["detail_flash"] = "Rating submitted!"
+
+
+def _toggle_bookmark(prompt_id: str, user_key: str) -> None:
+    """Add or remove the prompt from the user's bookmarks."""
+    try:
+        added = get_db().toggle_bookmark(user_key, prompt_id)
+    except Throttled as e:
+        st.session_state["detail_flash"] = str(e)
+        return
+    write_log("toggle_bookmark", user_key, {"prompt_id": prompt_id, "added": added})
+    st.session_state["detail_flash"] = "Saved to bookmarks!" if added else "Removed from bookmarks!"
+
+
+def _filled_text(prompt_id: str, segments: List[str]) -> str:
+    """The prompt text with the user's placeholder values filled in."""
+    values = {name: st.session_state.get(f"tpl_{prompt_id}_{name}", "") for name in placeholders(segments)}
+    return render_filled(segments, values)
+
+
+def _show_flash() -> None:
+    flash = st.session_state.pop("detail_flash", None)
+    if flash:
+        toast(flash)
+
+
+@st.fragment
+def render_rating(prompt_id: str, user_key: str):
+    """Rating controls; submitting reruns only this fragment."""
+    db = get_db()
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.slider("Your rating", 1, 5, 3, key="your_rating")
+        st.button("Submit rating", on_click=_submit_rating, args=(prompt_id, user_key))
+        _show_flash()
+    
+    with col2:
+        summary = db.get_rating_summary(prompt_id)
+        st.markdown(f"**Average rating:** ⭐ {summary['avg']:.1f}")
+        caption = f"{summary['count']} ratings · weighted {summary['bayesian']:.1f}"
+        mine = db.get_user_rating(user_key, prompt_id)
+        if mine:
+            caption = f"Your rating: {mine} ★ · " + caption
+        st.caption(caption)
+    
+    # Star distribution
+    if summary["count"]:
+        distribution = pd.DataFrame(
+            {"Ratings": summary["histogram"]},
+            index=[f"{n} ★" for n in range(1, 6)]
+        )
+        st.bar_chart(distribution, horizontal=True, height=180, color=config.PRIMARY_COLOR)
+
+
+@st.fragment
+def render_bookmark(prompt_id: str, user_key: str):
+    """Bookmark toggle; clicking reruns only this fragment."""
+    is_bookmarked = get_db().is_bookmarked(user_key, prompt_id)
+    bookmark_label = "♥ Save prompt" if is_bookmarked else "♡ Save prompt"
+    st.button(
+        bookmark_label,
+        key="bookmark_toggle",
+        use_container_width=True,
+        on_click=_toggle_bookmark,
+        args=(prompt_id, user_key)
+    )
+    _show_flash()
+
+
+@st.fragment
+def render_template(prompt_id: str, segments: List[str]):
+    """Placeholder inputs and the filled prompt (reruns on its own)."""
+    names = placeholders(segments)
+    cols = st.columns(min(len(names), 3))
+    for idx, name in enumerate(names):
+        with cols[idx % len(cols)]:
+            st.text_input(name.replace("_", " ").capitalize(), key=f"tpl_{prompt_id}_{name}")
+    st.code(_filled_text(prompt_id, segments), language=None, wrap_lines=True)
 
 
 def render():
@@ -20,19 +116,29 @@ def render():
         st.error("Prompt not found.")
         st.stop()
     
+    # Count one view per session and prompt
+    viewed = st.session_state.setdefault("viewed_prompts", set())
+    if prompt_id not in viewed:
+        viewed.add(prompt_id)
+        db.record_view(prompt_id)
+        write_log("view_prompt", st.session_state.get("user_key", "guest"), {"prompt_id": prompt_id})
+    
     # Header with metadata
     col1, col2 = st.columns([3, 1])
     with col1:
         st.markdown(f"# {prompt.get('title', 'Unnamed Prompt')}")
         st.markdown(prompt.get("description", "No description"))
+        if prompt.get("tags"):
+            st.caption(" · ".join(f"#{tag}" for tag in prompt["tags"]))
     
     with col2:
         author = prompt.get("author_display_name_snapshot", "Unknown")
         rating = prompt.get("avg_rating", 0)
-        uses = prompt.get("uses_total", 0)
+        counts = db.get_counts(prompt_id)
         st.markdown(f"**By:** {author}")  
         st.markdown(f"**Rating:** ⭐ {rating:.1f}")
-        st.markdown(f"**Uses:** {uses}")
+        st.markdown(f"**Uses:** {counts['uses']} · **Views:** {counts['views']}")
+        st.markdown(f"**Version:** {prompt.get('version', '1.0')}")
     
     # View toggle
     view_options = ["CRAFT", "Full"]
@@ -71,31 +177,53 @@ def render():
         full_text = prompt.get("full_text", "")
         st.text_area("Full Text", full_text, disabled=True, height=300, label_visibility="collapsed")
     
-    # Rating section
-    st.markdown("### Rate this prompt")
-    col1, col2 = st.columns([2, 1])
+    # Placeholders (compiled at approval)
+    segments = db.get_template(prompt_id)
+    if segments:
+        st.markdown("### Fill in the placeholders")
+        render_template(prompt_id, segments)
     
-    with col1:
-        rating = st.slider("Your rating", 1, 5, 3)
-        if st.button("Submit rating"):
-            db.rate_prompt(user_key, prompt_id, rating)
-            toast("Rating submitted!")
-            st.rerun()
+    # Version history
+    versions = db.list_prompt_versions(prompt_id)
+    if len(versions) > 1:
+        with st.expander(f"Version history ({len(versions)} versions)"):
+            for v in versions:
+                changed = ", ".join(v["changed_fields"])
+                by = f" by {v['edited_by']}" if v["edited_by"] else ""
+                note = f" — {v['note']}" if v["note"] else ""
+                st.markdown(f"**v{v['version']}** · {(v['edited_at'] or '')[:16]}{by}{note}")
+                st.caption(f"Changed: {changed}")
+            
+            selected_version = st.selectbox(
+                "View version", [v["version"] for v in versions], key="history_version"
+            )
+            old = db.get_prompt_version(prompt_id, selected_version)
+            if old:
+                st.text_area(
+                    "Version text",
+                    old.get("full_text", ""),
+                    key=f"history_text_{selected_version}",
+                    disabled=True,
+                    height=200,
+                    label_visibility="collapsed"
+                )
     
-    with col2:
-        avg_rating = prompt.get("avg_rating", 0)
-        st.markdown(f"**Average rating:** ⭐ {avg_rating:.1f}")
+    # Rating section
+    st.markdown("### Rate this prompt")
+    render_rating(prompt_id, user_key)
     
     # Action buttons
     st.divider()
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        full_text = prompt.get("full_text", "")
+        full_text = _filled_text(prompt_id, segments) if segments else prompt.get("full_text", "")
         
         # Try clipboard
         try:
             if st.button("COPY PROMPT", type="primary", use_container_width=True):
+                db.record_use(prompt_id)
+                write_log("copy_prompt", user_key, {"prompt_id": prompt_id})
                 st.clipboard(full_text)
                 toast("Copied to clipboard!")
         except AttributeError:
@@ -104,18 +232,26 @@ def render():
     with col2:
         copilot_url = st.session_state.get("copilot_url", "https://copilot.microsoft.com")
         if st.button("OPEN COPILOT", use_container_width=True):
+            db.record_use(prompt_id)
+            write_log("open_copilot", user_key, {"prompt_id": prompt_id})
             import webbrowser
             webbrowser.open(copilot_url)
     
     with col3:
-        is_bookmarked = db.is_bookmarked(user_key, prompt_id)
-        bookmark_label = "♥ Save prompt" if is_bookmarked else "♡ Save prompt"
-        
-        if st.button(bookmark_label, use_container_width=True):
-            added = db.toggle_bookmark(user_key, prompt_id)
-            if added:
-                toast("Saved to bookmarks!")
-            else:
-                toast("Removed from bookmarks!")
-            st.rerun()
-
+        render_bookmark(prompt_id, user_key)
+    
+    # Related prompts
+    related = db.related_prompts(prompt_id, k=5)
+    if related:
+        st.divider()
+        st.markdown("### Related prompts")
+        for other in related:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown(f"**{other.get('title', 'Unnamed Prompt')}**")
+                st.caption(f"{other.get('category_name', '')} | ⭐ {other.get('avg_rating', 0):.1f}")
+            with col2:
+                if st.button("Open", key=f"related_{other['id']}", use_container_width=True):
+                    st.session_state['nav_view'] = 'prompt'
+                    st.session_state['nav_id'] = other["id"]
+                    st.rerun()